@@ -0,0 +1,66 @@
+"""
+EmotionMonopolar per packet: per-sample RawChannelsArray lists (the previous ingestion), the
+batched native push, and the batched push with the four channels on a thread pool.
+Needs pyem-st-artifacts and its native library.
+
+    python benchmarks/emotion_monopolar.py --seconds 120 --packet-size 4
+"""
+import argparse
+import os
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from neuro_impl.emotions_monopolar_controller import EmotionMonopolar
+from neuro_impl.signal_batch import SignalBatch
+from neuro_impl.simulated_sensor import SyntheticSignalSource
+from neuro_impl.utils import BB_sampling_rate
+
+CALLBACKS = ('isArtifactedSequenceCallback', 'isBothSidesArtifactedCallback', 'progressCalibrationCallback',
+             'lastSpectralDataCallback', 'rawSpectralDataCallback', 'lastMindDataCallback')
+
+
+def batches(signal, packet_size):
+    for i in range(0, len(signal), packet_size):
+        samples = np.ascontiguousarray(signal[i:i + packet_size])
+        n = len(samples)
+        yield SignalBatch(samples, np.arange(i, i + n), np.zeros(n, dtype=np.int32), np.zeros(n), 0.0)
+
+
+def run(controller, packets):
+    for attr in CALLBACKS:
+        setattr(controller, attr, lambda *args: None)
+    controller.start_calibration()
+    latencies = []
+    for batch in packets:
+        started = perf_counter()
+        controller.process_data(batch)
+        latencies.append(perf_counter() - started)
+    controller.close()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=120.0, help='seconds of signal to process')
+    parser.add_argument('--packet-size', type=int, default=4, help='samples per packet')
+    parser.add_argument('--workers', type=int, default=4, help='thread pool size of the pooled run')
+    args = parser.parse_args()
+
+    signal = SyntheticSignalSource(frequencies=(10.0,), seed=0).read(int(args.seconds * BB_sampling_rate))
+    packets = list(batches(signal, args.packet_size))
+
+    for name, controller in (('per-sample lists', EmotionMonopolar(native_push=False)),
+                             ('batched', EmotionMonopolar()),
+                             (f'batched, {args.workers} threads', EmotionMonopolar(workers=args.workers))):
+        lat = np.array(run(controller, packets)) * 1e3
+        total = lat.sum() / 1e3
+        print(f"{name:>20}: {len(lat) / total:9.0f} packets/s  {args.seconds / total:7.1f}x real time  "
+              f"latency ms p50={np.percentile(lat, 50):.4f} p99={np.percentile(lat, 99):.4f} max={lat.max():.3f}")
+
+
+if __name__ == '__main__':
+    main()
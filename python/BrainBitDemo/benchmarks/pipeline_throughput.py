@@ -0,0 +1,114 @@
+"""
+Headless throughput / latency / memory benchmark of the acquisition pipeline,
+driven by the simulated BrainBit sensor instead of a headset.
+
+    python benchmarks/pipeline_throughput.py --source synthetic --speed 0 --seconds 10 --consumer spectrum
+    python benchmarks/pipeline_throughput.py --source screens/eeg_recording --speed 4 --consumer monopolar
+"""
+import argparse
+import os
+import sys
+import tracemalloc
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from PyQt6.QtCore import QCoreApplication, QTimer
+from neurosdk.cmn_types import SensorState
+
+from neuro_impl.brain_bit_controller import BrainBitController
+from neuro_impl.simulated_sensor import SimulatedScanner, SyntheticSignalSource, WfdbSignalSource
+from neuro_impl.stream_bus import StreamTopic
+
+
+def build_consumer(name):
+    match name:
+        case 'spectrum':
+            from neuro_impl.spectrum_controller import SpectrumController
+            controller = SpectrumController()
+            return controller.process_data
+        case 'monopolar':
+            from neuro_impl.emotions_monopolar_controller import EmotionMonopolar
+            controller = EmotionMonopolar()
+            for attr in ('isArtifactedSequenceCallback', 'isBothSidesArtifactedCallback',
+                         'progressCalibrationCallback', 'lastSpectralDataCallback',
+                         'rawSpectralDataCallback', 'lastMindDataCallback'):
+                setattr(controller, attr, lambda *args: None)
+            controller.start_calibration()
+            return controller.process_data
+        case 'none':
+            return lambda signal: None
+        case _:
+            raise ValueError(f"Unknown consumer {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--source', default='synthetic', help="'synthetic' or a WFDB record path")
+    parser.add_argument('--speed', type=float, default=0.0, help='1 = real time, N = N x real time, 0 = unthrottled')
+    parser.add_argument('--seconds', type=float, default=10.0, help='wall-clock duration of the run')
+    parser.add_argument('--consumer', default='spectrum', choices=['spectrum', 'monopolar', 'none'])
+    parser.add_argument('--packet-size', type=int, default=4)
+    parser.add_argument('--packet-loss', type=float, default=0.0, help='probability of dropping each packet')
+    args = parser.parse_args()
+
+    if args.source == 'synthetic':
+        source_factory = SyntheticSignalSource
+    else:
+        source_factory = lambda: WfdbSignalSource(args.source)
+
+    app = QCoreApplication(sys.argv)
+    scanner = SimulatedScanner(source_factory, speed=args.speed, packet_size=args.packet_size,
+                               packet_loss=args.packet_loss)
+    controller = BrainBitController(scanner=scanner)
+    consumer = build_consumer(args.consumer)
+
+    latencies = []
+    counts = {'samples': 0, 'packets': 0}
+    clock = {}
+
+    def signal_received(signal):
+        started = perf_counter()
+        consumer(signal)
+        latencies.append(perf_counter() - started)
+        counts['samples'] += len(signal)
+        counts['packets'] += 1
+
+    def connected(state):
+        if state is not SensorState.StateInRange:
+            print("Simulated sensor failed to connect")
+            app.quit()
+            return
+        tracemalloc.start()
+        clock['start'] = perf_counter()
+        controller.start_signal()
+        QTimer.singleShot(int(args.seconds * 1000), app.quit)
+
+    controller.bus.subscribe(StreamTopic.Signal, signal_received)
+    controller.sensorConnectionState.connect(connected)
+    controller.create_and_connect(scanner.sensors()[0])
+    app.exec()
+
+    elapsed = perf_counter() - clock.get('start', perf_counter())
+    controller.stop_signal()
+    _, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+    tracemalloc.stop()
+
+    lat = np.array(latencies) * 1e3 if latencies else np.zeros(1)
+    print(f"consumer={args.consumer} source={args.source} speed={args.speed}")
+    print(f"packets={counts['packets']} samples={counts['samples']} elapsed={elapsed:.2f}s")
+    print(f"throughput={counts['samples'] / max(elapsed, 1e-9):.0f} samples/s "
+          f"({counts['samples'] / max(elapsed, 1e-9) / 250:.1f}x real time)")
+    print(f"callback latency ms: p50={np.percentile(lat, 50):.3f} p99={np.percentile(lat, 99):.3f} "
+          f"max={lat.max():.3f}")
+    print(f"python heap peak={peak / 2 ** 20:.1f} MiB")
+    print("buffers: " + ' '.join(f"{k}={v}" for k, v in controller.buffer_stats().items()))
+    print("integrity: " + ' '.join(f"{k}={v}" for k, v in controller.integrity_stats().items()))
+    for command, stats in controller.command_latency_stats().items():
+        print(f"command {command}: exec p50={stats['exec']['p50_ms']}ms max={stats['exec']['max_ms']:.2f}ms "
+              f"queued max={stats['queued']['max_ms']:.2f}ms")
+
+
+if __name__ == '__main__':
+    main()
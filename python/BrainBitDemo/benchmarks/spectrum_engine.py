@@ -0,0 +1,81 @@
+"""
+Batched NumPy spectrum engine against the previous per-channel SpectrumMath path,
+fed the same synthetic packets. Reports packets/s and per-packet latency of each.
+
+    python benchmarks/spectrum_engine.py --seconds 600 --packet-size 4
+"""
+import argparse
+import os
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from neuro_impl.simulated_sensor import SyntheticSignalSource
+from neuro_impl.spectrum_engine import SpectrumEngine
+from neuro_impl.utils import BB_channels, BB_sampling_rate
+
+
+def run_engine(packets):
+    engine = SpectrumEngine()
+    frames = 0
+    latencies = []
+    for packet in packets:
+        started = perf_counter()
+        for frame in engine.push(packet):
+            frame.spectrum.tolist()
+            [frame.waves(i) for i in range(len(BB_channels))]
+            frames += 1
+        latencies.append(perf_counter() - started)
+    return latencies, frames
+
+
+def run_spectrum_math(packets):
+    from spectrum_lib.spectrum_lib import SpectrumMath
+    maths = [SpectrumMath(BB_sampling_rate, BB_sampling_rate * 4, 5) for _ in BB_channels]
+    for math in maths:
+        math.init_params(50, True)
+        math.set_waves_coeffs(0.0, 1.0, 1.0, 1.0, 0.0)
+    frames = 0
+    latencies = []
+    for packet in packets:
+        started = perf_counter()
+        columns = [packet[:, i].tolist() for i in range(len(BB_channels))]
+        for math, column in zip(maths, columns):
+            math.push_and_process_data(column)
+        for math in maths:
+            frames += len(math.read_raw_spectrum_info_arr())
+            math.read_waves_spectrum_info_arr()
+            math.set_new_sample_size()
+        latencies.append(perf_counter() - started)
+    return latencies, frames // len(BB_channels)
+
+
+def report(name, latencies, frames, seconds):
+    lat = np.array(latencies) * 1e3
+    total = lat.sum() / 1e3
+    print(f"{name:>13}: {len(lat) / total:10.0f} packets/s  {seconds / total:8.1f}x real time  "
+          f"frames={frames}  latency ms p50={np.percentile(lat, 50):.4f} p99={np.percentile(lat, 99):.4f} "
+          f"max={lat.max():.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=300.0, help='seconds of signal to process')
+    parser.add_argument('--packet-size', type=int, default=4, help='samples per packet')
+    args = parser.parse_args()
+
+    signal = SyntheticSignalSource(frequencies=(10.0, 1.7), seed=0).read(int(args.seconds * BB_sampling_rate)) * 1e3
+    packets = [signal[i:i + args.packet_size] for i in range(0, len(signal), args.packet_size)]
+
+    report('SpectrumEngine', *run_engine(packets), args.seconds)
+    try:
+        report('SpectrumMath', *run_spectrum_math(packets), args.seconds)
+    except (ImportError, OSError) as e:
+        print(f"SpectrumMath unavailable here ({e}); only the engine was measured")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Decisions per second, per-decision latency and accuracy of the streaming SSVEP classifier on a
+synthetic session that cycles through the stimulus frequencies, with and without the filter bank.
+
+    python benchmarks/ssvep_classifier.py --segments 12 --segment-seconds 8 --window 2
+"""
+import argparse
+import os
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from neuro_impl.simulated_sensor import SyntheticSignalSource
+from neuro_impl.ssvep_classifier import SsvepClassifier
+from neuro_impl.utils import BB_sampling_rate
+
+STIMULI = (1.7, 3.7, 5.2)
+
+
+def session(segments, segment_seconds, noise):
+    """(signal in mV, attended frequency per sample)."""
+    n = int(segment_seconds * BB_sampling_rate)
+    parts, truth = [], []
+    for i in range(segments):
+        frequency = STIMULI[i % len(STIMULI)]
+        source = SyntheticSignalSource(frequencies=(frequency, 2 * frequency), noise=noise, seed=i)
+        parts.append(source.read(n) * 1e3)
+        truth.append(np.full(n, frequency))
+    return np.concatenate(parts), np.concatenate(truth)
+
+
+def run(signal, truth, packet_size, window, filter_bank):
+    classifier = SsvepClassifier(STIMULI, window_seconds=window, filter_bank=filter_bank)
+    latencies, correct, scored = [], 0, 0
+    started_all = perf_counter()
+    for i in range(0, len(signal), packet_size):
+        started = perf_counter()
+        decisions = classifier.push(signal[i:i + packet_size])
+        if decisions:
+            latencies.append((perf_counter() - started) / len(decisions))
+        for decision in decisions:
+            first = decision.sample_index - classifier.window
+            # Only windows inside one segment have a single right answer
+            if truth[first] == truth[decision.sample_index - 1]:
+                scored += 1
+                correct += decision.frequency == truth[first]
+    total = perf_counter() - started_all
+    return latencies, correct / max(scored, 1), total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--segments', type=int, default=12)
+    parser.add_argument('--segment-seconds', type=float, default=8.0)
+    parser.add_argument('--window', type=float, default=2.0, help='classifier window in seconds')
+    parser.add_argument('--packet-size', type=int, default=4, help='samples per packet')
+    parser.add_argument('--noise', type=float, default=40e-6, help='gaussian noise in volts per channel')
+    args = parser.parse_args()
+
+    signal, truth = session(args.segments, args.segment_seconds, args.noise)
+    seconds = len(signal) / BB_sampling_rate
+    for filter_bank in (False, True):
+        latencies, accuracy, total = run(signal, truth, args.packet_size, args.window, filter_bank)
+        lat = np.array(latencies) * 1e3
+        print(f"{'FBCCA' if filter_bank else 'CCA':>5}: {len(lat) / total:8.0f} decisions/s  "
+              f"{seconds / total:6.1f}x real time  accuracy={accuracy:.3f}  latency ms "
+              f"p50={np.percentile(lat, 50):.3f} p99={np.percentile(lat, 99):.3f} max={lat.max():.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Per-packet cost of tracking the stimulus frequencies and their harmonics with the sliding DFT,
+against recomputing a full Hann-windowed FFT of the same window on every packet.
+
+    python benchmarks/ssvep_tracker.py --seconds 120 --packet-size 4
+"""
+import argparse
+import os
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from neuro_impl.simulated_sensor import SyntheticSignalSource
+from neuro_impl.ssvep_tracker import SsvepTracker
+from neuro_impl.utils import BB_sampling_rate
+
+STIMULI = (1.7, 3.7, 5.2)
+
+
+def run_tracker(packets, harmonics):
+    tracker = SsvepTracker(STIMULI, harmonics=harmonics)
+    latencies = []
+    for packet in packets:
+        started = perf_counter()
+        tracker.push(packet)
+        latencies.append(perf_counter() - started)
+    return latencies
+
+
+def run_fft(packets, window):
+    ring = np.zeros((window, packets[0].shape[1]))
+    hann = np.hanning(window)[:, None]
+    latencies = []
+    for packet in packets:
+        started = perf_counter()
+        ring = np.roll(ring, -len(packet), axis=0)
+        ring[-len(packet):] = packet
+        np.abs(np.fft.rfft(ring * hann, axis=0))
+        latencies.append(perf_counter() - started)
+    return latencies
+
+
+def report(name, latencies, seconds):
+    lat = np.array(latencies) * 1e3
+    print(f"{name:>12}: {seconds / (lat.sum() / 1e3):8.1f}x real time  latency ms "
+          f"p50={np.percentile(lat, 50):.4f} p99={np.percentile(lat, 99):.4f} max={lat.max():.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=120.0, help='seconds of signal to process')
+    parser.add_argument('--packet-size', type=int, default=4, help='samples per packet')
+    parser.add_argument('--harmonics', type=int, default=3)
+    args = parser.parse_args()
+
+    signal = SyntheticSignalSource(frequencies=STIMULI[:1], seed=0).read(int(args.seconds * BB_sampling_rate)) * 1e3
+    packets = [signal[i:i + args.packet_size] for i in range(0, len(signal), args.packet_size)]
+
+    report('SsvepTracker', run_tracker(packets, args.harmonics), args.seconds)
+    report('full FFT', run_fft(packets, BB_sampling_rate * 4), args.seconds)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,12 @@
 import subprocess
 import atexit
+from threading import Thread
+from time import monotonic
 
 # Initialize the GazeTracking subprocess
 gaze_process = None
+# Called with (line, monotonic time it arrived) for every line the subprocess prints
+gaze_listeners = []
 
 def start_gaze_process(script_path):
     global gaze_process
@@ -15,6 +19,7 @@ def start_gaze_process(script_path):
             text=True
         )
         print("GazeTracking subprocess started successfully.")
+        Thread(target=read_gaze_output, args=(gaze_process,), name="gaze-output", daemon=True).start()
     except Exception as e:
         print(f"Error starting GazeTracking subprocess: {e}")
         gaze_process = None
@@ -22,6 +27,23 @@ def start_gaze_process(script_path):
     # Register cleanup for the subprocess
     atexit.register(cleanup_gaze_process)
 
+def add_gaze_listener(callback):
+    gaze_listeners.append(callback)
+
+def remove_gaze_listener(callback):
+    if callback in gaze_listeners:
+        gaze_listeners.remove(callback)
+
+def read_gaze_output(process):
+    # Also keeps the stdout pipe drained so the subprocess never blocks on a full pipe
+    for line in process.stdout:
+        received = monotonic()
+        for callback in list(gaze_listeners):
+            try:
+                callback(line.rstrip('\n'), received)
+            except Exception as e:
+                print(f"Error in gaze listener: {e}")
+
 def cleanup_gaze_process():
     global gaze_process
     if gaze_process and gaze_process.poll() is None:
@@ -6,6 +6,8 @@ import os
 from PyQt6.QtWidgets import QApplication, QStackedWidget
 
 from neuro_impl.brain_bit_controller import brain_bit_controller
+from neuro_impl.session_buffer import recover_sessions
+from neuro_impl.save_worker import save_worker
 
 from screens.search_screen import SearchScreen
 from screens.resistance_screen import ResistanceScreen
@@ -18,12 +20,15 @@ from screens.menu_screen import MenuScreen
 from screens.blackwhite_screen import BlackWhiteScreen
 from screens.covert_screen import CovertScreen
 
-from gaze_command import start_gaze_process, send_gaze_command
+from gaze_command import start_gaze_process, send_gaze_command, add_gaze_listener
 
 # Start the GazeTracking subprocess
 gaze_script_path = os.path.join(os.path.dirname(__file__), 'GazeTracking', 'example.py')
 start_gaze_process(gaze_script_path)
 
+# Recordings interrupted by a crash are journaled; turn them into WFDB records before anything else
+recover_sessions("./wfdb_data")
+
 # 🧠 App Setup
 app = QApplication(sys.argv)
 stackNavigation = QStackedWidget()
@@ -37,7 +42,9 @@ emotionMonopolarScreen = EmotionMonopolarScreen(brain_bit_controller, stackNavig
 spectrumScreen = SpectrumScreen(brain_bit_controller, stackNavigation, history_stack)
 chessboardScreen = ChessboardScreen(brain_bit_controller, stackNavigation, history_stack)
 blackWhiteScreen = BlackWhiteScreen(brain_bit_controller, stackNavigation, history_stack)
-covertScreen = CovertScreen(brain_bit_controller, stackNavigation, history_stack, send_gaze_command)
+covertScreen = CovertScreen(brain_bit_controller, stackNavigation, history_stack, send_gaze_command, add_gaze_listener)
+# Screens that record; each finishes its own recordings through stop_recordings() on exit
+recording_screens = (resistScreen, spectrumScreen, chessboardScreen, blackWhiteScreen, covertScreen)
 
 menuScreen = MenuScreen(brain_bit_controller, stackNavigation, history_stack,
                         searchScreen,
@@ -64,6 +71,13 @@ stackNavigation.addWidget(covertScreen)
 stackNavigation.setCurrentWidget(menuScreen)
 stackNavigation.show()
 
+
+def stop_recordings():
+    """Close every recording still open, so the save worker has all of their jobs before the wait."""
+    for screen in recording_screens:
+        screen.stop_recordings()
+
+
 # 🧠 Start App Loop
 try:
     #send_gaze_command("start recording")  # Start recording when the app starts
@@ -80,5 +94,12 @@ finally:
     except Exception as disconnect_error:
         print(f"Error during brain_bit_controller cleanup: {disconnect_error}")
     finally:
+        # Recordings are finished even when the sensor cleanup failed
+        try:
+            stop_recordings()
+        except Exception as stop_error:
+            print(f"Error stopping recordings: {stop_error}")
+        print("Waiting for recordings to be written...")
+        save_worker.wait()
         del brain_bit_controller
         print("brain_bit_controller deleted successfully.")
@@ -0,0 +1,139 @@
+import numpy as np
+
+from neuro_impl.utils import BB_sampling_rate
+
+CRITERIA = ('amplitude', 'slope', 'line_length')
+
+
+class ArtifactGate:
+    """
+    First-stage artifact detector for the expensive DSP stages. A packet is flagged when any
+    channel exceeds one of:
+    amplitude - distance of a sample from the channel's trailing mean (V),
+    slope - steepest sample-to-sample change (V/s),
+    line_length - trailing mean of the absolute change per second (V/s).
+    Motion shows up as large swings (amplitude), electrode pops as steps (slope) and muscle or
+    cable noise as a fast, busy trace (line length). The trailing means are exponential with a
+    time constant of window_seconds and are updated once per packet, so a check only touches the
+    new samples. With skip, hold() tells a stage to leave a flagged packet out, and process()
+    hands a stage that must keep buffering the last clean sample in its place; without skip
+    the gate only counts. The state belongs to one stage: give every stage its own copy().
+    """
+
+    def __init__(self, sampling_rate=BB_sampling_rate, window_seconds=0.5, amplitude=150e-6, slope=25e-3,
+                 line_length=20e-3, skip=True):
+        self.sampling_rate = sampling_rate
+        self.window_seconds = window_seconds
+        self.skip = skip
+        self.flagged = False
+        self.holding = False  # the last hold() or process() left the packet out
+        self.__settings = dict(sampling_rate=sampling_rate, window_seconds=window_seconds, amplitude=amplitude,
+                               slope=slope, line_length=line_length, skip=skip)
+        self.__decay = 1.0 - 1.0 / max(window_seconds * sampling_rate, 1.0)
+        # The slope limit as a step between neighbouring samples, so steps are compared as they are
+        self.__limits = (amplitude, slope / sampling_rate, line_length)
+        self.__work = None  # [samples | steps], row 0 holding the previous packet's last sample
+        self.__ones = None
+        self.__mean = None
+        self.__line_length = None
+        self.__hits = ()
+        self.__held = None  # last sample of the last clean packet
+        self.__counters = dict.fromkeys(('packets', 'flagged_packets', 'skipped_packets', 'skipped_samples')
+                                        + CRITERIA, 0)
+
+    @property
+    def flagged_channels(self) -> np.ndarray:
+        """(channels,) bool of the last check."""
+        return np.array([any(hits) for hits in self.__hits], dtype=bool)
+
+    def check(self, samples: np.ndarray) -> bool:
+        """samples: (n, channels) in volts. True when the packet is artifacted."""
+        n = samples.shape[0]
+        if not n:
+            return self.flagged
+        channels = samples.shape[1]
+        work = self.__work
+        if work is None or work.shape[1] != 2 * channels:
+            work = self.__allocate(n, channels)
+            work[0, :channels] = samples[0]
+            self.__mean = samples[0].tolist()
+            self.__line_length = [0.0] * channels
+        elif work.shape[0] < n + 1:
+            previous = work[0, :channels].copy()
+            work = self.__allocate(n, channels)
+            work[0, :channels] = previous
+
+        # Samples and their absolute steps side by side, so each feature is one call over every channel
+        block = work[1:n + 1]
+        block[:, :channels] = samples
+        steps = block[:, channels:]
+        np.subtract(samples, work[:n, :channels], out=steps)
+        np.abs(steps, out=steps)
+        sums = (self.__ones[:n] @ block).tolist()
+        highs = block.max(axis=0).tolist()
+        lows = samples.min(axis=0).tolist()
+        work[0, :channels] = samples[-1]
+
+        # n samples of an exponential average at once, weighting the packet by its mean
+        alpha = 1.0 - self.__decay ** n
+        amplitude, step_limit, line_length = self.__limits
+        means, lengths = self.__mean, self.__line_length
+        hits = []
+        for c in range(channels):
+            mean = means[c] = means[c] + alpha * (sums[c] / n - means[c])
+            length = lengths[c] = lengths[c] + alpha * (sums[channels + c] * self.sampling_rate / n - lengths[c])
+            hits.append((highs[c] - mean > amplitude or mean - lows[c] > amplitude,
+                         highs[channels + c] > step_limit, length > line_length))
+
+        self.__hits = hits
+        self.flagged = any(map(any, hits))
+        self.__counters['packets'] += 1
+        if self.flagged:
+            self.__counters['flagged_packets'] += 1
+            for name, column in zip(CRITERIA, zip(*hits)):
+                self.__counters[name] += any(column)
+        return self.flagged
+
+    def hold(self, samples: np.ndarray) -> bool:
+        """check() for a stage that leaves a flagged packet out: True (and holding) when it should, with skip."""
+        self.holding = self.check(samples) and self.skip
+        if self.holding:
+            self.__counters['skipped_packets'] += 1
+            self.__counters['skipped_samples'] += samples.shape[0]
+        elif samples.shape[0]:
+            self.__held = samples[-1].copy()
+        return self.holding
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """
+        hold(), then the samples the stage should buffer: these samples when clean, otherwise
+        (with skip) the last clean sample repeated, or zeros before the first one.
+        """
+        if not self.hold(samples):
+            return samples
+        n = samples.shape[0]
+        if self.__held is None or self.__held.shape[0] != samples.shape[1]:
+            return np.zeros(samples.shape)
+        return np.repeat(self.__held[None, :], n, axis=0)
+
+    def copy(self) -> 'ArtifactGate':
+        """A gate with the same settings and fresh state and counters."""
+        return ArtifactGate(**self.__settings)
+
+    def reset(self):
+        self.__work = None
+        self.__held = None
+        self.__hits = ()
+        self.flagged = False
+        self.holding = False
+
+    def __allocate(self, n: int, channels: int) -> np.ndarray:
+        rows = max(n, 64)
+        self.__work = np.zeros((rows + 1, 2 * channels))
+        self.__ones = np.ones(rows)
+        return self.__work
+
+    def stats(self) -> dict:
+        stats = dict(self.__counters)
+        stats['skipped_fraction'] = stats['skipped_packets'] / stats['packets'] if stats['packets'] else 0.0
+        return stats
@@ -1,13 +1,27 @@
 import contextlib
-from threading import Thread, Event
-from time import sleep, time
+from concurrent.futures import Future
+from threading import Thread
+from time import monotonic
 
-from PyQt6.QtCore import QObject, pyqtSignal, QThread
+import numpy as np
+
+from PyQt6.QtCore import QObject, pyqtSignal, QThread, QTimer
 from neurosdk.scanner import Scanner
 from neurosdk.sensor import Sensor
 from neurosdk.cmn_types import *
 from neurosdk.brainbit_sensor import BrainBitSignalData, BrainBitResistData
 
+from neuro_impl.command_executor import CommandExecutor
+from neuro_impl.interleave_scheduler import InterleavedScheduler
+from neuro_impl.montage import Montage, MontageStage
+from neuro_impl.ring_buffer import RingBuffer, RingBufferReader
+from neuro_impl.sample_clock import SampleClock
+from neuro_impl.signal_batch import SignalBatch
+from neuro_impl.simulated_sensor import simulated_scanner_from_env
+from neuro_impl.stream_bus import StreamBus, StreamTopic, LegacySlot
+from neuro_impl.stream_integrity import StreamIntegrityMonitor
+from neuro_impl.utils import BB_channels, BB_sampling_rate
+
 
 class Worker(QObject):
     finished = pyqtSignal()
@@ -23,18 +37,41 @@ class Worker(QObject):
 
 class BrainBitController(QObject):
     sensorConnectionState = pyqtSignal(SensorState)
-
-    def __init__(self):
+    interleavedFinished   = pyqtSignal()  # the interleaved loop has stopped; its segment map is complete
+    signal_buffer_secs    = 30
+    resist_buffer_size    = 256
+    dispatch_interval_ms  = 20
+    signal_gap_fill       = 'interpolate'  # 'none', 'zero', 'hold' or 'interpolate'
+
+    # Single-slot callbacks from before the bus; new code should use bus.subscribe()
+    sensorsFounded = LegacySlot(StreamTopic.Sensors)  # List[SensorInfo] -> None
+    sensorBattery  = LegacySlot(StreamTopic.Battery)  # int -> None
+    resistReceived = LegacySlot(StreamTopic.Resist)   # BrainBitResistData -> None
+    signalReceived = LegacySlot(StreamTopic.Signal)   # SignalBatch -> None
+
+    def __init__(self, scanner=None):
         super().__init__()
         self.__sensor = None
-        self.__scanner = Scanner([SensorFamily.LEBrainBit, SensorFamily.LECallibri])
-        self.sensorsFounded   = None       # callback: List[SensorInfo] -> None
-        self.sensorBattery    = None       # callback: int -> None
-        self.resistReceived   = None       # callback: BrainBitResistData -> None
-        self.signalReceived   = None       # callback: BrainBitSignalData -> None
+        # Any object with the neurosdk Scanner interface works here, e.g. SimulatedScanner
+        self.__scanner = scanner or Scanner([SensorFamily.LEBrainBit, SensorFamily.LECallibri])
+        self.bus              = StreamBus()
         self.thread           = None
         self.worker           = None
-        self._stop_event      = Event()
+        self.commands         = CommandExecutor()
+        self.interleave_scheduler = None
+        self.montages         = {}  # montage name -> MontageStage shared by its subscribers
+
+        # The SDK callback thread only copies into these rings; signal/resist subscribers of the bus
+        # are called from the Qt thread by the dispatch timer, other consumers open their own readers
+        self.signal_buffer = RingBuffer(BB_sampling_rate * self.signal_buffer_secs, len(BB_channels))
+        self.resist_buffer = RingBuffer(self.resist_buffer_size, len(BB_channels))
+        self.signal_clock  = SampleClock()
+        self.signal_integrity = StreamIntegrityMonitor(fill=self.signal_gap_fill)
+        self.__signal_reader = self.signal_buffer.reader()
+        self.__resist_reader = self.resist_buffer.reader()
+        self.__dispatch_timer = QTimer(self)
+        self.__dispatch_timer.setInterval(self.dispatch_interval_ms)
+        self.__dispatch_timer.timeout.connect(self.__dispatch)
 
     def start_scan(self):
         if self.__sensor and self.__sensor.state is SensorState.StateInRange:
@@ -43,8 +80,7 @@ class BrainBitController(QObject):
             self.__sensor = None
 
         def sensors_founded(scanner, sensors):
-            if self.sensorsFounded:
-                self.sensorsFounded(sensors)
+            self.bus.publish(StreamTopic.Sensors, sensors)
 
         self.__scanner.sensorsChanged = sensors_founded
         Thread(target=self.__scanner.start, daemon=True).start()
@@ -75,6 +111,7 @@ class BrainBitController(QObject):
         self.thread.start()
 
     def disconnect_sensor(self):
+        self.__dispatch_timer.stop()
         if self.__sensor:
             self.__sensor.disconnect()
 
@@ -82,19 +119,15 @@ class BrainBitController(QObject):
         self.sensorConnectionState.emit(state)
 
     def __battery_changed(self, sensor: Sensor, battery: int):
-        if self.sensorBattery:
-            self.sensorBattery(battery)
+        self.bus.publish(StreamTopic.Battery, battery)
 
     def full_info(self):
         """(Optional) implement to fetch and emit any sensor metadata."""
         pass
 
     def start_resist(self):
-        def _on_resist(sensor, resist: BrainBitResistData):
-            if self.resistReceived:
-                self.resistReceived(resist)
-
-        self.__sensor.resistDataReceived = _on_resist
+        self.__sensor.resistDataReceived = self.__on_resist
+        self.__start_dispatch()
         self.__execute_command(SensorCommand.StartResist)
 
     def stop_resist(self):
@@ -102,58 +135,107 @@ class BrainBitController(QObject):
         self.__sensor.resistDataReceived = None
 
     def start_signal(self):
-        def _on_signal(sensor, signal: BrainBitSignalData):
-            if self.signalReceived:
-                self.signalReceived(signal)
-
-        self.__sensor.signalDataReceived = _on_signal
+        self.__sensor.signalDataReceived = self.__on_signal
+        self.__start_dispatch()
         self.__execute_command(SensorCommand.StartSignal)
 
     def stop_signal(self):
         self.__execute_command(SensorCommand.StopSignal)
         self.__sensor.signalDataReceived = None
 
+    def montage(self, montage: Montage) -> MontageStage:
+        """The shared stage deriving montage from the signal stream; subscribe to it like to the bus."""
+        stage = self.montages.get(montage.name)
+        if stage is None:
+            stage = self.montages[montage.name] = MontageStage(self.bus, montage)
+        return stage
+
+    def open_signal_reader(self) -> RingBufferReader:
+        """Independent cursor into the signal ring for consumers that drain on their own thread or timer."""
+        return self.signal_buffer.reader()
+
+    def buffer_stats(self) -> dict:
+        return {
+            'signal_written': self.signal_buffer.written,
+            'signal_overflows': self.__signal_reader.overflows + self.signal_buffer.overflows,
+            'signal_dropped': self.__signal_reader.dropped_samples + self.signal_buffer.dropped_samples,
+            'signal_torn_reads': self.__signal_reader.torn_reads,
+            'resist_written': self.resist_buffer.written,
+            'resist_dropped': self.__resist_reader.dropped_samples,
+        }
+
+    def integrity_stats(self) -> dict:
+        """Lost, duplicated and filled sample counters of the signal stream."""
+        return self.signal_integrity.stats()
+
+    def __on_signal(self, sensor, signal: list[BrainBitSignalData]):
+        # SDK callback thread: convert, timestamp and check the sequence once, copy into the ring and return
+        batch = SignalBatch.from_packets(signal, monotonic(), self.signal_clock)
+        self.signal_buffer.write_batch(self.signal_integrity.process(batch))
+
+    def __on_resist(self, sensor, resist: BrainBitResistData):
+        self.resist_buffer.write(np.array([[resist.O1, resist.O2, resist.T3, resist.T4]]), timestamps=monotonic())
+
+    def __start_dispatch(self):
+        if not self.__dispatch_timer.isActive():
+            self.__dispatch_timer.start()
+
+    def __dispatch(self):
+        # One batch per tick, shared by every subscriber
+        batch = self.__signal_reader.read()
+        if batch is not None:
+            self.bus.publish(StreamTopic.Signal, batch)
+        resist = self.__resist_reader.read()
+        if resist is not None:
+            self.bus.publish(StreamTopic.ResistBatch, resist)
+            if self.bus.has_subscribers(StreamTopic.Resist):
+                self.bus.publish_all(StreamTopic.Resist, [BrainBitResistData(*row) for row in resist.samples.tolist()])
+
     def start_interleaved(self, burst_secs: float, interval_secs: float):
         """
         Stream EEG continuously, and take short impedance bursts periodically.
-        Runs until stop_interleaved() is called.
+        Runs until stop_interleaved() is called; the segment map stays on interleave_scheduler.
         """
         if not self.__sensor:
             print("Sensor not connected")
             return
 
-        self._stop_event.clear()
-
-        def interleave_loop():
-            # start EEG
-            self.__execute_command(SensorCommand.StartSignal)
-            while not self._stop_event.is_set():
-                sleep(interval_secs)
-                # switch to resist
-                self.__execute_command(SensorCommand.StopSignal)
-                self.__execute_command(SensorCommand.StartResist)
-                sleep(burst_secs)
-                self.__execute_command(SensorCommand.StopResist)
-                # back to signal
-                self.__execute_command(SensorCommand.StartSignal)
+        self.__sensor.signalDataReceived = self.__on_signal
+        self.__sensor.resistDataReceived = self.__on_resist
+        self.__start_dispatch()
 
-            # cleanup once stopped
-            self.__execute_command(SensorCommand.StopSignal)
+        self.interleave_scheduler = InterleavedScheduler(self.__execute_command, burst_secs, interval_secs,
+                                                         finished_callback=self.interleavedFinished.emit)
+        self.interleave_scheduler.start()
 
-        Thread(target=interleave_loop, daemon=True).start()
+    def stop_interleaved(self, wait=False):
+        """
+        Signal to stop the interleaving loop; interleavedFinished fires once the final switch is
+        acknowledged. wait=True blocks until then, which the Qt thread should not do.
+        """
+        if self.interleave_scheduler:
+            self.interleave_scheduler.stop(wait=wait)
 
-    def stop_interleaved(self):
-        """Signal to stop the interleaving loop."""
-        self._stop_event.set()
+    def command_latency_stats(self) -> dict:
+        """Per-command execution and queueing latency summaries."""
+        return self.commands.stats()
 
-    def __execute_command(self, command: SensorCommand):
+    def __execute_command(self, command: SensorCommand) -> Future:
         def _exec():
-            try:
-                self.__sensor.exec_command(command)
-            except Exception as err:
-                print(err)
+            if command is SensorCommand.StartSignal:
+                # Each run (including every interleaved EEG burst) starts a new packet sequence
+                self.signal_clock.reset()
+                self.signal_integrity.reset()
+            self.__sensor.exec_command(command)
+
+        def _report(future: Future):
+            if future.exception():
+                print(future.exception())
 
-        Thread(target=_exec, daemon=True).start()
+        # Commands run one at a time on the executor thread, in the order they were issued
+        future = self.commands.submit(_exec, command)
+        future.add_done_callback(_report)
+        return future
 
     def __del__(self):
         with contextlib.suppress(Exception):
@@ -161,5 +243,5 @@ class BrainBitController(QObject):
             del self.__sensor
 
 
-# Instantiate once (or as needed)
-brain_bit_controller = BrainBitController()
\ No newline at end of file
+# Instantiate once (or as needed); BRAINBIT_SIMULATOR swaps the headset for a replay/synthetic source
+brain_bit_controller = BrainBitController(scanner=simulated_scanner_from_env())
\ No newline at end of file
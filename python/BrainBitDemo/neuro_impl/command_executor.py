@@ -0,0 +1,97 @@
+import queue
+from bisect import bisect_left
+from concurrent.futures import Future
+from threading import Thread, Lock
+from time import perf_counter
+
+
+class LatencyHistogram:
+    """Fixed log-spaced buckets (milliseconds) of command round-trip times."""
+    bounds_ms = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.bounds_ms) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, seconds: float):
+        ms = seconds * 1e3
+        self.counts[bisect_left(self.bounds_ms, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, p: float) -> float:
+        """Upper bound of the bucket holding the p-th percentile."""
+        if not self.count:
+            return 0.0
+        target = self.count * p / 100
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= target:
+                return min(self.bounds_ms[i], self.max_ms) if i < len(self.bounds_ms) else self.max_ms
+        return self.max_ms
+
+    def summary(self) -> dict:
+        return {
+            'count': self.count,
+            'mean_ms': self.total_ms / self.count if self.count else 0.0,
+            'p50_ms': self.percentile(50),
+            'p99_ms': self.percentile(99),
+            'max_ms': self.max_ms,
+        }
+
+
+class CommandExecutor:
+    """
+    One long-lived worker thread that runs sensor commands strictly in submission order.
+    submit() returns a concurrent.futures.Future (wrap with asyncio.wrap_future to await it).
+    """
+
+    def __init__(self, name='sensor-commands'):
+        self.__queue = queue.Queue()
+        self.__lock = Lock()
+        self.latency = {}   # key -> LatencyHistogram of execution time
+        self.queue_wait = {}  # key -> LatencyHistogram of time spent queued
+        self.__thread = Thread(target=self.__run, name=name, daemon=True)
+        self.__thread.start()
+
+    def submit(self, work, key) -> Future:
+        future = Future()
+        self.__queue.put((work, key, future, perf_counter()))
+        return future
+
+    def pending(self) -> int:
+        return self.__queue.qsize()
+
+    def stats(self) -> dict:
+        with self.__lock:
+            return {getattr(key, 'name', str(key)): {'exec': hist.summary(), 'queued': self.queue_wait[key].summary()}
+                    for key, hist in self.latency.items()}
+
+    def shutdown(self, wait=True):
+        self.__queue.put(None)
+        if wait:
+            self.__thread.join()
+
+    def __run(self):
+        while True:
+            item = self.__queue.get()
+            if item is None:
+                break
+            work, key, future, submitted = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            started = perf_counter()
+            try:
+                result = work()
+            except Exception as err:
+                future.set_exception(err)
+            else:
+                future.set_result(result)
+            finished = perf_counter()
+            with self.__lock:
+                self.latency.setdefault(key, LatencyHistogram()).record(finished - started)
+                self.queue_wait.setdefault(key, LatencyHistogram()).record(started - submitted)
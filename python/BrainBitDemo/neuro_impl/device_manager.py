@@ -0,0 +1,226 @@
+import multiprocessing as mp
+import queue
+from time import monotonic, sleep
+
+import numpy as np
+from PyQt6.QtCore import QObject, pyqtSignal, QTimer
+from neurosdk.cmn_types import *
+
+from neuro_impl.command_executor import CommandExecutor
+from neuro_impl.ring_buffer import RingBuffer
+from neuro_impl.sample_clock import SampleClock
+from neuro_impl.signal_batch import SignalBatch
+from neuro_impl.simulated_sensor import simulated_scanner_from_env
+from neuro_impl.stream_integrity import StreamIntegrityMonitor
+from neuro_impl.utils import BB_channels, BB_sampling_rate
+
+
+def default_scanner_factory():
+    """Runs inside each device process; honours BRAINBIT_SIMULATOR like the single-device controller."""
+    scanner = simulated_scanner_from_env()
+    if scanner is None:
+        from neurosdk.scanner import Scanner
+        scanner = Scanner([SensorFamily.LEBrainBit, SensorFamily.LECallibri])
+    return scanner
+
+
+class RmsPipeline:
+    """Default per-device pipeline: per-channel RMS (volts) of everything drained since the last call."""
+
+    def __call__(self, batch: SignalBatch):
+        return {'samples': len(batch), 'rms': np.sqrt(np.mean(batch.samples ** 2, axis=0)).tolist()}
+
+
+def _find_sensor(scanner, sensor_info: SensorInfo, timeout: float):
+    """The native scanner only creates sensors it has seen, so scan in this process first."""
+    deadline = monotonic() + timeout
+    scanner.start()
+    try:
+        while monotonic() < deadline:
+            for info in scanner.sensors():
+                if info.Address == sensor_info.Address:
+                    return scanner.create_sensor(info)
+            sleep(0.2)
+    finally:
+        scanner.stop()
+    return None
+
+
+def _device_process(sensor_info: SensorInfo, scanner_factory, pipeline_factory, commands, results,
+                    poll_interval: float, stats_interval: float, buffer_secs: int):
+    address = sensor_info.Address
+    try:
+        sensor = _find_sensor(scanner_factory(), sensor_info, timeout=10.0)
+    except Exception as err:
+        results.put((address, 'error', str(err)))
+        sensor = None
+    if sensor is None:
+        results.put((address, 'state', SensorState.StateOutOfRange.name))
+        return
+
+    ring = RingBuffer(BB_sampling_rate * buffer_secs, len(BB_channels))
+    reader = ring.reader()
+    executor = CommandExecutor()
+    pipeline = pipeline_factory()
+
+    clock = SampleClock()
+    integrity = StreamIntegrityMonitor()
+    sensor.signalDataReceived = lambda s, packets: ring.write_batch(
+        integrity.process(SignalBatch.from_packets(packets, monotonic(), clock)))
+    sensor.sensorStateChanged = lambda s, state: results.put((address, 'state', state.name))
+
+    def run(command):
+        if command is SensorCommand.StartSignal:
+            # A new run starts a new packet sequence
+            clock.reset()
+            integrity.reset()
+        sensor.exec_command(command)
+
+    results.put((address, 'state', SensorState.StateInRange.name))
+
+    next_stats = monotonic() + stats_interval
+    running = True
+    while running:
+        try:
+            command = commands.get(timeout=poll_interval)
+        except queue.Empty:
+            command = None
+        if command == 'disconnect':
+            running = False
+            command = SensorCommand.StopSignal
+        if command is not None:
+            executor.submit(lambda c=command: run(c), command)
+
+        batch = reader.read()
+        if batch is not None:
+            try:
+                output = pipeline(batch)
+                if output is not None:
+                    results.put((address, 'result', output))
+            except Exception as err:
+                results.put((address, 'error', str(err)))
+
+        if monotonic() >= next_stats or not running:
+            next_stats = monotonic() + stats_interval
+            results.put((address, 'stats', {'written': ring.written,
+                                            'dropped': reader.dropped_samples + ring.dropped_samples,
+                                            'overflows': reader.overflows + ring.overflows,
+                                            'torn_reads': reader.torn_reads,
+                                            'integrity': integrity.stats(),
+                                            'commands': executor.stats()}))
+
+    executor.shutdown()
+    sensor.signalDataReceived = None
+    # disconnect() reports StateOutOfRange through sensorStateChanged
+    sensor.disconnect()
+
+
+class DeviceManager(QObject):
+    """
+    Connects several headsets at once. Each one gets its own worker process (so pipelines do not
+    share a GIL) with its own ring buffer, command executor and pipeline instance.
+    pipeline_factory must be picklable (a top-level class or function) and return a callable that
+    takes a SignalBatch and returns something to publish, or None.
+    Worker processes are only ever joined once they have exited, on the poll timer, so nothing
+    here blocks the Qt thread except close().
+    """
+    deviceStateChanged = pyqtSignal(str, str)   # address, SensorState name
+    resultReceived     = pyqtSignal(str, object)  # address, pipeline output
+    errorReceived      = pyqtSignal(str, str)   # address, message
+    deviceDisconnected = pyqtSignal(str)        # address, once its worker process has exited
+    poll_interval_ms   = 50
+
+    def __init__(self, scanner_factory=default_scanner_factory, buffer_secs=30, stats_interval=1.0):
+        super().__init__()
+        self.scanner_factory = scanner_factory
+        self.buffer_secs = buffer_secs
+        self.stats_interval = stats_interval
+        self.__context = mp.get_context('spawn')
+        self.__results = self.__context.Queue()
+        self.__devices = {}  # address -> (process, command queue)
+        self.__closing = {}  # address -> (process, deadline) of workers told to disconnect
+        self.stats = {}      # address -> latest stats from the worker
+        self.__poll_timer = QTimer(self)
+        self.__poll_timer.setInterval(self.poll_interval_ms)
+        self.__poll_timer.timeout.connect(self.__poll)
+
+    def connect_device(self, sensor_info: SensorInfo, pipeline_factory=RmsPipeline):
+        if sensor_info.Address in self.__devices:
+            print(f"Device {sensor_info.Address} is already connected")
+            return
+        commands = self.__context.Queue()
+        process = self.__context.Process(
+            target=_device_process,
+            args=(sensor_info, self.scanner_factory, pipeline_factory, commands, self.__results,
+                  self.poll_interval_ms / 1000, self.stats_interval, self.buffer_secs),
+            name=f"brainbit-{sensor_info.Address}",
+            daemon=True)
+        process.start()
+        self.__devices[sensor_info.Address] = (process, commands)
+        if not self.__poll_timer.isActive():
+            self.__poll_timer.start()
+
+    def addresses(self) -> list:
+        return list(self.__devices)
+
+    def start_signal(self, address=None):
+        self.__send(SensorCommand.StartSignal, address)
+
+    def stop_signal(self, address=None):
+        self.__send(SensorCommand.StopSignal, address)
+
+    def disconnect_device(self, address=None, timeout=5.0):
+        """
+        Returns at once. The worker stops streaming and disconnects; the poll timer reaps it, or
+        terminates it after timeout seconds, and then emits deviceDisconnected.
+        """
+        self.__send('disconnect', address)
+        deadline = monotonic() + timeout
+        for addr in ([address] if address else list(self.__devices)):
+            process, _ = self.__devices.pop(addr, (None, None))
+            if process:
+                self.__closing[addr] = (process, deadline)
+
+    def close(self, timeout=5.0):
+        """Disconnect every device and wait for the workers to exit; for application shutdown."""
+        self.disconnect_device(timeout=timeout)
+        while self.__closing:
+            sleep(self.poll_interval_ms / 1000)
+            self.__poll()
+
+    def __send(self, command, address):
+        for addr in ([address] if address else list(self.__devices)):
+            if addr in self.__devices:
+                self.__devices[addr][1].put(command)
+
+    def __poll(self):
+        # Reap first: whatever an exited worker sent is already in the queue drained below
+        self.__reap()
+        while True:
+            try:
+                address, kind, payload = self.__results.get_nowait()
+            except queue.Empty:
+                break
+            match kind:
+                case 'result':
+                    self.resultReceived.emit(address, payload)
+                case 'state':
+                    self.deviceStateChanged.emit(address, payload)
+                case 'stats':
+                    self.stats[address] = payload
+                case 'error':
+                    print(f"Device {address}: {payload}")
+                    self.errorReceived.emit(address, payload)
+        if not self.__devices and not self.__closing:
+            self.__poll_timer.stop()
+
+    def __reap(self):
+        now = monotonic()
+        for address, (process, deadline) in list(self.__closing.items()):
+            if process.is_alive():
+                if now >= deadline:
+                    process.terminate()
+                continue
+            process.join()  # already exited, returns at once
+            del self.__closing[address]
+            self.deviceDisconnected.emit(address)
@@ -0,0 +1,120 @@
+import ctypes
+from importlib.metadata import PackageNotFoundError, version
+
+import numpy as np
+
+from em_st_artifacts.utils.support_classes import RawChannels, RawChannelsArray
+
+# The native pushers call the wrapper's private ctypes members; their struct layouts and argtypes were
+# checked against these pyem-st-artifacts releases. Any other version takes the public push path.
+CHECKED_VERSIONS = ('1.0.3',)
+try:
+    WRAPPER_VERSION = version('pyem-st-artifacts')
+except PackageNotFoundError:
+    WRAPPER_VERSION = None
+
+
+class MonopolarPusher:
+    """
+    Feeds one EmotionalMath (channels_number=1) from a numpy column without building a
+    RawChannelsArray and a ctypes array per sample. The native RawChannelsArray structs are
+    allocated once and point at consecutive doubles of a reusable buffer, so a push is one
+    copy into the buffer and one library call. Falls back to push_data_arr when the installed
+    wrapper is not one of CHECKED_VERSIONS, does not expose the native entry point, or native is False.
+    """
+
+    def __init__(self, math, capacity=64, native=True):
+        self.math = math
+        self.native = native and WRAPPER_VERSION in CHECKED_VERSIONS and \
+            all(hasattr(math, name) for name in ('_push_data_arr', '_native_ptr', '_NativeRawChannelsArray', '_NativeOpStatus', '_check_error'))
+        self.__buffer = None
+        self.__structs = None
+        if self.native:
+            self.__allocate(capacity)
+
+    def push(self, values: np.ndarray):
+        """values: (n_samples,) of one channel."""
+        n = values.shape[0]
+        if not n:
+            return
+        if not self.native:
+            self.math.push_data_arr([RawChannelsArray([x]) for x in values.tolist()])
+            return
+        if n > self.__buffer.shape[0]:
+            self.__allocate(max(n, 2 * self.__buffer.shape[0]))
+        self.__buffer[:n] = values
+        status = self.math._NativeOpStatus()
+        self.math._push_data_arr(self.math._native_ptr, self.__structs, n, ctypes.byref(status))
+        self.math._check_error(status)
+
+    def __allocate(self, capacity: int):
+        self.__buffer = np.zeros(capacity, dtype=np.float64)
+        self.__structs = (self.math._NativeRawChannelsArray * capacity)()
+        # Each struct is a single double*: write the addresses of buffer[0..capacity) straight in
+        pointers = np.frombuffer(self.__structs, dtype=np.uintp)
+        pointers[:] = self.__buffer.ctypes.data + self.__buffer.itemsize * np.arange(capacity, dtype=np.uintp)
+
+
+class BipolarPusher:
+    """
+    Feeds a bipolar-mode EmotionalMath from (n, 2) left/right rows. A C-contiguous float64 row pair
+    has the layout of the library's RawChannels struct, so the array is passed to MathLibPushData
+    as is, with no RawChannels per sample. Falls back to push_data like MonopolarPusher.
+    """
+
+    def __init__(self, math, native=True):
+        self.math = math
+        self.native = native and WRAPPER_VERSION in CHECKED_VERSIONS and \
+            all(hasattr(math, name) for name in ('_push_data', '_native_ptr', '_NativeRawChannels', '_NativeOpStatus', '_check_error'))
+        if self.native and ctypes.sizeof(math._NativeRawChannels) != 2 * ctypes.sizeof(ctypes.c_double):
+            self.native = False
+
+    def push(self, rows: np.ndarray):
+        """rows: (n_samples, 2) left and right bipolar values."""
+        n = rows.shape[0]
+        if not n:
+            return
+        if not self.native:
+            self.math.push_data([RawChannels(left, right) for left, right in rows.tolist()])
+            return
+        rows = np.ascontiguousarray(rows, dtype=np.float64)
+        status = self.math._NativeOpStatus()
+        # Typed pointer: wrappers that declare POINTER(_NativeRawChannels) reject a c_void_p
+        data = rows.ctypes.data_as(ctypes.POINTER(self.math._NativeRawChannels))
+        self.math._push_data(self.math._native_ptr, data, n, ctypes.byref(status))
+        self.math._check_error(status)
+
+
+class EmotionChannelResult:
+    """Everything one channel's EmotionalMath produced for an update; read right after process_data_arr."""
+    __slots__ = ('channel', 'artifacted_sequence', 'both_sides_artifacted', 'calibrated', 'calibration_progress',
+                 'spectral', 'raw_spectral', 'mind')
+
+    def __init__(self, channel):
+        self.channel = channel
+        self.artifacted_sequence = False
+        self.both_sides_artifacted = False
+        self.calibrated = False
+        self.calibration_progress = None  # percent while calibrating
+        self.spectral = None              # last SpectralDataPercents of the update, once calibrated
+        self.raw_spectral = None          # RawSpectVals, once calibrated
+        self.mind = None                  # last MindData of the update, once calibrated
+
+
+class EmotionUpdate:
+    """The results of every channel for one packet, in BB_channels order."""
+    __slots__ = ('channels', 'received_at')
+
+    def __init__(self, channels: list, received_at: float):
+        self.channels = channels
+        self.received_at = received_at
+
+    def __getitem__(self, channel: str) -> EmotionChannelResult:
+        for result in self.channels:
+            if result.channel == channel:
+                return result
+        raise KeyError(channel)
+
+    @property
+    def calibrated(self) -> bool:
+        return all(result.calibrated for result in self.channels)
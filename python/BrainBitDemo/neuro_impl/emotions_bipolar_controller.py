@@ -1,11 +1,14 @@
 from em_st_artifacts.emotional_math import EmotionalMath
 from em_st_artifacts.utils.lib_settings import MathLibSetting, ArtifactDetectSetting, ShortArtifactDetectSetting, \
     MentalAndSpectralSetting
-from em_st_artifacts.utils.support_classes import RawChannels
+
+from neuro_impl.emotion_batch import BipolarPusher
+from neuro_impl.montage import BIPOLAR
+from neuro_impl.signal_batch import SignalBatch, as_signal_batch
 
 
 class EmotionBipolar:
-    def __init__(self):
+    def __init__(self, native_push=True, gate=None):
         mls = MathLibSetting(sampling_rate=250,
                              process_win_freq=25,
                              fft_window=500,
@@ -26,8 +29,12 @@ class EmotionBipolar:
         self.__math.set_skip_wins_after_artifact(nwins_skip_after_artifact)
         self.__math.set_zero_spect_waves(True, 0, 1, 1, 1, 0)
         self.__math.set_spect_normalization_by_bands_width(True)
+        self.__pusher = BipolarPusher(self.__math, native=native_push)
 
         self.__is_calibrated = False
+        # Optional ArtifactGate over the bipolar pairs, in front of the library's own artifact detection,
+        # copied so its state is ours. Flagged packets are pushed as held samples and reported as artifacted
+        self.gate = gate.copy() if gate else None
         self.isArtifactedSequenceCallback = None
         self.isBothSidesArtifactedCallback = None
         self.progressCalibrationCallback = None
@@ -38,13 +45,22 @@ class EmotionBipolar:
     def start_calibration(self):
         self.__math.start_calibration()
 
-    def process_data(self, brain_bit_data: []):
-        bipolar_samples = []
-        for sample in brain_bit_data:
-            left_bipolar = sample.T3 - sample.O1
-            right_bipolar = sample.T4 - sample.O2
-            bipolar_samples.append(RawChannels(left_bipolar, right_bipolar))
-        self.__math.push_data(bipolar_samples)
+    def process_data(self, brain_bit_data: SignalBatch):
+        """Raw BB_channels batches; the bipolar pairs are derived here."""
+        batch = as_signal_batch(brain_bit_data)
+        self.process_bipolar(BIPOLAR.derive_batch(batch))
+
+    def process_bipolar(self, batch: SignalBatch):
+        """Batches already derived by the BIPOLAR montage stage: columns T3-O1, T4-O2."""
+        if self.gate:
+            self.__pusher.push(self.gate.process(batch.samples))
+            if self.gate.holding:
+                # Its windows are processed with the next clean packet
+                self.isArtifactedSequenceCallback(True)
+                self.isBothSidesArtifactedCallback(bool(self.gate.flagged_channels.all()))
+                return
+        else:
+            self.__pusher.push(batch.samples)
         self.__math.process_data_arr()
 
         self.__resolve_artifacted()
@@ -1,13 +1,16 @@
+from concurrent.futures import ThreadPoolExecutor
+
 from em_st_artifacts.emotional_math import EmotionalMath
 from em_st_artifacts.utils.lib_settings import MathLibSetting, ArtifactDetectSetting, ShortArtifactDetectSetting, \
     MentalAndSpectralSetting
-from em_st_artifacts.utils.support_classes import RawChannelsArray
 
+from neuro_impl.emotion_batch import EmotionChannelResult, EmotionUpdate, MonopolarPusher
 from neuro_impl.utils import BB_channels
+from neuro_impl.signal_batch import SignalBatch, as_signal_batch
 
 
 class EmotionMonopolar:
-    def __init__(self):
+    def __init__(self, workers=0, native_push=True, gate=None):
         mls = MathLibSetting(sampling_rate=250,
                              process_win_freq=25,
                              fft_window=500,
@@ -30,7 +33,15 @@ class EmotionMonopolar:
             self.__maths[BB_channels[i]].set_zero_spect_waves(True, 0, 1, 1, 1, 0)
             self.__maths[BB_channels[i]].set_spect_normalization_by_bands_width(True)
 
+        self.__pushers = {ch: MonopolarPusher(self.__maths[ch], native=native_push) for ch in BB_channels}
         self.__is_calibrated = {'O1': False, 'O2': False, 'T3': False, 'T4': False}
+        # The library releases the GIL in its native calls, so the four channels can run side by side
+        self.__pool = ThreadPoolExecutor(max_workers=min(workers, len(BB_channels)),
+                                         thread_name_prefix='emotion-monopolar') if workers else None
+        # Optional ArtifactGate in front of the libraries' own artifact detection, copied so its state is ours.
+        # Flagged packets are pushed as held samples and reported as artifacted without processing
+        self.gate = gate.copy() if gate else None
+        self.updateCallback = None  # EmotionUpdate of all channels per packet -> None
         self.isArtifactedSequenceCallback = None
         self.isBothSidesArtifactedCallback = None
         self.progressCalibrationCallback = None
@@ -42,72 +53,78 @@ class EmotionMonopolar:
         for i in range(4):
             self.__maths[BB_channels[i]].start_calibration()
 
-    def process_data(self, brain_bit_data: []):
-        o1Values = []
-        o2Values = []
-        t3Values = []
-        t4Values = []
-        for i in range(len(brain_bit_data)):
-            o1Values.append(RawChannelsArray([brain_bit_data[i].O1]))
-            o2Values.append(RawChannelsArray([brain_bit_data[i].O2]))
-            t3Values.append(RawChannelsArray([brain_bit_data[i].T3]))
-            t4Values.append(RawChannelsArray([brain_bit_data[i].T4]))
+    def process_data(self, brain_bit_data: SignalBatch):
+        batch = as_signal_batch(brain_bit_data)
+        samples = batch.samples
+        compute = True
+        if self.gate:
+            samples = self.gate.process(samples)
+            compute = not self.gate.holding
         try:
-            self.__maths['O1'].push_data_arr(o1Values)
-            self.__maths['O2'].push_data_arr(o2Values)
-            self.__maths['T3'].push_data_arr(t3Values)
-            self.__maths['T4'].push_data_arr(t4Values)
-            for i in range(4):
-                self.__maths[BB_channels[i]].process_data_arr()
+            if self.__pool:
+                results = list(self.__pool.map(self.__process_channel, range(len(BB_channels)),
+                                               [samples] * len(BB_channels), [compute] * len(BB_channels)))
+            else:
+                results = [self.__process_channel(i, samples, compute) for i in range(len(BB_channels))]
         except Exception as err:
             print(err)
-        self.__resolve_artifacted()
-
-        self.__process_calibration()
-
-        self.__resolve_spectral_data()
-        self.__resolve_raw_spectral_data()
-        self.__resolve_mind_data()
+            return
+        update = EmotionUpdate(results, batch.received_at)
+        if self.updateCallback:
+            self.updateCallback(update)
+        self.__resolve_callbacks(update)
 
-    def __resolve_artifacted(self):
-        for i in range(4):
-            # sequence artifacts
-            is_artifacted_sequence = self.__maths[BB_channels[i]].is_artifacted_sequence()
-            self.isArtifactedSequenceCallback(is_artifacted_sequence, BB_channels[i])
-
-            # both sides artifacts
-            is_both_side_artifacted = self.__maths[BB_channels[i]].is_both_sides_artifacted()
-            self.isBothSidesArtifactedCallback(is_both_side_artifacted, BB_channels[i])
+    def close(self):
+        if self.__pool:
+            self.__pool.shutdown(wait=False)
+            self.__pool = None
 
-    def __process_calibration(self):
-        for i in range(4):
-            if self.__is_calibrated[BB_channels[i]]:
-                continue
-            self.__is_calibrated[BB_channels[i]] = self.__maths[BB_channels[i]].calibration_finished()
-            if not self.__is_calibrated[BB_channels[i]]:
-                progress = self.__maths[BB_channels[i]].get_calibration_percents()
-                self.progressCalibrationCallback(progress, BB_channels[i])
+    def __process_channel(self, i: int, samples, compute=True) -> EmotionChannelResult:
+        ch = BB_channels[i]
+        math = self.__maths[ch]
+        self.__pushers[ch].push(samples[:, i])
+        result = EmotionChannelResult(ch)
+        if not compute:
+            # Gated packet: its windows are processed with the next clean one
+            result.artifacted_sequence = True
+            result.both_sides_artifacted = bool(self.gate.flagged_channels.all())
+            result.calibrated = self.__is_calibrated[ch]
+            return result
+        math.process_data_arr()
 
-    def __resolve_spectral_data(self):
-        for i in range(4):
-            if not self.__is_calibrated[BB_channels[i]]:
-                continue
-            spectral_values = self.__maths[BB_channels[i]].read_spectral_data_percents_arr()
+        result.artifacted_sequence = math.is_artifacted_sequence()
+        result.both_sides_artifacted = math.is_both_sides_artifacted()
+        if not self.__is_calibrated[ch]:
+            self.__is_calibrated[ch] = math.calibration_finished()
+            if not self.__is_calibrated[ch]:
+                result.calibration_progress = math.get_calibration_percents()
+        result.calibrated = self.__is_calibrated[ch]
+        if result.calibrated:
+            spectral_values = math.read_spectral_data_percents_arr()
             if len(spectral_values) > 0:
-                spectral_val = spectral_values[-1]
-                self.lastSpectralDataCallback(spectral_val, BB_channels[i])
-
-    def __resolve_raw_spectral_data(self):
-        for i in range(4):
-            if not self.__is_calibrated[BB_channels[i]]:
-                continue
-            raw_spectral_values = self.__maths[BB_channels[i]].read_raw_spectral_vals()
-            self.rawSpectralDataCallback(raw_spectral_values, BB_channels[i])
-
-    def __resolve_mind_data(self):
-        for i in range(4):
-            if not self.__is_calibrated[BB_channels[i]]:
-                continue
-            mental_values = self.__maths[BB_channels[i]].read_mental_data_arr()
+                result.spectral = spectral_values[-1]
+            result.raw_spectral = math.read_raw_spectral_vals()
+            mental_values = math.read_mental_data_arr()
             if len(mental_values) > 0:
-                self.lastMindDataCallback(mental_values[-1], BB_channels[i])
+                result.mind = mental_values[-1]
+        return result
+
+    def __resolve_callbacks(self, update: EmotionUpdate):
+        # Same order as before the batched path: artifacts, calibration, spectral, raw spectral, mind
+        for result in update.channels:
+            if self.isArtifactedSequenceCallback:
+                self.isArtifactedSequenceCallback(result.artifacted_sequence, result.channel)
+            if self.isBothSidesArtifactedCallback:
+                self.isBothSidesArtifactedCallback(result.both_sides_artifacted, result.channel)
+        for result in update.channels:
+            if result.calibration_progress is not None and self.progressCalibrationCallback:
+                self.progressCalibrationCallback(result.calibration_progress, result.channel)
+        for result in update.channels:
+            if result.spectral is not None and self.lastSpectralDataCallback:
+                self.lastSpectralDataCallback(result.spectral, result.channel)
+        for result in update.channels:
+            if result.raw_spectral is not None and self.rawSpectralDataCallback:
+                self.rawSpectralDataCallback(result.raw_spectral, result.channel)
+        for result in update.channels:
+            if result.mind is not None and self.lastMindDataCallback:
+                self.lastMindDataCallback(result.mind, result.channel)
@@ -0,0 +1,68 @@
+from functools import lru_cache
+
+import numpy as np
+from scipy.signal import butter, sosfilt, sosfilt_zi
+
+from neuro_impl.utils import BB_channels, BB_sampling_rate
+
+
+@lru_cache(maxsize=64)
+def bandpass_sos(low: float, high: float, sampling_rate: float, order: int = 4) -> np.ndarray:
+    sos = butter(order, [low, high], btype='bandpass', output='sos', fs=sampling_rate)
+    sos.flags.writeable = False
+    return sos
+
+
+@lru_cache(maxsize=64)
+def notch_sos(frequency: float, sampling_rate: float, quality: float = 30.0, order: int = 2) -> np.ndarray:
+    """Band-stop of width frequency / quality either side, the same design EMGProcessor.notch_filter used."""
+    sos = butter(order, [frequency - frequency / quality, frequency + frequency / quality], btype='bandstop',
+                 output='sos', fs=sampling_rate)
+    sos.flags.writeable = False
+    return sos
+
+
+@lru_cache(maxsize=16)
+def eeg_sos(sampling_rate: float = BB_sampling_rate, band=(0.5, 45.0), notch=50.0) -> np.ndarray:
+    """Band-pass followed by a mains notch (skipped when notch is None or above Nyquist), as one cascade."""
+    stages = [bandpass_sos(band[0], band[1], sampling_rate)]
+    if notch and notch * (1 + 1 / 30.0) < sampling_rate / 2:
+        stages.append(notch_sos(notch, sampling_rate))
+    sos = np.vstack(stages)
+    sos.flags.writeable = False
+    return sos
+
+
+class StreamingFilter:
+    """
+    Causal IIR filtering of (n, channels) blocks with the state kept between calls, so a stream
+    cut into packets comes out exactly as the whole array would through causal_filter().
+    The state starts at the filter's steady state for the first sample, which avoids the step
+    response a DC offset would otherwise ring through the band-pass for seconds.
+    """
+
+    def __init__(self, sos=None, channels=len(BB_channels)):
+        # Own copy: the cached designs are read-only and sosfilt wants a writable buffer
+        self.sos = np.array(eeg_sos() if sos is None else sos, dtype=np.float64)
+        self.channels = channels
+        # (sections, 2) steady state for a unit step, scaled per channel by the first sample
+        self.__zi_unit = sosfilt_zi(self.sos)[:, :, None]
+        self.__zi = None
+
+    def reset(self):
+        """Forget the state; the next block starts a new stream."""
+        self.__zi = None
+
+    def process(self, values: np.ndarray) -> np.ndarray:
+        """values: (n_samples, channels). Returns the filtered samples, same shape, as a new array."""
+        if values.shape[0] == 0:
+            return np.empty_like(values, dtype=np.float64)
+        if self.__zi is None:
+            self.__zi = self.__zi_unit * values[0][None, None, :]
+        filtered, self.__zi = sosfilt(self.sos, values, axis=0, zi=self.__zi)
+        return filtered
+
+
+def causal_filter(values: np.ndarray, sos=None) -> np.ndarray:
+    """Offline counterpart of StreamingFilter: the same output for a complete (n, channels) array."""
+    return StreamingFilter(sos, values.shape[1]).process(values)
@@ -0,0 +1,88 @@
+from datetime import datetime
+from time import monotonic
+
+import numpy as np
+
+from neuro_impl.save_worker import RecordingSession, save_worker as default_save_worker
+from neuro_impl.utils import BB_channels, BB_resist_sampling_rate
+
+# Same border as ResistanceScreen: finite and above it counts as 'Good'
+normal_resist_border = 2_000_000
+
+# Row layout: O1, O2, T3, T4 (Ohm), Time, O1..T4 quality (1 = Good)
+# 1 Ohm resolution; inf (no contact) is clipped to the format's maximum
+IMPEDANCE_RECORDS = [
+    {'record_name': "resistance_recording", 'columns': list(range(2 * len(BB_channels) + 1)),
+     'sig_name': list(BB_channels) + ['Time'] + [f'{ch}_quality' for ch in BB_channels],
+     'units': ['Ohm'] * len(BB_channels) + ['s'] + ['flag'] * len(BB_channels),
+     'adc_gain': [1.0] * len(BB_channels) + [1e3] + [1.0] * len(BB_channels)},
+]
+
+
+def classify_quality(ohms: np.ndarray) -> np.ndarray:
+    """True where a resistance counts as 'Good', element-wise."""
+    return np.isfinite(ohms) & (ohms > normal_resist_border)
+
+
+class ImpedanceRecorder:
+    """
+    Impedance of one recording kept in growable arrays (raw ohms, quality, timestamps) for trend
+    views, and streamed to the resistance_recording WFDB record on the save worker at the nominal
+    impedance rate. The exact timestamps go to the record's .time sidecar, since impedance
+    arrives in bursts during interleaved sessions.
+    """
+
+    def __init__(self, saved_data_dir, path="", time_origin=None, save_worker=None, initial_rows=1024):
+        self.save_worker = save_worker or default_save_worker
+        self.path = path
+        self.time_origin = monotonic() if time_origin is None else time_origin
+        self.length = 0
+        self.__ohms = np.empty((initial_rows, len(BB_channels)), dtype=np.float64)
+        self.__quality = np.empty((initial_rows, len(BB_channels)), dtype=bool)
+        self.__timestamps = np.empty(initial_rows, dtype=np.float64)
+        self.__session = RecordingSession(saved_data_dir, path, n_columns=2 * len(BB_channels) + 1,
+                                          fs=BB_resist_sampling_rate, records=IMPEDANCE_RECORDS,
+                                          started=datetime.now(), container_name=None)
+        self.save_worker.open(self.__session)
+
+    @property
+    def ohms(self) -> np.ndarray:
+        return self.__ohms[:self.length]
+
+    @property
+    def quality(self) -> np.ndarray:
+        return self.__quality[:self.length]
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        """Seconds from time_origin."""
+        return self.__timestamps[:self.length]
+
+    def append(self, ohms: np.ndarray, timestamps: np.ndarray):
+        """ohms: (n, 4) in BB_channels order; timestamps: (n,) monotonic seconds."""
+        n = ohms.shape[0]
+        if self.length + n > self.__timestamps.shape[0]:
+            self.__grow(max(2 * self.__timestamps.shape[0], self.length + n))
+        end = self.length + n
+        self.__ohms[self.length:end] = ohms
+        self.__quality[self.length:end] = classify_quality(ohms)
+        self.__timestamps[self.length:end] = np.asarray(timestamps, dtype=np.float64) - self.time_origin
+        rows = np.column_stack((self.__ohms[self.length:end], self.__timestamps[self.length:end],
+                                self.__quality[self.length:end]))
+        self.length = end
+        self.save_worker.append(self.__session, rows)
+
+    def close(self, path=None):
+        """Returns at once; the record is finished on the save worker."""
+        self.save_worker.close(self.__session, self.path if path is None else path)
+
+    def __grow(self, rows: int):
+        self.__ohms = _resized(self.__ohms, rows, self.length)
+        self.__quality = _resized(self.__quality, rows, self.length)
+        self.__timestamps = _resized(self.__timestamps, rows, self.length)
+
+
+def _resized(array: np.ndarray, rows: int, keep: int) -> np.ndarray:
+    resized = np.empty((rows,) + array.shape[1:], dtype=array.dtype)
+    resized[:keep] = array[:keep]
+    return resized
@@ -0,0 +1,148 @@
+import json
+import os
+from dataclasses import dataclass, asdict
+from threading import Thread, Event
+from time import monotonic
+
+from neurosdk.cmn_types import SensorCommand
+
+
+@dataclass
+class InterleaveSegment:
+    kind: str      # 'signal' or 'resist'
+    start: float   # monotonic seconds, when the start command was acknowledged
+    end: float     # monotonic seconds, when the stop command was issued
+
+
+class InterleavedScheduler:
+    """
+    Alternates EEG streaming and impedance bursts on absolute monotonic deadlines, so command
+    latency never accumulates as drift. Every switch is timestamped and kept as a segment map.
+    finished_callback is called from the scheduler's thread once the final switch after stop() is done.
+    """
+
+    def __init__(self, execute_command, burst_secs: float, interval_secs: float, command_timeout=5.0,
+                 finished_callback=None):
+        self.execute_command = execute_command  # SensorCommand -> Future
+        self.finished_callback = finished_callback
+        self.burst_secs = burst_secs
+        self.interval_secs = interval_secs
+        self.command_timeout = command_timeout
+        self.segments = []
+        self.started_at = None
+        self.stopped_at = None
+        self.missed_cycles = 0
+        self.__stop_event = Event()
+        self.__thread = None
+
+    def start(self):
+        self.__stop_event.clear()
+        self.segments = []
+        self.missed_cycles = 0
+        self.__thread = Thread(target=self.__run, daemon=True)
+        self.__thread.start()
+
+    def stop(self, wait=False):
+        self.__stop_event.set()
+        if wait and self.__thread:
+            self.__thread.join()
+
+    def is_running(self) -> bool:
+        return self.__thread is not None and self.__thread.is_alive()
+
+    def eeg_seconds(self) -> float:
+        return sum(seg.end - seg.start for seg in self.segments if seg.kind == 'signal')
+
+    def duty_cycle(self) -> float:
+        """Share of the scheduled time actually spent streaming EEG."""
+        if self.started_at is None:
+            return 0.0
+        total = (self.stopped_at or monotonic()) - self.started_at
+        return self.eeg_seconds() / total if total > 0 else 0.0
+
+    def gaps(self) -> list:
+        """(start, end) intervals without EEG, including command switching time."""
+        eeg = sorted((seg.start, seg.end) for seg in self.segments if seg.kind == 'signal')
+        result = []
+        cursor = self.started_at
+        for start, end in eeg:
+            if cursor is not None and start > cursor:
+                result.append((cursor, start))
+            cursor = end
+        if cursor is not None and self.stopped_at and self.stopped_at > cursor:
+            result.append((cursor, self.stopped_at))
+        return result
+
+    def segment_map(self, time_origin=0.0) -> dict:
+        """The schedule and its segments, with every time in seconds from time_origin (monotonic)."""
+        def relative(t):
+            return None if t is None else t - time_origin
+
+        return {
+            'burst_secs': self.burst_secs,
+            'interval_secs': self.interval_secs,
+            'time_origin': time_origin,
+            'started_at': relative(self.started_at),
+            'stopped_at': relative(self.stopped_at),
+            'eeg_seconds': self.eeg_seconds(),
+            'duty_cycle': self.duty_cycle(),
+            'missed_cycles': self.missed_cycles,
+            'segments': [dict(asdict(seg), start=seg.start - time_origin, end=seg.end - time_origin)
+                         for seg in self.segments],
+            'gaps': [{'start': start - time_origin, 'end': end - time_origin} for start, end in self.gaps()],
+        }
+
+    def save_segment_map(self, path: str, time_origin=0.0):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.segment_map(time_origin), f, indent=2)
+
+    def __switch(self, command: SensorCommand) -> float:
+        """Issue a command, wait for the sensor to acknowledge it and return the ack time."""
+        try:
+            self.execute_command(command).result(timeout=self.command_timeout)
+        except Exception as err:
+            print(f"Interleaved {command.name} failed: {err}")
+        return monotonic()
+
+    def __run(self):
+        try:
+            self.__loop()
+        finally:
+            if self.finished_callback:
+                self.finished_callback()
+
+    def __loop(self):
+        period = self.interval_secs + self.burst_secs
+        self.started_at = monotonic()
+        self.stopped_at = None
+        cycle = 0
+        signal_start = self.__switch(SensorCommand.StartSignal)
+        while True:
+            # Deadlines are anchored to started_at, not to when the previous switch finished
+            resist_at = self.started_at + cycle * period + self.interval_secs
+            if self.__stop_event.wait(max(0.0, resist_at - monotonic())):
+                break
+            self.segments.append(InterleaveSegment('signal', signal_start, monotonic()))
+            self.__switch(SensorCommand.StopSignal)
+            resist_start = self.__switch(SensorCommand.StartResist)
+
+            signal_at = self.started_at + (cycle + 1) * period
+            stopped = self.__stop_event.wait(max(0.0, signal_at - monotonic()))
+            self.segments.append(InterleaveSegment('resist', resist_start, monotonic()))
+            self.__switch(SensorCommand.StopResist)
+            if stopped:
+                self.stopped_at = monotonic()
+                return
+            signal_start = self.__switch(SensorCommand.StartSignal)
+
+            cycle += 1
+            # If switching overran a whole period, skip ahead instead of firing back-to-back
+            behind = int((monotonic() - self.started_at) // period) - cycle
+            if behind > 0:
+                self.missed_cycles += behind
+                cycle += behind
+
+        self.segments.append(InterleaveSegment('signal', signal_start, monotonic()))
+        self.__switch(SensorCommand.StopSignal)
+        self.stopped_at = monotonic()
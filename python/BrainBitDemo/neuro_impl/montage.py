@@ -0,0 +1,86 @@
+from threading import Lock
+
+import numpy as np
+
+from neuro_impl.signal_batch import SignalBatch
+from neuro_impl.stream_bus import StreamBus, StreamTopic
+from neuro_impl.utils import BB_channels
+
+
+class Montage:
+    """
+    Linear derivation of the BrainBit channels: derived = samples @ matrix.T, one row of
+    matrix per derived channel with a weight per BB_channels column.
+    """
+
+    def __init__(self, name: str, labels, matrix):
+        self.name = name
+        self.labels = list(labels)
+        self.matrix = np.asarray(matrix, dtype=np.float64)
+        if self.matrix.shape != (len(self.labels), len(BB_channels)):
+            raise ValueError(f"{name}: matrix must be ({len(self.labels)}, {len(BB_channels)})")
+        # Transposed once, so derive() is a single matmul into C-contiguous rows
+        self.__weights = np.ascontiguousarray(self.matrix.T)
+
+    def derive(self, samples: np.ndarray) -> np.ndarray:
+        """(n, 4) in BB_channels order -> (n, len(labels)), C-contiguous."""
+        return samples @ self.__weights
+
+    def derive_batch(self, batch: SignalBatch) -> SignalBatch:
+        """The batch with its samples replaced by the derivation; the other arrays are shared."""
+        return SignalBatch(self.derive(batch.samples), batch.pack_nums, batch.markers, batch.timestamps,
+                           batch.received_at)
+
+
+def _weights(**weights) -> list:
+    return [weights.get(ch, 0.0) for ch in BB_channels]
+
+
+# Left and right temporal-occipital pairs, the derivation EmotionBipolar always used
+BIPOLAR = Montage('bipolar', ['T3-O1', 'T4-O2'], [_weights(T3=1.0, O1=-1.0), _weights(T4=1.0, O2=-1.0)])
+# Each channel against the mean of all four
+AVERAGE_REFERENCE = Montage('average', [f'{ch}-avg' for ch in BB_channels],
+                            np.eye(len(BB_channels)) - 1.0 / len(BB_channels))
+
+
+class MontageStage:
+    """
+    Derives a montage once per signal batch and hands the derived batch to every subscriber,
+    so controllers sharing a montage do not each recompute it. The stage is attached to the
+    bus's Signal topic only while it has subscribers; callbacks run on the bus's dispatch tick.
+    Derived batches carry the montage's columns (montage.labels), not BB_channels.
+    """
+
+    def __init__(self, bus: StreamBus, montage: Montage):
+        self.bus = bus
+        self.montage = montage
+        self.processed = 0
+        self.__lock = Lock()
+        self.__callbacks = ()
+
+    def subscribe(self, callback):
+        with self.__lock:
+            if callback in self.__callbacks:
+                return
+            self.__callbacks = self.__callbacks + (callback,)
+            if len(self.__callbacks) == 1:
+                self.bus.subscribe(StreamTopic.Signal, self.process)
+
+    def unsubscribe(self, callback):
+        with self.__lock:
+            self.__callbacks = tuple(c for c in self.__callbacks if c != callback)
+            if not self.__callbacks:
+                self.bus.unsubscribe(StreamTopic.Signal, self.process)
+
+    def process(self, batch: SignalBatch):
+        callbacks = self.__callbacks
+        if not callbacks:
+            return
+        derived = self.montage.derive_batch(batch)
+        self.processed += 1
+        for callback in callbacks:
+            try:
+                callback(derived)
+            except Exception as err:
+                # Same policy as the bus: one failing subscriber must not starve the others
+                print(f"Error in {self.montage.name} montage subscriber {callback}: {err}")
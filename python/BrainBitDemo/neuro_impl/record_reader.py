@@ -0,0 +1,159 @@
+import os
+from collections import OrderedDict
+from threading import Lock
+
+import numpy as np
+import wfdb
+
+from neuro_impl.wfdb_stream_writer import TIME_SUFFIX
+
+# Bytes per sample of the WFDB formats the reader can memory-map
+_WIDTHS = {'16': 2, '24': 3, '32': 4}
+
+
+class ChunkCache:
+    """
+    Thread-safe LRU of decoded chunks, bounded by their total size in bytes. Keys carry the
+    file's mtime, so a rewritten record never returns stale data.
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.__chunks = OrderedDict()
+        self.__lock = Lock()
+
+    def get(self, key, decode):
+        with self.__lock:
+            chunk = self.__chunks.get(key)
+            if chunk is not None:
+                self.__chunks.move_to_end(key)
+                self.hits += 1
+                return chunk
+            self.misses += 1
+        chunk = decode()
+        chunk.flags.writeable = False
+        with self.__lock:
+            if key not in self.__chunks and chunk.nbytes <= self.max_bytes:
+                self.__chunks[key] = chunk
+                self.size += chunk.nbytes
+                while self.size > self.max_bytes:
+                    _, evicted = self.__chunks.popitem(last=False)
+                    self.size -= evicted.nbytes
+        return chunk
+
+    def clear(self):
+        with self.__lock:
+            self.__chunks.clear()
+            self.size = 0
+
+
+# Shared by every reader, so epochs cut from the same records across analyses decode each chunk once
+chunk_cache = ChunkCache()
+
+
+class RecordReader:
+    """
+    Lazy access to a WFDB record written by WfdbStreamWriter (or any single-file record in
+    format 16, 24 or 32). The .dat file is memory-mapped; slices are decoded chunk_samples
+    rows at a time into physical units (NaN for invalid samples) through the chunk cache.
+    Times are seconds from the start of the record, taken from the .time sidecar when there
+    is one and from the sample index otherwise.
+    """
+
+    def __init__(self, record_path, chunk_samples=2500, cache=None):
+        self.record_path = record_path
+        self.header = wfdb.rdheader(record_path)
+        fmts = set(self.header.fmt)
+        if len(set(self.header.file_name)) != 1 or len(fmts) != 1 or not fmts <= set(_WIDTHS) \
+                or any(self.header.byte_offset or []):
+            raise ValueError(f"{record_path}: only single-file records in format 16, 24 or 32 can be memory-mapped")
+        self.fmt = fmts.pop()
+        self.fs = self.header.fs
+        self.sig_name = list(self.header.sig_name)
+        self.sig_len = self.header.sig_len
+        self.chunk_samples = chunk_samples
+        self.cache = cache or chunk_cache
+        self.__gain = np.asarray(self.header.adc_gain, dtype=np.float64)
+        self.__baseline = np.asarray(self.header.baseline, dtype=np.float64)
+        self.__invalid = -(1 << (int(self.fmt) - 1))
+
+        dat_path = os.path.join(os.path.dirname(record_path), self.header.file_name[0])
+        self.__key = (os.path.abspath(dat_path), os.path.getmtime(dat_path), chunk_samples)
+        width = _WIDTHS[self.fmt]
+        n_sig = len(self.sig_name)
+        if self.sig_len:
+            dtype = np.uint8 if self.fmt == '24' else f'<i{width}'
+            shape = (self.sig_len, n_sig, 3) if self.fmt == '24' else (self.sig_len, n_sig)
+            self.__dat = np.memmap(dat_path, dtype=dtype, mode='r', shape=shape)
+        else:
+            self.__dat = None
+        time_path = record_path + TIME_SUFFIX
+        self.__time_ns = np.memmap(time_path, dtype='<i8', mode='r') \
+            if os.path.exists(time_path) and os.path.getsize(time_path) else None
+
+    @property
+    def duration(self) -> float:
+        return self.sig_len / self.fs
+
+    def index(self, t: float) -> int:
+        """First sample at or after t seconds."""
+        if self.__time_ns is not None:
+            return int(np.searchsorted(self.__time_ns, round(t * 1e9), side='left'))
+        return min(max(int(np.ceil(t * self.fs - 1e-9)), 0), self.sig_len)
+
+    def read(self, t0=None, t1=None, channels=None) -> np.ndarray:
+        """Samples with t0 <= t < t1 (either bound may be None) of the named channels (default all)."""
+        start = 0 if t0 is None else self.index(t0)
+        stop = self.sig_len if t1 is None else self.index(t1)
+        return self.read_samples(start, stop, channels)
+
+    def read_samples(self, start: int, stop: int, channels=None) -> np.ndarray:
+        columns = slice(None) if channels is None else [self.sig_name.index(ch) for ch in channels]
+        width = len(self.sig_name) if channels is None else len(channels)
+        start, stop = max(start, 0), min(stop, self.sig_len)
+        if start >= stop:
+            return np.empty((0, width), dtype=np.float64)
+        out = np.empty((stop - start, width), dtype=np.float64)
+        first, last = start // self.chunk_samples, (stop - 1) // self.chunk_samples
+        for k in range(first, last + 1):
+            chunk = self.cache.get(self.__key + (k,), lambda k=k: self.__decode(k))
+            base = k * self.chunk_samples
+            lo, hi = max(start, base), min(stop, base + chunk.shape[0])
+            out[lo - start:hi - start] = chunk[lo - base:hi - base, columns]
+        return out
+
+    def times(self, t0=None, t1=None) -> np.ndarray:
+        """Timestamps (seconds) of the samples read() returns for the same bounds."""
+        start = 0 if t0 is None else self.index(t0)
+        stop = self.sig_len if t1 is None else self.index(t1)
+        if self.__time_ns is not None:
+            return self.__time_ns[start:stop] / 1e9
+        return np.arange(start, stop) / self.fs
+
+    def epochs(self, onsets, duration: float, channels=None) -> np.ndarray:
+        """(n_onsets, duration * fs, n_channels) windows starting at each onset (s); NaN past the end."""
+        n = int(round(duration * self.fs))
+        width = len(self.sig_name) if channels is None else len(channels)
+        out = np.full((len(onsets), n, width), np.nan)
+        for i, onset in enumerate(onsets):
+            start = self.index(onset)
+            window = self.read_samples(start, start + n, channels)
+            out[i, :window.shape[0]] = window
+        return out
+
+    def __decode(self, k: int) -> np.ndarray:
+        raw = self.__dat[k * self.chunk_samples:(k + 1) * self.chunk_samples]
+        if self.fmt == '24':
+            # Sign-extend the three little-endian bytes through the top of an int32
+            padded = np.zeros(raw.shape[:2] + (4,), dtype=np.uint8)
+            padded[..., 1:] = raw
+            digital = padded.view('<i4')[..., 0] >> 8
+        else:
+            digital = np.asarray(raw)
+        invalid = digital == self.__invalid
+        physical = (digital - self.__baseline) / self.__gain
+        physical[invalid] = np.nan
+        return physical
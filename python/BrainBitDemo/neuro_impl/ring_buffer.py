@@ -0,0 +1,118 @@
+import numpy as np
+
+from neuro_impl.signal_batch import SignalBatch
+
+
+class RingBuffer:
+    """
+    Preallocated single-producer / multi-consumer ring of sample rows.
+    The producer only copies into it and never waits on a lock; each reader keeps its
+    own cursor and drains at its own cadence. A reader that falls more than `capacity`
+    rows behind loses the oldest rows and counts them.
+    Like a seqlock, the producer marks the rows it is about to overwrite (reserved) before
+    copying and publishes them (written) after, so a reader can tell a torn copy afterwards.
+    """
+
+    def __init__(self, capacity: int, channels: int):
+        self.capacity = capacity
+        self.samples = np.zeros((capacity, channels), dtype=np.float64)
+        self.pack_nums = np.zeros(capacity, dtype=np.int64)
+        self.markers = np.zeros(capacity, dtype=np.int32)
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        # Total rows ever written. Only the producer assigns it, after the copy, which publishes the rows
+        self.__written = 0
+        # Rows written once the current write is done; ahead of written only while the producer copies
+        self.__reserved = 0
+        self.overflows = 0        # single writes larger than the whole ring
+        self.dropped_samples = 0  # rows truncated by those writes
+
+    @property
+    def written(self) -> int:
+        return self.__written
+
+    @property
+    def reserved(self) -> int:
+        return self.__reserved
+
+    def write(self, samples: np.ndarray, pack_nums=None, markers=None, timestamps=0.0):
+        """timestamps is either one value for every row or an array with one per row."""
+        n = samples.shape[0]
+        if n == 0:
+            return
+        timestamps = np.broadcast_to(np.asarray(timestamps, dtype=np.float64), (n,))
+        if n > self.capacity:
+            self.overflows += 1
+            self.dropped_samples += n - self.capacity
+            samples = samples[-self.capacity:]
+            pack_nums = pack_nums[-self.capacity:] if pack_nums is not None else None
+            markers = markers[-self.capacity:] if markers is not None else None
+            timestamps = timestamps[-self.capacity:]
+            n = self.capacity
+        self.__reserved = self.__written + n
+        start = self.__written % self.capacity
+        first = min(n, self.capacity - start)
+        self.__copy(slice(start, start + first), slice(0, first), samples, pack_nums, markers, timestamps)
+        if first < n:
+            self.__copy(slice(0, n - first), slice(first, n), samples, pack_nums, markers, timestamps)
+        self.__written += n
+
+    def write_batch(self, batch: SignalBatch):
+        self.write(batch.samples, batch.pack_nums, batch.markers, batch.timestamps)
+
+    def reader(self) -> 'RingBufferReader':
+        """New consumer that starts at the current write position."""
+        return RingBufferReader(self)
+
+    def __copy(self, dst, src, samples, pack_nums, markers, timestamps):
+        self.samples[dst] = samples[src]
+        self.pack_nums[dst] = pack_nums[src] if pack_nums is not None else 0
+        self.markers[dst] = markers[src] if markers is not None else 0
+        self.timestamps[dst] = timestamps[src]
+
+
+class RingBufferReader:
+    """One consumer's cursor into a RingBuffer, with its own overflow and drop counters."""
+
+    def __init__(self, ring: RingBuffer):
+        self.ring = ring
+        self.__cursor = ring.written
+        self.overflows = 0        # times this reader was lapped by the producer
+        self.torn_reads = 0       # reads that the producer overwrote part of while copying
+        self.dropped_samples = 0  # rows it never saw because of either
+
+    def available(self) -> int:
+        return min(self.ring.written - self.__cursor, self.ring.capacity)
+
+    def read(self, max_rows=None):
+        """Copy out everything written since the last read (or up to max_rows) as a SignalBatch, or None."""
+        ring = self.ring
+        written = ring.written
+        self.__skip_lapped(written)
+        end = written if max_rows is None else min(written, self.__cursor + max_rows)
+        n = end - self.__cursor
+        if n <= 0:
+            return None
+        idx = np.arange(self.__cursor, end) % ring.capacity
+        samples = ring.samples[idx]
+        pack_nums = ring.pack_nums[idx]
+        markers = ring.markers[idx]
+        timestamps = ring.timestamps[idx]
+        # The producer may have lapped us while copying, or be mid-write into our rows: discard every row
+        # it has reserved, as their slots may hold a mix of old and new values
+        overwritten = ring.reserved - ring.capacity - self.__cursor
+        if overwritten > 0:
+            self.torn_reads += 1
+            self.dropped_samples += min(overwritten, n)
+            samples, pack_nums = samples[overwritten:], pack_nums[overwritten:]
+            markers, timestamps = markers[overwritten:], timestamps[overwritten:]
+        self.__cursor = end
+        if samples.shape[0] == 0:
+            return None
+        return SignalBatch(samples, pack_nums, markers, timestamps, float(timestamps[-1]))
+
+    def __skip_lapped(self, written):
+        behind = written - self.__cursor
+        if behind > self.ring.capacity:
+            self.overflows += 1
+            self.dropped_samples += behind - self.ring.capacity
+            self.__cursor = written - self.ring.capacity
@@ -0,0 +1,50 @@
+import numpy as np
+
+from neuro_impl.utils import BB_sampling_rate
+
+
+class SampleClock:
+    """
+    Per-sample timestamps derived from the packet counter and the nominal sampling rate,
+    anchored to the monotonic clock at the first packet of a run.
+    BrainBit numbers every sample, so consecutive samples are 1 / sampling_rate apart. The clock
+    re-anchors when the counter jumps back by more than restart_window samples (device restart or
+    wrap), the same rule StreamIntegrityMonitor uses, or when new samples arrive more than max_skew
+    seconds off their predicted time (streaming was paused). Duplicated or reordered packets are
+    stamped from the current anchor and never move it.
+    """
+
+    def __init__(self, sampling_rate=BB_sampling_rate, max_skew=0.5, restart_window=None):
+        self.sampling_rate = sampling_rate
+        self.max_skew = max_skew
+        self.restart_window = restart_window if restart_window is not None else sampling_rate
+        self.anchors = 0
+        self.reset()
+
+    def reset(self):
+        self.__anchor_time = None
+        self.__anchor_pack = 0
+        self.__last_pack = None
+
+    def stamp(self, pack_nums: np.ndarray, received_at: float) -> np.ndarray:
+        """float64 monotonic seconds for each sample of a packet list received at received_at."""
+        n = pack_nums.shape[0]
+        if n == 0:
+            return np.empty(0, dtype=np.float64)
+        first, last = int(pack_nums[0]), int(pack_nums[-1])
+        if self.__anchor_time is None or first < self.__last_pack - self.restart_window:
+            self.__anchor(last, received_at)
+            self.__last_pack = last
+        elif last > self.__last_pack:
+            # Only samples newer than any seen say when the device is sampling
+            predicted_last = self.__anchor_time + (last - self.__anchor_pack) / self.sampling_rate
+            if abs(received_at - predicted_last) > self.max_skew:
+                self.__anchor(last, received_at)
+            self.__last_pack = last
+        return self.__anchor_time + (pack_nums - self.__anchor_pack) / self.sampling_rate
+
+    def __anchor(self, last_pack: int, received_at: float):
+        # The last sample of a packet is the one closest to its arrival time
+        self.__anchor_time = received_at
+        self.__anchor_pack = last_pack
+        self.anchors += 1
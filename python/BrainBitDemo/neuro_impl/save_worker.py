@@ -0,0 +1,178 @@
+import contextlib
+import os
+import queue
+from threading import Lock, Thread
+from time import monotonic
+
+import numpy as np
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from neuro_impl.session_buffer import SessionBuffer, SESSION_DIR
+from neuro_impl.session_catalog import ChannelStats, SessionCatalog
+from neuro_impl.session_container import SESSION_FILE, SessionContainerWriter, record_streams
+from neuro_impl.wfdb_stream_writer import WfdbStreamWriter
+
+
+class RecordingSession:
+    """
+    The files of one recording: a crash journal, one WFDB record per entry of records
+    ({'record_name', 'columns', 'sig_name', 'units', 'adc_gain'}, columns indexing the row layout)
+    and a session container holding the same records as seekable streams, plus the side streams
+    (container stream specs, e.g. impedance or gaze) that only the container records.
+    Per-channel statistics are accumulated as rows arrive, so the records are cataloged at close
+    without being re-read. Only the SaveWorker thread touches it after creation.
+    """
+
+    def __init__(self, saved_data_dir, path, n_columns, fs, records, started, streams=(),
+                 container_name=SESSION_FILE):
+        self.saved_data_dir = saved_data_dir
+        self.write_dir = os.path.join(saved_data_dir, path)
+        self.n_columns = n_columns
+        self.fs = fs
+        self.records = records
+        self.streams = list(streams)
+        self.container_name = container_name  # None: WFDB records only
+        self.started = started
+        self.samples = 0
+        self.failed = False  # set by the worker; later jobs of a failed session are skipped
+        self.__journal = None
+        self.__writers = []
+        self.__container = None
+        self.__stats = []
+
+    def open(self):
+        self.__journal = SessionBuffer(os.path.join(self.saved_data_dir, SESSION_DIR), self.n_columns, self.fs,
+                                       self.records, self.write_dir, initial_rows=int(self.fs * 600),
+                                       base_datetime=self.started, container_name=self.container_name)
+        self.__writers = [WfdbStreamWriter(self.write_dir, spec['record_name'], fs=self.fs,
+                                           sig_name=spec['sig_name'], units=spec['units'],
+                                           adc_gain=spec['adc_gain'], base_datetime=self.started,
+                                           time_column=spec['sig_name'].index('Time'))
+                          for spec in self.records]
+        if self.container_name:
+            self.__container = SessionContainerWriter(os.path.join(self.write_dir, self.container_name),
+                                                      record_streams(self.records, self.fs) + self.streams,
+                                                      base_datetime=self.started)
+        self.__stats = [ChannelStats(spec['sig_name']) for spec in self.records]
+
+    def append(self, rows: np.ndarray):
+        self.__journal.append(rows)
+        for writer, stats, spec in zip(self.__writers, self.__stats, self.records):
+            columns = rows[:, spec['columns']]
+            writer.append(columns)
+            if self.__container:
+                self.__container.append(spec['record_name'], columns)
+            stats.update(columns)
+        self.samples += rows.shape[0]
+
+    def append_stream(self, name, rows: np.ndarray):
+        self.__container.append(name, rows)
+
+    def append_text(self, name, times, lines):
+        self.__container.append_text(name, times, lines)
+
+    def close(self, path) -> str:
+        """Write the headers, move the records if path differs from the one at start, drop the journal."""
+        target = os.path.join(self.saved_data_dir, path)
+        moved = os.path.abspath(target) != os.path.abspath(self.write_dir)
+        for writer in self.__writers:
+            length = writer.close()
+            if moved:
+                os.makedirs(target, exist_ok=True)
+                for file in writer.files:
+                    os.replace(file, os.path.join(target, os.path.basename(file)))
+            print(f"{writer.record_name}: {length} samples saved to WFDB (Time last) at {target}")
+        if self.__container:
+            self.__container.close()
+            if moved:
+                os.replace(self.__container.path, os.path.join(target, self.container_name))
+        if moved:
+            # Drop the folder the recording started in if nothing else is in it
+            with contextlib.suppress(OSError):
+                os.removedirs(self.write_dir)
+        # The records are complete, so the crash journal can go
+        self.__journal.discard()
+        try:
+            catalog = SessionCatalog(self.saved_data_dir)
+            for writer, stats in zip(self.__writers, self.__stats):
+                catalog.add_record(target, writer.record_name, self.fs, writer.sig_len, stats.summary(),
+                                   started=self.started,
+                                   mtime=os.path.getmtime(os.path.join(target, writer.record_name + '.hea')))
+        except Exception as e:
+            print(f"Error cataloging the recording in {target}: {e}")
+        return target
+
+
+class SaveWorker(QObject):
+    """
+    Does all recording disk I/O on one background thread, in submission order, so the Qt thread
+    only builds rows and enqueues them. A new session can be opened while an earlier one is still
+    being closed; its rows simply queue up behind.
+    """
+    progress = pyqtSignal(str, int)  # folder, samples written so far (about once a second)
+    finished = pyqtSignal(str)       # folder the records were saved to
+    failed   = pyqtSignal(str, str)  # folder, error message
+    progress_interval = 1.0
+
+    def __init__(self):
+        super().__init__()
+        self.__jobs = queue.Queue()
+        self.__thread = None
+        self.__thread_lock = Lock()  # jobs may be submitted from several threads
+        self.__last_progress = 0.0
+
+    def open(self, session: RecordingSession):
+        self.__submit(session, session.open)
+
+    def append(self, session: RecordingSession, rows: np.ndarray):
+        self.__submit(session, self.__append, session, rows)
+
+    def append_stream(self, session: RecordingSession, name: str, rows: np.ndarray):
+        self.__submit(session, session.append_stream, name, rows)
+
+    def append_text(self, session: RecordingSession, name: str, times, lines):
+        self.__submit(session, session.append_text, name, times, lines)
+
+    def close(self, session: RecordingSession, path: str):
+        self.__submit(session, self.__close, session, path)
+
+    def pending(self) -> int:
+        return self.__jobs.qsize()
+
+    def wait(self):
+        """Block until everything submitted so far is on disk."""
+        self.__jobs.join()
+
+    def __submit(self, session, work, *args):
+        with self.__thread_lock:
+            if self.__thread is None or not self.__thread.is_alive():
+                self.__thread = Thread(target=self.__run, name="recording-save", daemon=True)
+                self.__thread.start()
+            self.__jobs.put((session, work, args))
+
+    def __append(self, session, rows):
+        session.append(rows)
+        if monotonic() - self.__last_progress >= self.progress_interval:
+            self.__last_progress = monotonic()
+            self.progress.emit(session.write_dir, session.samples)
+
+    def __close(self, session, path):
+        self.progress.emit(session.write_dir, session.samples)
+        self.finished.emit(session.close(path))
+
+    def __run(self):
+        while True:
+            session, work, args = self.__jobs.get()
+            try:
+                if not session.failed:
+                    work(*args)
+            except Exception as e:
+                session.failed = True
+                print(f"Error saving recording to {session.write_dir}: {e}")
+                self.failed.emit(session.write_dir, str(e))
+            finally:
+                self.__jobs.task_done()
+
+
+# Shared by every SpectrumController so recordings are written one at a time
+save_worker = SaveWorker()
@@ -0,0 +1,167 @@
+import contextlib
+import json
+import os
+import uuid
+from datetime import datetime
+from time import monotonic
+
+import numpy as np
+
+from neuro_impl.session_catalog import SessionCatalog
+from neuro_impl.session_container import SESSION_FILE, SessionContainerWriter, SessionReader, record_streams
+from neuro_impl.wfdb_stream_writer import WfdbStreamWriter
+
+SESSION_DIR = '.sessions'
+
+
+class SessionBuffer:
+    """
+    Crash-safe journal of a recording: a preallocated float64 np.memmap of sample rows plus a small
+    JSON header. The header says how many rows are committed and how to turn them into WFDB
+    records. It is rewritten atomically at most every commit_interval seconds, so a crash loses
+    at most that much. The file grows by doubling when it is full.
+    records: [{'record_name', 'columns', 'sig_name', 'units', 'adc_gain'}, ...], where columns
+    index the row layout. container_name is the session container recovery rebuilds (None: none).
+    """
+
+    def __init__(self, directory, n_columns, fs, records, write_dir, initial_rows=250 * 600,
+                 commit_interval=1.0, base_datetime=None, container_name=SESSION_FILE):
+        os.makedirs(directory, exist_ok=True)
+        self.session_id = datetime.now().strftime('%Y%m%d-%H%M%S-') + uuid.uuid4().hex[:6]
+        self.data_path = os.path.join(directory, self.session_id + '.f64')
+        self.header_path = os.path.join(directory, self.session_id + '.json')
+        self.n_columns = n_columns
+        self.commit_interval = commit_interval
+        self.length = 0
+        self.header = {
+            'n_columns': n_columns,
+            'length': 0,
+            'fs': fs,
+            'write_dir': os.path.abspath(write_dir),
+            'base_datetime': (base_datetime or datetime.now()).isoformat(),
+            'records': records,
+            'container_name': container_name,
+        }
+        self.__capacity = 0
+        self.__rows = None
+        self.__last_commit = monotonic()
+        self.__grow(initial_rows)
+        self.commit()
+
+    def append(self, rows: np.ndarray):
+        n = rows.shape[0]
+        if self.length + n > self.__capacity:
+            self.__grow(max(self.__capacity * 2, self.length + n))
+        self.__rows[self.length:self.length + n] = rows
+        self.length += n
+        if monotonic() - self.__last_commit >= self.commit_interval:
+            self.commit()
+
+    def commit(self):
+        """Flush the rows and publish the new length in the header."""
+        self.__rows.flush()
+        self.header['length'] = self.length
+        self.__write_header()
+        self.__last_commit = monotonic()
+
+    def discard(self):
+        """The recording was saved normally; the journal is no longer needed."""
+        self.__rows = None
+        for path in (self.data_path, self.header_path):
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+
+    def __grow(self, rows: int):
+        if self.__rows is not None:
+            self.__rows.flush()
+            self.__rows = None
+        with open(self.data_path, 'ab') as f:
+            f.truncate(rows * self.n_columns * 8)
+        self.__rows = np.memmap(self.data_path, dtype=np.float64, mode='r+', shape=(rows, self.n_columns))
+        self.__capacity = rows
+
+    def __write_header(self):
+        tmp = self.header_path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.header, f)
+        os.replace(tmp, self.header_path)
+
+
+def recover_sessions(saved_data_dir: str, chunk_rows=250 * 60) -> list:
+    """
+    Turn every journal left behind by a crashed recording into its WFDB records and session container
+    (in the folder the recording was going to), catalog them, then delete the journal.
+    Returns the folders written to.
+    """
+    directory = os.path.join(saved_data_dir, SESSION_DIR)
+    if not os.path.isdir(directory):
+        return []
+    recovered = []
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith('.json'):
+            continue
+        header_path = os.path.join(directory, name)
+        data_path = header_path[:-len('.json')] + '.f64'
+        try:
+            with open(header_path) as f:
+                header = json.load(f)
+            length = header['length']
+            if length and os.path.exists(data_path):
+                rows = np.memmap(data_path, dtype=np.float64, mode='r', shape=(length, header['n_columns']))
+                _write_records(header, rows, chunk_rows)
+                del rows
+                catalog = SessionCatalog(saved_data_dir)
+                for spec in header['records']:
+                    catalog.index_record(os.path.join(header['write_dir'], spec['record_name']))
+                recovered.append(header['write_dir'])
+                print(f"Recovered {length} samples of an unfinished recording into {header['write_dir']}")
+            for path in (header_path, data_path):
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(path)
+        except Exception as e:
+            print(f"Error recovering session {name}: {e}")
+    return recovered
+
+
+def _write_records(header, rows, chunk_rows):
+    started = datetime.fromisoformat(header['base_datetime'])
+    for spec in header['records']:
+        writer = WfdbStreamWriter(header['write_dir'], spec['record_name'], fs=header['fs'],
+                                  sig_name=spec['sig_name'], units=spec['units'], adc_gain=spec['adc_gain'],
+                                  base_datetime=started, time_column=spec['sig_name'].index('Time'))
+        columns = spec['columns']
+        for start in range(0, rows.shape[0], chunk_rows):
+            writer.append(np.asarray(rows[start:start + chunk_rows, columns]))
+        writer.close()
+    # Rewritten from the journal: the container the crash interrupted may be missing its last chunks.
+    # Its side streams are not journaled, so whatever chunks of them reached the disk are carried over
+    container_name = header.get('container_name', SESSION_FILE)
+    if not container_name:
+        return
+    path = os.path.join(header['write_dir'], container_name)
+    partial = None
+    if os.path.exists(path):
+        os.replace(path, path + '.partial')
+        partial = SessionReader(path + '.partial')
+    try:
+        streams = record_streams(header['records'], header['fs'])
+        names = {spec['name'] for spec in streams}
+        side = [spec for name, spec in partial.streams.items() if name not in names] if partial else []
+        container = SessionContainerWriter(path, streams + side, base_datetime=started)
+        for start in range(0, rows.shape[0], chunk_rows):
+            block = np.asarray(rows[start:start + chunk_rows])
+            for spec in header['records']:
+                container.append(spec['record_name'], block[:, spec['columns']])
+        for spec in side:
+            if spec.get('kind') == 'text':
+                lines = partial.read_text(spec['name'])
+                container.append_text(spec['name'], [t for t, _ in lines], [line for _, line in lines])
+            else:
+                for chunk in partial.iter_chunks(spec['name']):
+                    container.append(spec['name'], chunk)
+        container.close()
+    finally:
+        if partial:
+            partial.close()
+    if partial:
+        os.remove(partial.path)
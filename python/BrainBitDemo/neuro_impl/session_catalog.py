@@ -0,0 +1,214 @@
+import argparse
+import contextlib
+import os
+import sqlite3
+from datetime import datetime
+
+import numpy as np
+import wfdb
+
+CATALOG_FILE = 'catalog.sqlite'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    id           INTEGER PRIMARY KEY,
+    folder       TEXT NOT NULL,
+    record_name  TEXT NOT NULL,
+    subject      TEXT,
+    frequency    REAL,
+    location     TEXT,
+    area         REAL,
+    started      TEXT,
+    fs           REAL,
+    sample_count INTEGER,
+    duration     REAL,
+    mtime        REAL,
+    UNIQUE (folder, record_name)
+);
+CREATE TABLE IF NOT EXISTS channel_stats (
+    record_id INTEGER NOT NULL REFERENCES records(id) ON DELETE CASCADE,
+    channel   TEXT NOT NULL,
+    min       REAL,
+    max       REAL,
+    mean      REAL,
+    rms       REAL,
+    PRIMARY KEY (record_id, channel)
+);
+CREATE INDEX IF NOT EXISTS records_subject ON records(subject, frequency);
+CREATE INDEX IF NOT EXISTS records_frequency ON records(frequency, location, area);
+CREATE INDEX IF NOT EXISTS records_name ON records(record_name);
+"""
+
+
+def _number(text):
+    try:
+        return float(text.replace('_', '.'))
+    except (AttributeError, ValueError):
+        return None
+
+
+def parse_record_folder(folder: str) -> dict:
+    """
+    Subject, frequency, location and area from a CovertScreen folder,
+    data/{name}/{frequency}/{frequency}_{loc}_{area} with '.' written as '_'.
+    Anything else gives None for all four.
+    """
+    parts = folder.replace('\\', '/').strip('/').split('/')
+    meta = {'subject': None, 'frequency': None, 'location': None, 'area': None}
+    if len(parts) < 4 or parts[-4] != 'data' or not parts[-1].startswith(parts[-2] + '_'):
+        return meta
+    location, _, area = parts[-1][len(parts[-2]) + 1:].partition('_')
+    meta.update(subject=parts[-3], frequency=_number(parts[-2]), location=location or None, area=_number(area))
+    return meta
+
+
+class ChannelStats:
+    """Running min/max/mean/RMS per channel, updated one (n_samples, n_channels) block at a time. NaN is skipped."""
+
+    def __init__(self, channels):
+        self.channels = list(channels)
+        n = len(self.channels)
+        self.min = np.full(n, np.inf)
+        self.max = np.full(n, -np.inf)
+        self.sum = np.zeros(n)
+        self.sum_sq = np.zeros(n)
+        self.count = np.zeros(n, dtype=np.int64)
+
+    def update(self, block: np.ndarray):
+        if not block.shape[0]:
+            return
+        valid = ~np.isnan(block)
+        values = np.where(valid, block, 0.0)
+        np.minimum(self.min, np.where(valid, block, np.inf).min(axis=0), out=self.min)
+        np.maximum(self.max, np.where(valid, block, -np.inf).max(axis=0), out=self.max)
+        self.sum += values.sum(axis=0)
+        self.sum_sq += np.einsum('ij,ij->j', values, values)
+        self.count += valid.sum(axis=0)
+
+    def summary(self) -> dict:
+        """{channel: (min, max, mean, rms)}, None for channels without a valid sample."""
+        result = {}
+        for i, ch in enumerate(self.channels):
+            n = int(self.count[i])
+            result[ch] = (float(self.min[i]), float(self.max[i]), float(self.sum[i] / n),
+                          float(np.sqrt(self.sum_sq[i] / n))) if n else (None, None, None, None)
+        return result
+
+
+class SessionCatalog:
+    """
+    SQLite index of the WFDB records under saved_data_dir: one row per record with the subject,
+    stimulus frequency, location and area of its folder, its length, and per-channel
+    min/max/mean/RMS. Recordings are added as they are saved; index_tree() catches up on
+    existing trees. Every call opens its own connection, so any thread may use it.
+    """
+
+    def __init__(self, saved_data_dir, filename=CATALOG_FILE):
+        self.saved_data_dir = saved_data_dir
+        self.path = os.path.join(saved_data_dir, filename)
+        os.makedirs(saved_data_dir, exist_ok=True)
+        with self.__connect() as db:
+            db.executescript(_SCHEMA)
+
+    def add_record(self, folder, record_name, fs, sample_count, stats: dict, started=None, mtime=None):
+        """folder: absolute or relative to saved_data_dir; stats: {channel: (min, max, mean, rms)}."""
+        folder = self.__relative(folder)
+        meta = parse_record_folder(folder)
+        with self.__connect() as db:
+            db.execute("DELETE FROM records WHERE folder = ? AND record_name = ?", (folder, record_name))
+            cursor = db.execute(
+                "INSERT INTO records (folder, record_name, subject, frequency, location, area, started, fs,"
+                " sample_count, duration, mtime) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (folder, record_name, meta['subject'], meta['frequency'], meta['location'], meta['area'],
+                 started.isoformat() if started else None, fs, sample_count,
+                 sample_count / fs if fs else None, mtime))
+            db.executemany("INSERT INTO channel_stats VALUES (?, ?, ?, ?, ?, ?)",
+                           [(cursor.lastrowid, ch, *values) for ch, values in stats.items()])
+
+    def index_record(self, record_path, chunk_samples=250 * 60):
+        """Read a WFDB record in chunks and (re)catalog it."""
+        header = wfdb.rdheader(record_path)
+        stats = ChannelStats(header.sig_name)
+        for start in range(0, header.sig_len, chunk_samples):
+            record = wfdb.rdrecord(record_path, sampfrom=start, sampto=min(start + chunk_samples, header.sig_len))
+            stats.update(record.p_signal)
+        started = datetime.combine(header.base_date, header.base_time) \
+            if header.base_date and header.base_time else None
+        self.add_record(os.path.dirname(record_path), header.record_name, header.fs, header.sig_len,
+                        stats.summary(), started=started, mtime=os.path.getmtime(record_path + '.hea'))
+
+    def index_tree(self, root=None, force=False) -> int:
+        """
+        Catalog every WFDB record under root (default saved_data_dir). Records whose header has
+        not changed since they were cataloged are skipped unless force. Returns the number indexed.
+        """
+        with self.__connect() as db:
+            known = {(folder, name): mtime for folder, name, mtime in
+                     db.execute("SELECT folder, record_name, mtime FROM records")}
+        indexed = 0
+        for folder, _, files in os.walk(root or self.saved_data_dir):
+            for file in sorted(files):
+                if not file.endswith('.hea'):
+                    continue
+                record_path = os.path.join(folder, file[:-len('.hea')])
+                mtime = os.path.getmtime(record_path + '.hea')
+                if not force and known.get((self.__relative(folder), file[:-len('.hea')])) == mtime:
+                    continue
+                try:
+                    self.index_record(record_path)
+                    indexed += 1
+                except Exception as e:
+                    print(f"Error cataloging {record_path}: {e}")
+        return indexed
+
+    def query(self, subject=None, frequency=None, location=None, area=None, record_name=None,
+              min_duration=None) -> list:
+        """Records matching every given field, as dicts with the folder relative to saved_data_dir."""
+        clauses, args = [], []
+        for column, value in (('subject', subject), ('location', location), ('record_name', record_name)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                args.append(value)
+        for column, value in (('frequency', frequency), ('area', area)):
+            if value is not None:
+                clauses.append(f"{column} BETWEEN ? AND ?")
+                args += [value - 1e-6, value + 1e-6]
+        if min_duration is not None:
+            clauses.append("duration >= ?")
+            args.append(min_duration)
+        sql = "SELECT * FROM records" + (" WHERE " + " AND ".join(clauses) if clauses else "") + " ORDER BY folder"
+        with self.__connect() as db:
+            return [dict(row) for row in db.execute(sql, args)]
+
+    def channel_stats(self, record_id) -> dict:
+        """{channel: {'min', 'max', 'mean', 'rms'}} of a cataloged record."""
+        with self.__connect() as db:
+            return {row['channel']: {key: row[key] for key in ('min', 'max', 'mean', 'rms')}
+                    for row in db.execute("SELECT * FROM channel_stats WHERE record_id = ?", (record_id,))}
+
+    def __relative(self, folder):
+        return os.path.relpath(os.path.abspath(folder), os.path.abspath(self.saved_data_dir)).replace(os.sep, '/')
+
+    @contextlib.contextmanager
+    def __connect(self):
+        db = sqlite3.connect(self.path, timeout=30)
+        try:
+            db.row_factory = sqlite3.Row
+            db.execute("PRAGMA foreign_keys = ON")
+            with db:
+                yield db
+        finally:
+            db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Catalog the WFDB records of an existing wfdb_data tree.")
+    parser.add_argument('saved_data_dir', nargs='?', default='./wfdb_data')
+    parser.add_argument('--force', action='store_true', help='re-read records that are already cataloged')
+    args = parser.parse_args()
+    count = SessionCatalog(args.saved_data_dir).index_tree(force=args.force)
+    print(f"{count} records cataloged in {os.path.join(args.saved_data_dir, CATALOG_FILE)}")
+
+
+if __name__ == '__main__':
+    main()
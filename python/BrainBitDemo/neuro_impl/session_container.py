@@ -0,0 +1,287 @@
+import json
+import os
+import struct
+import zlib
+from datetime import datetime
+from math import floor
+
+import numpy as np
+
+from neuro_impl.record_reader import chunk_cache
+from neuro_impl.wfdb_stream_writer import WfdbStreamWriter
+
+SESSION_FILE = 'session.bbs'
+
+_MAGIC = b'BBSC\x01\x00\x00\x00'
+_LENGTH = struct.Struct('<I')
+# 'CHNK', stream index, rows, columns, first time, last time, payload bytes
+_CHUNK = struct.Struct('<4sHIHddI')
+# index offset, index entries, 'BIDX'
+_TRAILER = struct.Struct('<QI4s')
+_INDEX_DTYPE = np.dtype([('stream', '<u2'), ('n_rows', '<u4'), ('offset', '<u8'), ('t0', '<f8'), ('t1', '<f8')])
+
+
+def stream_spec(name, sig_name, units, fs=None, adc_gain=None, time_column='Time', kind='numeric') -> dict:
+    """
+    A container stream: float64 rows with one column per sig_name, one of which is the time base.
+    fs is the nominal rate (None for irregular streams such as events); adc_gain is only used
+    when the stream is exported to WFDB. A 'text' stream holds (time, line) pairs instead of rows
+    and has only the time column.
+    """
+    return {'name': name, 'sig_name': list(sig_name), 'units': list(units), 'fs': fs,
+            'adc_gain': None if adc_gain is None else list(adc_gain),
+            'time_column': list(sig_name).index(time_column), 'kind': kind}
+
+
+def record_streams(records, fs) -> list:
+    """Streams matching WFDB record specs ({'record_name', 'sig_name', 'units', 'adc_gain', ...})."""
+    return [stream_spec(spec['record_name'], spec['sig_name'], spec['units'], fs=fs, adc_gain=spec['adc_gain'])
+            for spec in records]
+
+
+def _encode(rows: np.ndarray) -> bytes:
+    # Column-major, then byte-shuffled: the high bytes of neighbouring samples compress well
+    planes = np.ascontiguousarray(rows.T, dtype='<f8').view(np.uint8).reshape(-1, 8).T
+    return zlib.compress(planes.tobytes(), 6)
+
+
+def _decode(payload: bytes, n_rows: int, n_cols: int) -> np.ndarray:
+    planes = np.frombuffer(zlib.decompress(payload), dtype=np.uint8).reshape(8, -1)
+    return np.ascontiguousarray(planes.T).view('<f8').reshape(n_cols, n_rows).T
+
+
+class SessionContainerWriter:
+    """
+    Native recording format: every stream is cut into compressed chunks on a fixed time grid
+    (chunk k of a stream holds the rows with k * chunk_duration <= t < (k + 1) * chunk_duration),
+    appended to one file as they fill. close() adds a time -> file offset index, so a reader
+    can fetch any time range without decoding the rest. Chunks are self-describing, so a file
+    whose writer never closed is still readable by scanning.
+    Rows of a stream must arrive in time order.
+    """
+
+    def __init__(self, path, streams, base_datetime=None, chunk_duration=10.0):
+        self.path = path
+        self.streams = list(streams)
+        self.chunk_duration = chunk_duration
+        self.closed = False
+        self.__stream_index = {spec['name']: i for i, spec in enumerate(self.streams)}
+        self.__pending = [[] for _ in self.streams]
+        self.__chunk_end = [None] * len(self.streams)
+        self.__index = []
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        header = json.dumps({'version': 1, 'chunk_duration': chunk_duration,
+                             'base_datetime': (base_datetime or datetime.now()).isoformat(),
+                             'streams': self.streams}).encode()
+        self.__file = open(path, 'wb')
+        self.__file.write(_MAGIC + _LENGTH.pack(len(header)) + header)
+
+    def append(self, stream: str, rows: np.ndarray):
+        i = self.__stream_index[stream]
+        rows = np.asarray(rows, dtype=np.float64)
+        self.__append(i, rows[:, self.streams[i]['time_column']], rows)
+
+    def append_text(self, stream: str, times, lines):
+        """Lines of a 'text' stream, each with its time."""
+        self.__append(self.__stream_index[stream], np.asarray(times, dtype=np.float64), list(lines))
+
+    def __append(self, i, times, items):
+        while len(times):
+            if self.__chunk_end[i] is None:
+                self.__chunk_end[i] = (floor(times[0] / self.chunk_duration) + 1) * self.chunk_duration
+            cut = int(np.searchsorted(times, self.__chunk_end[i]))
+            if cut:
+                self.__pending[i].append((times[:cut], items[:cut]))
+            if cut == len(times):
+                break
+            self.__flush(i)
+            self.__chunk_end[i] = None
+            times, items = times[cut:], items[cut:]
+
+    def close(self) -> str:
+        """Write the partial chunks and the index; returns the path."""
+        if self.closed:
+            return self.path
+        for i in range(len(self.streams)):
+            self.__flush(i)
+        index = np.array(self.__index, dtype=_INDEX_DTYPE)
+        offset = self.__file.tell()
+        self.__file.write(index.tobytes())
+        self.__file.write(_TRAILER.pack(offset, len(index), b'BIDX'))
+        self.__file.close()
+        self.closed = True
+        return self.path
+
+    def __flush(self, i):
+        if not self.__pending[i]:
+            return
+        times = np.concatenate([part[0] for part in self.__pending[i]])
+        if self.streams[i].get('kind') == 'text':
+            lines = [line for part in self.__pending[i] for line in part[1]]
+            payload = zlib.compress(json.dumps({'t': times.tolist(), 'text': lines}).encode(), 6)
+            n_cols = 0
+        else:
+            rows = np.concatenate([part[1] for part in self.__pending[i]])
+            payload = _encode(rows)
+            n_cols = rows.shape[1]
+        self.__pending[i] = []
+        offset = self.__file.tell()
+        self.__file.write(_CHUNK.pack(b'CHNK', i, len(times), n_cols, times[0], times[-1], len(payload)))
+        self.__file.write(payload)
+        self.__index.append((i, len(times), offset, times[0], times[-1]))
+
+
+class SessionReader:
+    """
+    Random access to a session container. Only the header and the chunk index are read on open;
+    read() decodes just the chunks that overlap the requested range, through the shared chunk cache.
+    """
+
+    def __init__(self, path, cache=None):
+        self.path = path
+        self.cache = cache or chunk_cache
+        self.__file = open(path, 'rb')
+        try:
+            if self.__file.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError(f"{path} is not a session container")
+            (length,) = _LENGTH.unpack(self.__file.read(_LENGTH.size))
+            header = json.loads(self.__file.read(length))
+            self.__data_start = self.__file.tell()
+            self.chunk_duration = header['chunk_duration']
+            self.base_datetime = datetime.fromisoformat(header['base_datetime'])
+            self.streams = {spec['name']: spec for spec in header['streams']}
+            self.__names = [spec['name'] for spec in header['streams']]
+            index = self.__read_index()
+            self.complete = index is not None
+            if index is None:
+                index = self.__scan()
+        except Exception:
+            self.__file.close()
+            raise
+        self.__chunks = {name: index[index['stream'] == i] for i, name in enumerate(self.__names)}
+        self.__key = (os.path.abspath(path), os.path.getmtime(path))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.__file.close()
+
+    def sample_count(self, stream: str) -> int:
+        return int(self.__chunks[stream]['n_rows'].sum())
+
+    def time_range(self, stream: str) -> tuple:
+        """(first, last) timestamp of a stream, or None if it has no rows."""
+        chunks = self.__chunks[stream]
+        return (float(chunks['t0'][0]), float(chunks['t1'][-1])) if len(chunks) else None
+
+    def read(self, stream: str, t0=None, t1=None, channels=None) -> np.ndarray:
+        """Rows of stream with t0 <= t < t1 (either bound may be None); channels picks columns by name."""
+        spec = self.streams[stream]
+        chunks = self.__chunks[stream]
+        first = 0 if t0 is None else int(np.searchsorted(chunks['t1'], t0, side='left'))
+        last = len(chunks) if t1 is None else int(np.searchsorted(chunks['t0'], t1, side='left'))
+        columns = slice(None) if channels is None else [spec['sig_name'].index(ch) for ch in channels]
+        parts = []
+        for entry in chunks[first:last]:
+            rows = self.read_chunk(entry)
+            times = rows[:, spec['time_column']]
+            lo = 0 if t0 is None else int(np.searchsorted(times, t0, side='left'))
+            hi = len(times) if t1 is None else int(np.searchsorted(times, t1, side='left'))
+            parts.append(rows[lo:hi, columns])
+        if not parts:
+            width = len(spec['sig_name']) if channels is None else len(channels)
+            return np.empty((0, width), dtype=np.float64)
+        return np.concatenate(parts) if len(parts) > 1 else parts[0]
+
+    def read_text(self, stream: str, t0=None, t1=None) -> list:
+        """(time, line) pairs of a 'text' stream with t0 <= time < t1."""
+        chunks = self.__chunks[stream]
+        first = 0 if t0 is None else int(np.searchsorted(chunks['t1'], t0, side='left'))
+        last = len(chunks) if t1 is None else int(np.searchsorted(chunks['t0'], t1, side='left'))
+        lines = []
+        for entry in chunks[first:last]:
+            self.__file.seek(int(entry['offset']))
+            *_, size = _CHUNK.unpack(self.__file.read(_CHUNK.size))
+            chunk = json.loads(zlib.decompress(self.__file.read(size)))
+            lines += [(t, line) for t, line in zip(chunk['t'], chunk['text'])
+                      if (t0 is None or t >= t0) and (t1 is None or t < t1)]
+        return lines
+
+    def iter_chunks(self, stream: str):
+        """Decoded chunks of a stream in time order."""
+        for entry in self.__chunks[stream]:
+            yield self.read_chunk(entry)
+
+    def read_chunk(self, entry) -> np.ndarray:
+        return self.cache.get(self.__key + (int(entry['offset']),), lambda: self.__decode_chunk(int(entry['offset'])))
+
+    def __decode_chunk(self, offset) -> np.ndarray:
+        self.__file.seek(offset)
+        _, _, n_rows, n_cols, _, _, size = _CHUNK.unpack(self.__file.read(_CHUNK.size))
+        return _decode(self.__file.read(size), n_rows, n_cols)
+
+    def __read_index(self):
+        self.__file.seek(0, os.SEEK_END)
+        end = self.__file.tell()
+        if end - self.__data_start < _TRAILER.size:
+            return None
+        self.__file.seek(end - _TRAILER.size)
+        offset, count, magic = _TRAILER.unpack(self.__file.read(_TRAILER.size))
+        if magic != b'BIDX' or offset + count * _INDEX_DTYPE.itemsize != end - _TRAILER.size:
+            return None
+        self.__file.seek(offset)
+        return np.frombuffer(self.__file.read(count * _INDEX_DTYPE.itemsize), dtype=_INDEX_DTYPE)
+
+    def __scan(self):
+        """Rebuild the index of a container that was never closed, stopping at the first torn chunk."""
+        entries = []
+        offset = self.__data_start
+        self.__file.seek(offset)
+        while True:
+            head = self.__file.read(_CHUNK.size)
+            if len(head) < _CHUNK.size:
+                break
+            magic, stream, n_rows, _, t0, t1, size = _CHUNK.unpack(head)
+            if magic != b'CHNK' or len(self.__file.read(size)) < size:
+                break
+            entries.append((stream, n_rows, offset, t0, t1))
+            offset += _CHUNK.size + size
+        return np.array(entries, dtype=_INDEX_DTYPE)
+
+
+def export_wfdb(path, write_dir=None, streams=None, fmt='32') -> list:
+    """
+    Write one WFDB record per stream of a container (default: every numeric stream with an fs
+    and adc_gain) into write_dir (default: next to the container). Returns the record paths.
+    """
+    write_dir = write_dir or os.path.dirname(path)
+    records = []
+    with SessionReader(path) as reader:
+        names = streams or [name for name, spec in reader.streams.items()
+                            if spec['fs'] and spec['adc_gain'] is not None and spec.get('kind') != 'text']
+        for name in names:
+            spec = reader.streams[name]
+            writer = WfdbStreamWriter(write_dir, name, fs=spec['fs'], sig_name=spec['sig_name'],
+                                      units=spec['units'], adc_gain=spec['adc_gain'], fmt=fmt,
+                                      base_datetime=reader.base_datetime, time_column=spec['time_column'])
+            try:
+                for rows in reader.iter_chunks(name):
+                    writer.append(rows)
+            finally:
+                writer.close()
+            records.append(os.path.join(write_dir, name))
+    return records
+
+
+def find_sessions(root) -> list:
+    """Every session container under root, e.g. wfdb_data/data."""
+    found = []
+    for folder, _, files in os.walk(root):
+        if SESSION_FILE in files:
+            found.append(os.path.join(folder, SESSION_FILE))
+    return sorted(found)
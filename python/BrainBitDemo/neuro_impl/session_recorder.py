@@ -0,0 +1,110 @@
+import os
+from datetime import datetime
+from threading import Lock
+from time import monotonic
+
+import numpy as np
+
+from neuro_impl.save_worker import RecordingSession, save_worker as default_save_worker
+from neuro_impl.session_container import stream_spec
+from neuro_impl.signal_batch import SignalBatch
+from neuro_impl.stream_integrity import gap_mask
+from neuro_impl.utils import BB_channels, BB_sampling_rate
+
+# Row layout of the signal stream: O1, O2, T3, T4 (mV), Time, Frequency, Gap
+# Fixed gains: 1 nV resolution for EEG, 1 ms for Time, 0.001 Hz for the label.
+# Time is also kept exactly, in ns, in each record's .time sidecar
+SIGNAL_RECORDS = [
+    {'record_name': "eeg_recording", 'columns': [0, 1, 2, 3, 4],
+     'sig_name': list(BB_channels) + ['Time'], 'units': ['mV'] * len(BB_channels) + ['s'],
+     'adc_gain': [1e6] * len(BB_channels) + [1e3]},
+    {'record_name': "eeg_recording_label", 'columns': [5, 6, 4],
+     'sig_name': ['Frequency', 'Gap', 'Time'], 'units': ['Hz', 'flag', 's'],
+     'adc_gain': [1e3, 1.0, 1e3]},
+]
+
+# Streams at their own rate, kept in the session container only
+SIDE_STREAMS = [
+    stream_spec('labels', ['Frequency', 'Time'], ['Hz', 's']),  # one row per label change
+    stream_spec('impedance', list(BB_channels) + ['Time'], ['Ohm'] * len(BB_channels) + ['s']),
+    stream_spec('gaze', ['Time'], ['s'], kind='text'),         # GazeTracking output lines
+]
+
+
+class SessionRecorder:
+    """
+    Records every stream of a session (EEG with its label, label changes, impedance, gaze output)
+    into one RecordingSession on the save worker. Producers pass time.monotonic() timestamps, the
+    clock the sample clock and the acquisition rings already use; they are stored relative to
+    the start of the session, so all streams share one time base and need no alignment later.
+    Any thread may record; the save worker keeps the jobs in order. Rows recorded while no session
+    is open are dropped: the check and the enqueue hold the same lock as start() and stop(), so
+    nothing is queued behind a session's close.
+    """
+
+    def __init__(self, saved_data_dir="./wfdb_data", save_worker=None):
+        self.saved_data_dir = saved_data_dir
+        os.makedirs(self.saved_data_dir, exist_ok=True)
+        self.save_worker = save_worker or default_save_worker
+        self.session = None
+        self.path = ""
+        self.time_origin = None  # monotonic time of the start of the session
+        self.__last_label = None
+        self.__lock = Lock()
+
+    @property
+    def is_recording(self) -> bool:
+        return self.session is not None
+
+    def start(self, path=""):
+        """Records go to saved_data_dir/path; stop() may still move them elsewhere."""
+        with self.__lock:
+            self.__close(None)
+            self.path = path
+            self.__last_label = None
+            self.time_origin = monotonic()
+            session = RecordingSession(self.saved_data_dir, path, n_columns=len(BB_channels) + 3,
+                                       fs=BB_sampling_rate, records=SIGNAL_RECORDS, started=datetime.now(),
+                                       streams=SIDE_STREAMS)
+            self.save_worker.open(session)
+            self.session = session
+
+    def stop(self, path=None):
+        """Returns at once; save_worker.finished fires when the records are on disk."""
+        with self.__lock:
+            self.__close(path)
+
+    def record_signal(self, batch: SignalBatch, values: np.ndarray, label: float):
+        """values: the batch's samples in mV."""
+        with self.__lock:
+            if self.session is None:
+                return
+            rows = np.column_stack((values, batch.timestamps - self.time_origin,
+                                    np.full(len(batch), label, dtype=np.float64), gap_mask(batch)))
+            self.save_worker.append(self.session, rows)
+            if label != self.__last_label:
+                self.__last_label = label
+                self.__append_stream('labels', [[label]], batch.timestamps[:1])
+
+    def record_stream(self, name: str, values, timestamps):
+        """Rows of a side stream: values (n, channels without Time), monotonic timestamps (n,)."""
+        with self.__lock:
+            if self.session is not None:
+                self.__append_stream(name, values, timestamps)
+
+    def record_text(self, name: str, lines, timestamps):
+        with self.__lock:
+            if self.session is None:
+                return
+            times = np.asarray(timestamps, dtype=np.float64) - self.time_origin
+            self.save_worker.append_text(self.session, name, times, list(lines))
+
+    def __append_stream(self, name, values, timestamps):
+        times = np.asarray(timestamps, dtype=np.float64) - self.time_origin
+        self.save_worker.append_stream(self.session, name,
+                                       np.column_stack((np.asarray(values, dtype=np.float64), times)))
+
+    def __close(self, path):
+        session, self.session = self.session, None
+        if session is not None:
+            self.save_worker.close(session, self.path if path is None else path)
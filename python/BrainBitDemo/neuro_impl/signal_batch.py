@@ -0,0 +1,61 @@
+from operator import attrgetter
+from time import monotonic
+
+import numpy as np
+
+from neuro_impl.utils import BB_channels
+
+BB_channel_index = {ch: i for i, ch in enumerate(BB_channels)}
+
+_get_channels = attrgetter(*BB_channels)
+
+
+class SignalBatch:
+    """
+    One SDK signal callback in columnar form, converted once and shared read-only by every consumer.
+    samples: (n_samples, 4) float64 in volts, columns ordered as BB_channels.
+    timestamps: (n_samples,) float64 monotonic seconds, one per sample.
+    """
+    __slots__ = ('samples', 'pack_nums', 'markers', 'timestamps', 'received_at')
+
+    def __init__(self, samples: np.ndarray, pack_nums: np.ndarray, markers: np.ndarray, timestamps: np.ndarray,
+                 received_at: float):
+        for arr in (samples, pack_nums, markers, timestamps):
+            arr.flags.writeable = False
+        self.samples = samples
+        self.pack_nums = pack_nums
+        self.markers = markers
+        self.timestamps = timestamps
+        self.received_at = received_at
+
+    @classmethod
+    def from_packets(cls, packets, received_at=None, clock=None):
+        """
+        Convert a list of BrainBitSignalData (as delivered by the SDK) into a batch.
+        With a SampleClock the timestamps come from the pack numbers, otherwise every sample gets received_at.
+        """
+        if received_at is None:
+            received_at = monotonic()
+        n = len(packets)
+        samples = np.array([_get_channels(pkt) for pkt in packets], dtype=np.float64).reshape(n, len(BB_channels))
+        pack_nums = np.fromiter((pkt.PackNum for pkt in packets), dtype=np.int64, count=n)
+        markers = np.fromiter((pkt.Marker for pkt in packets), dtype=np.int32, count=n)
+        if clock is not None:
+            timestamps = clock.stamp(pack_nums, received_at)
+        else:
+            timestamps = np.full(n, received_at, dtype=np.float64)
+        return cls(samples, pack_nums, markers, timestamps, received_at)
+
+    def channel(self, name: str) -> np.ndarray:
+        """Read-only view of a single channel column."""
+        return self.samples[:, BB_channel_index[name]]
+
+    def __len__(self):
+        return self.samples.shape[0]
+
+
+def as_signal_batch(data) -> SignalBatch:
+    """Accept a SignalBatch, a list of SDK packets or a single packet."""
+    if isinstance(data, SignalBatch):
+        return data
+    return SignalBatch.from_packets(data if isinstance(data, list) else [data])
@@ -0,0 +1,239 @@
+import os
+from threading import Thread, Event
+from time import monotonic, sleep
+
+import numpy as np
+import wfdb
+from neurosdk.cmn_types import *
+
+from neuro_impl.utils import BB_channels, BB_sampling_rate
+
+
+class SyntheticSignalSource:
+    """Sinusoids plus gaussian noise on every channel, in volts like the SDK delivers them."""
+
+    def __init__(self, sampling_rate=BB_sampling_rate, frequencies=(10.0,), amplitude=20e-6, noise=5e-6, seed=None):
+        self.sampling_rate = sampling_rate
+        self.frequencies = np.asarray(frequencies, dtype=np.float64)
+        self.amplitude = amplitude
+        self.noise = noise
+        self.__rng = np.random.default_rng(seed)
+        self.__position = 0
+
+    def read(self, n_samples: int) -> np.ndarray:
+        t = (self.__position + np.arange(n_samples)) / self.sampling_rate
+        self.__position += n_samples
+        tone = self.amplitude * np.sin(2 * np.pi * np.outer(t, self.frequencies)).sum(axis=1)
+        noise = self.__rng.normal(0.0, self.noise, size=(n_samples, len(BB_channels)))
+        return tone[:, None] + noise
+
+
+class WfdbSignalSource:
+    """Replays the O1/O2/T3/T4 channels of a saved WFDB record, looping at the end."""
+
+    def __init__(self, record_path, loop=True):
+        record = wfdb.rdrecord(os.path.splitext(record_path)[0])
+        missing = [ch for ch in BB_channels if ch not in record.sig_name]
+        if missing:
+            raise ValueError(f"Record {record_path} has no channels {missing}")
+        columns = [record.sig_name.index(ch) for ch in BB_channels]
+        # Records are saved in mV, the SDK delivers volts
+        self.signals = np.ascontiguousarray(record.p_signal[:, columns] / 1e3)
+        self.sampling_rate = record.fs
+        self.loop = loop
+        self.__position = 0
+
+    def read(self, n_samples: int) -> np.ndarray:
+        total = self.signals.shape[0]
+        if not self.loop:
+            chunk = self.signals[self.__position:self.__position + n_samples]
+            self.__position += chunk.shape[0]
+            return chunk
+        idx = (self.__position + np.arange(n_samples)) % total
+        self.__position = (self.__position + n_samples) % total
+        return self.signals[idx]
+
+
+class SimulatedSensor:
+    """
+    Stand-in for a neurosdk BrainBit sensor: same callbacks, same packet types.
+    speed=1.0 streams in real time, speed=N at N x real time, speed=0 as fast as possible.
+    packet_loss is the probability of silently dropping a packet, like a lost BLE notification.
+    """
+
+    def __init__(self, sensor_info: SensorInfo, source, speed=1.0, packet_size=4, resist_rate=4.0,
+                 resist_ohms=250_000.0, packet_loss=0.0):
+        self.sensor_info = sensor_info
+        self.source = source
+        self.speed = speed
+        self.packet_size = packet_size
+        self.resist_rate = resist_rate
+        self.resist_ohms = resist_ohms
+        self.packet_loss = packet_loss
+
+        self.signalDataReceived = None
+        self.resistDataReceived = None
+        self.sensorStateChanged = None
+        self.batteryChanged = None
+
+        self.__state = SensorState.StateInRange
+        self.__pack_num = 0
+        self.__signal_stop = Event()
+        self.__resist_stop = Event()
+        self.__signal_thread = None
+        self.__resist_thread = None
+        self.__rng = np.random.default_rng()
+
+    @property
+    def state(self) -> SensorState:
+        return self.__state
+
+    @property
+    def name(self) -> str:
+        return self.sensor_info.Name
+
+    @property
+    def address(self) -> str:
+        return self.sensor_info.Address
+
+    @property
+    def serial_number(self) -> str:
+        return self.sensor_info.SerialNumber
+
+    @property
+    def sens_family(self) -> SensorFamily:
+        return self.sensor_info.SensFamily
+
+    @property
+    def batt_power(self) -> int:
+        return 100
+
+    @property
+    def sampling_frequency(self) -> SensorSamplingFrequency:
+        return SensorSamplingFrequency.FrequencyHz250
+
+    def connect(self):
+        self.__set_state(SensorState.StateInRange)
+
+    def disconnect(self):
+        self.__stop_signal()
+        self.__stop_resist()
+        self.__set_state(SensorState.StateOutOfRange)
+
+    def exec_command(self, command: SensorCommand):
+        match command:
+            case SensorCommand.StartSignal:
+                self.__start_signal()
+            case SensorCommand.StopSignal:
+                self.__stop_signal()
+            case SensorCommand.StartResist:
+                self.__start_resist()
+            case SensorCommand.StopResist:
+                self.__stop_resist()
+            case _:
+                raise ValueError(f"Command {command} is not supported by the simulator")
+
+    def __set_state(self, state: SensorState):
+        self.__state = state
+        if self.sensorStateChanged:
+            self.sensorStateChanged(self, state)
+
+    def __start_signal(self):
+        if self.__signal_thread and self.__signal_thread.is_alive():
+            return
+        self.__signal_stop.clear()
+        self.__signal_thread = Thread(target=self.__signal_loop, daemon=True)
+        self.__signal_thread.start()
+
+    def __stop_signal(self):
+        self.__signal_stop.set()
+        if self.__signal_thread:
+            self.__signal_thread.join(timeout=1.0)
+            self.__signal_thread = None
+
+    def __start_resist(self):
+        if self.__resist_thread and self.__resist_thread.is_alive():
+            return
+        self.__resist_stop.clear()
+        self.__resist_thread = Thread(target=self.__resist_loop, daemon=True)
+        self.__resist_thread.start()
+
+    def __stop_resist(self):
+        self.__resist_stop.set()
+        if self.__resist_thread:
+            self.__resist_thread.join(timeout=1.0)
+            self.__resist_thread = None
+
+    def __signal_loop(self):
+        sampling_rate = self.source.sampling_rate
+        sent = 0
+        started = monotonic()
+        while not self.__signal_stop.is_set():
+            samples = self.source.read(self.packet_size)
+            if samples.shape[0] == 0:
+                break
+            packet = [BrainBitSignalData(PackNum=self.__pack_num + i, Marker=0,
+                                         O1=float(s[0]), O2=float(s[1]), T3=float(s[2]), T4=float(s[3]))
+                      for i, s in enumerate(samples.tolist())]
+            self.__pack_num += len(packet)
+            sent += len(packet)
+            lost = self.packet_loss > 0 and self.__rng.random() < self.packet_loss
+            if self.signalDataReceived and not lost:
+                self.signalDataReceived(self, packet)
+            if self.speed > 0:
+                # Pace against the start time so callback cost does not accumulate as drift
+                delay = started + sent / (sampling_rate * self.speed) - monotonic()
+                if delay > 0:
+                    sleep(delay)
+
+    def __resist_loop(self):
+        while not self.__resist_stop.wait(1.0 / (self.resist_rate * max(self.speed, 1.0))):
+            values = self.__rng.normal(self.resist_ohms, self.resist_ohms * 0.05, size=len(BB_channels))
+            if self.resistDataReceived:
+                self.resistDataReceived(self, BrainBitResistData(*values.tolist()))
+
+
+class SimulatedScanner:
+    """Stand-in for neurosdk Scanner that always finds the given number of simulated headsets."""
+
+    def __init__(self, source_factory=SyntheticSignalSource, speed=1.0, sensors_count=1, **sensor_kwargs):
+        self.source_factory = source_factory
+        self.speed = speed
+        self.sensor_kwargs = sensor_kwargs
+        self.sensorsChanged = None
+        self.__sensors = [SensorInfo(SensFamily=SensorFamily.LEBrainBit,
+                                     SensModel=0,
+                                     Name='BrainBit Simulator',
+                                     Address=f'SIM-{i:04d}',
+                                     SerialNumber=f'SIM{i:06d}',
+                                     PairingRequired=False,
+                                     RSSI=0) for i in range(sensors_count)]
+
+    def sensors(self) -> list[SensorInfo]:
+        return list(self.__sensors)
+
+    def start(self):
+        if self.sensorsChanged:
+            self.sensorsChanged(self, self.sensors())
+
+    def stop(self):
+        pass
+
+    def create_sensor(self, sensor_info: SensorInfo) -> SimulatedSensor:
+        return SimulatedSensor(sensor_info, self.source_factory(), speed=self.speed, **self.sensor_kwargs)
+
+
+def simulated_scanner_from_env():
+    """
+    BRAINBIT_SIMULATOR=synthetic or a WFDB record path replaces the BLE scanner,
+    BRAINBIT_SIMULATOR_SPEED sets the replay speed (0 = as fast as possible),
+    BRAINBIT_SIMULATOR_SENSORS how many headsets the scan finds.
+    """
+    source = os.environ.get('BRAINBIT_SIMULATOR')
+    if not source:
+        return None
+    speed = float(os.environ.get('BRAINBIT_SIMULATOR_SPEED', '1.0'))
+    sensors_count = int(os.environ.get('BRAINBIT_SIMULATOR_SENSORS', '1'))
+    if source == 'synthetic':
+        return SimulatedScanner(SyntheticSignalSource, speed=speed, sensors_count=sensors_count)
+    return SimulatedScanner(lambda: WfdbSignalSource(source), speed=speed, sensors_count=sensors_count)
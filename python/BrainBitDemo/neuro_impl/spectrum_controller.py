@@ -1,12 +1,15 @@
-from spectrum_lib.spectrum_lib import SpectrumMath
-from neuro_impl.utils import BB_channels
-import os
-import wfdb
 import numpy as np
-from datetime import datetime
+
+from neuro_impl.filter_bank import StreamingFilter, eeg_sos
+from neuro_impl.spectrum_engine import SpectrumEngine
+from neuro_impl.ssvep_classifier import SsvepClassifier
+from neuro_impl.ssvep_tracker import SsvepTracker
+from neuro_impl.utils import BB_channels
+from neuro_impl.signal_batch import as_signal_batch
+from neuro_impl.session_recorder import SessionRecorder
 
 class SpectrumController:
-    def __init__(self):
+    def __init__(self, save_worker=None, recorder=None, gate=None):
         sampling_rate = 250
         fft_window = sampling_rate * 4
         process_win_rate = 5
@@ -18,123 +21,118 @@ class SpectrumController:
         beta_coef = 1.0
         gamma_coef = 0.0
 
-        self.maths = {BB_channels[i]: SpectrumMath(sampling_rate, fft_window, process_win_rate) for i in range(4)}
-        for ch in BB_channels:
-            self.maths[ch].init_params(bord_frequency, normalize_spect_by_bandwidth)
-            self.maths[ch].set_waves_coeffs(delta_coef, theta_coef, alpha_coef, beta_coef, gamma_coef)
-
-        self.processedSpectrum = None
-        self.processedWaves = None
-
-        self.saved_data_dir = "./wfdb_data"
-        os.makedirs(self.saved_data_dir, exist_ok=True)
-
-        # Raw signal and timestamp storage
-        self.raw_signals = {ch: [] for ch in BB_channels}
-        self.timestamps = []  # list of datetime objects
-        self.labels = []
+        # 0.5-45 Hz band-pass and 50 Hz notch, applied once per analysed block for every analysis path
+        # below; recordings keep the raw signal
+        self.signal_filter = StreamingFilter(eeg_sos(sampling_rate), len(BB_channels))
+        self.__pending = []  # raw packets (V) not analysed yet
+        self.__pending_samples = 0
+        self.__due = 1       # pending samples that complete the next output step
+
+        # Optional ArtifactGate, copied so its state is this controller's own, checking each analysed block.
+        # Artifacted blocks are recorded as they are but skip the filter and every analysis stage; the
+        # stages get zeros in their place when the signal is clean again, so their windows keep their timing
+        self.gate = gate.copy() if gate else None
+        self.__held_samples = 0
+        self.processedArtifact = None  # (artifacted: bool) -> None, every analysed block while gated
+
+        # All four channels in one engine: one rfft per processing step instead of four SpectrumMath calls
+        self.engine = SpectrumEngine(sampling_rate, fft_window, process_win_rate, bord_frequency,
+                                     normalize_spect_by_bandwidth,
+                                     (delta_coef, theta_coef, alpha_coef, beta_coef, gamma_coef), len(BB_channels))
+
+        self.processedSpectrum = None  # (amplitudes up to bord_frequency, channel) -> None
+        self.processedWaves = None     # (WavesSpectrumData, channel) -> None
+        self.processedFrame = None     # SpectrumFrame of all channels -> None
+
+        # Stimulus frequencies and harmonics, updated on every packet rather than every FFT step
+        # (ChessboardScreen shows them live). Off until a consumer sets processedSsvep and calls
+        # set_stimulus_frequencies()
+        self.ssvep = SsvepTracker(sampling_rate=sampling_rate, window_seconds=fft_window / sampling_rate)
+        self.processedSsvep = None     # (amplitudes (channels, frequencies, harmonics), frequencies) -> None
+        # FBCCA decision over the last 2 s, every 250 ms: between the stimulus frequencies, or for a
+        # single one, whether it beats the rest references
+        self.ssvepClassifier = SsvepClassifier((), sampling_rate=sampling_rate)
+        self.processedDecision = None  # SsvepDecision -> None
+
+        # Recordings go through a SessionRecorder, which may be shared with other streams of the screen.
+        # All of their I/O happens on the save worker's thread
+        self.recorder = recorder or SessionRecorder("./wfdb_data", save_worker=save_worker)
+        self.saved_data_dir = self.recorder.saved_data_dir
         self.current_label = 0
-        self.is_recording = False
 
     def process_data(self, brain_bit_data):
         try:
-            now = datetime.now()
-            samples = brain_bit_data if isinstance(brain_bit_data, list) else [brain_bit_data]
-            # extract values
-            values = {ch: [] for ch in BB_channels}
-            for pkt in samples:
-                for ch in BB_channels:
-                    values[ch].append(getattr(pkt, ch) * 1e3)
-                # record timestamp for each pkt sample
-                self.timestamps.append(now)
-
-            if self.is_recording:
-                for ch in BB_channels:
-                    self.raw_signals[ch].extend(values[ch])
-                self.labels.extend([self.current_label] * len(samples))
-
-            # spectrum processing
-            for ch in BB_channels:
-                self.maths[ch].push_and_process_data(values[ch])
-            self.__resolve_spectrum()
-            self.__resolve_waves()
-            for ch in BB_channels:
-                self.maths[ch].set_new_sample_size()
+            batch = as_signal_batch(brain_bit_data)
+
+            if self.recorder.is_recording:
+                # (n_samples, 4) in mV, one column per channel
+                self.recorder.record_signal(batch, batch.samples * 1e3, self.current_label)
+
+            # Packets wait for the next one that completes an output step; the analysis then runs on them
+            # at once, and every output is published from the same call it would be packet by packet
+            self.__pending.append(batch.samples)
+            self.__pending_samples += len(batch)
+            if self.__pending_samples >= self.__due:
+                self.__analyse()
         except Exception as e:
             print(f"Error processing data: {e}")
 
-    def save_as_wfdb(self,path = "", name="eeg_recording"):
-        """Save raw EEG channels, then timestamp as the last channel."""
+    def __analyse(self):
+        block = self.__pending[0] if len(self.__pending) == 1 else np.concatenate(self.__pending)
+        self.__pending.clear()
+        self.__pending_samples = 0
+        tracking = self.processedSsvep and self.ssvep.frequencies.size
+        deciding = self.processedDecision and self.ssvepClassifier.can_decide
         try:
-            full_path = os.path.join(self.saved_data_dir, path)
-            os.makedirs(full_path, exist_ok=True)  # Ensure directory exists
-            if not self.timestamps:
-                print("No data to save.")
-                return
-            # Reference start time
-            t0 = self.timestamps[0]
-            # Compute offsets in seconds
-            time_offsets = [(t - t0).total_seconds() for t in self.timestamps]
-
-            # Build signals array: [O1, O2, T3, T4, Time]
-            channel_data = [self.raw_signals[ch] for ch in BB_channels]
-            channel_data.append(time_offsets)
-            signals = np.array(channel_data, dtype=np.float32).T
-
-            # Units and names: channels first, then Time
-            units   = ['mV'] * len(BB_channels) + ['s']
-            names   = list(BB_channels)     + ['Time']
-            fmts    = ['16'] * signals.shape[1]
-
-            wfdb.wrsamp(
-                record_name=name,
-                fs=250,
-                units=units,
-                sig_name=names,
-                p_signal=signals,
-                fmt=fmts,
-                write_dir=full_path,
-            )
-            print(f"Signals with timestamps saved to WFDB (Time last) at {full_path}")
-        except Exception as e:
-            print(f"Error saving WFDB signals: {e}")
-
-
-    def save_as_wfdb_label(self,path = "", name="eeg_recording_label"):
-        """Save labels then timestamps to WFDB record (Time last)."""
-        try:
-            full_path = os.path.join(self.saved_data_dir, path)
-            os.makedirs(full_path, exist_ok=True)  # Ensure directory exists
-            if not self.timestamps:
-                print("No labels to save.")
-                return
-            t0 = self.timestamps[0]
-            # Compute offsets in seconds
-            time_offsets = [(t - t0).total_seconds() for t in self.timestamps]
-            labels_arr = np.array(self.labels, dtype=np.float32)
-
-            # Build signals array: [Frequency, Time]
-            channels = [labels_arr, time_offsets]
-            signals = np.array(channels, dtype=np.float32).T
-
-            # Units and names: label first, then Time
-            units   = ['Hz', 's']
-            names   = ['Frequency', 'Time']
-            fmts    = ['16',    '16']
-
-            wfdb.wrsamp(
-                record_name=name,
-                fs=250,
-                units=units,
-                sig_name=names,
-                p_signal=signals,
-                fmt=fmts,
-                write_dir=full_path,
-            )
-            print(f"Labels with timestamps saved to WFDB (Time last) at {full_path}")
-        except Exception as e:
-            print(f"Error saving WFDB labels: {e}")
-
+            if self.gate:
+                holding = self.gate.hold(block)
+                if self.processedArtifact:
+                    self.processedArtifact(self.gate.flagged)
+                if holding:
+                    self.__hold(len(block))
+                    return
+                if self.__held_samples:
+                    self.__release()
+            filtered = self.signal_filter.process(block * 1e3)
+            if tracking:
+                self.processedSsvep(self.ssvep.push(filtered), self.ssvep.frequencies)
+            if deciding:
+                for decision in self.ssvepClassifier.push(filtered):
+                    self.processedDecision(decision)
+
+            # spectrum processing, published at process_win_rate
+            for frame in self.engine.push(filtered):
+                if self.processedFrame:
+                    self.processedFrame(frame)
+                self.__resolve_spectrum(frame)
+                self.__resolve_waves(frame)
+        finally:
+            # The tracker publishes every packet; the classifier and the engine at their steps
+            if tracking:
+                self.__due = 1
+            else:
+                count = self.engine.count + self.__held_samples
+                self.__due = self.engine.step - count % self.engine.step
+                if deciding:
+                    count = self.ssvepClassifier.count + self.__held_samples
+                    self.__due = min(self.__due, self.ssvepClassifier.step - count % self.ssvepClassifier.step)
+
+    def __hold(self, n: int):
+        self.__held_samples += n
+        # A long artifact is passed on a window at a time rather than all at once when it ends
+        if self.__held_samples >= self.engine.fft_window:
+            self.__release()
+
+    def __release(self):
+        zeros = np.zeros((self.__held_samples, len(BB_channels)))
+        if self.processedSsvep and self.ssvep.frequencies.size:
+            self.ssvep.push(zeros, compute=False)
+        if self.processedDecision and self.ssvepClassifier.can_decide:
+            self.ssvepClassifier.push(zeros, compute=False)
+        self.engine.push(zeros, compute=False)
+        self.__held_samples = 0
+        # Restart at the steady state of the next clean sample instead of ringing on the jump to it
+        self.signal_filter.reset()
 
     def update_labels(self, label):
         try:
@@ -142,32 +140,42 @@ class SpectrumController:
         except Exception as e:
             print(f"Error updating label: {e}")
 
-    def start_recording(self):
+    def set_stimulus_frequencies(self, frequencies):
+        try:
+            self.ssvep.set_frequencies(frequencies)
+            self.ssvepClassifier.set_frequencies(frequencies)
+        except Exception as e:
+            print(f"Error setting stimulus frequencies: {e}")
+
+    @property
+    def is_recording(self) -> bool:
+        return self.recorder.is_recording
+
+    def start_recording(self, path=""):
+        """Records go to saved_data_dir/path; stop_recording() may still move them elsewhere."""
         try:
-            self.is_recording = True
-            self.raw_signals = {ch: [] for ch in BB_channels}
-            self.timestamps = []
-            self.labels = []
+            self.recorder.start(path)
             print("EEG recording started...")
         except Exception as e:
             print(f"Error starting recording: {e}")
 
-    def stop_recording(self,path = ""):
+    def stop_recording(self,path = None):
         try:
-            if self.is_recording:
-                self.is_recording = False
-                self.save_as_wfdb(path = path)
-                self.save_as_wfdb_label(path=path)
-                print("EEG recording stopped and data saved.")
+            if self.recorder.is_recording:
+                # Returns at once; save_worker.finished fires when the records are on disk
+                self.recorder.stop(path)
+                print("EEG recording stopped, saving in the background.")
             else:
                 print("No active recording to stop.")
         except Exception as e:
             print(f"Error stopping recording: {e}")
 
-    def __resolve_spectrum(self):
-        # existing
-        pass
+    def __resolve_spectrum(self, frame):
+        if self.processedSpectrum:
+            for i, ch in enumerate(BB_channels):
+                self.processedSpectrum(frame.spectrum[i].tolist(), ch)
 
-    def __resolve_waves(self):
-        # existing
-        pass
+    def __resolve_waves(self, frame):
+        if self.processedWaves:
+            for i, ch in enumerate(BB_channels):
+                self.processedWaves(frame.waves(i), ch)
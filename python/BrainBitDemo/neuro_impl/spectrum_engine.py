@@ -0,0 +1,130 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from neuro_impl.utils import BB_channels, BB_sampling_rate
+
+WAVES = ('delta', 'theta', 'alpha', 'beta', 'gamma')
+# Lower edges of the bands in Hz; each band ends where the next starts, gamma at the border frequency
+WAVE_EDGES = (1.0, 4.0, 8.0, 14.0, 30.0)
+
+
+@dataclass
+class WavesSpectrumData:
+    """Band powers of one channel, with the same fields as spectrum_lib's WavesSpectrumData."""
+    delta_raw: float
+    theta_raw: float
+    alpha_raw: float
+    beta_raw: float
+    gamma_raw: float
+    delta_rel: float
+    theta_rel: float
+    alpha_rel: float
+    beta_rel: float
+    gamma_rel: float
+
+
+class SpectrumFrame:
+    """
+    One update of every channel.
+    spectrum: (n_channels, n_bins) amplitude up to the border frequency, frequencies: (n_bins,) Hz,
+    waves_raw / waves_rel: (n_channels, 5) band powers in WAVES order.
+    """
+    __slots__ = ('spectrum', 'frequencies', 'waves_raw', 'waves_rel', 'total_power', 'sample_index')
+
+    def __init__(self, spectrum, frequencies, waves_raw, waves_rel, total_power, sample_index):
+        self.spectrum = spectrum
+        self.frequencies = frequencies
+        self.waves_raw = waves_raw
+        self.waves_rel = waves_rel
+        self.total_power = total_power
+        self.sample_index = sample_index  # samples pushed when the window closed
+
+    def waves(self, channel: int) -> WavesSpectrumData:
+        return WavesSpectrumData(*self.waves_raw[channel].tolist(), *self.waves_rel[channel].tolist())
+
+
+class SpectrumEngine:
+    """
+    Sliding-window spectrum of all channels at once. Samples go into a mirrored ring, so the
+    last fft_window samples are always one contiguous view. Every sampling_rate / process_win_rate
+    samples (once the window is full) the windows are Hann-weighted and transformed with a single
+    rfft over (window, channel). The window, bin mask and band masks are computed once.
+    Band powers sum the squared amplitudes of their bins (divided by the band width when
+    normalize_by_bandwidth); relative powers use the wave coefficients as weights, like SpectrumMath.
+    """
+
+    def __init__(self, sampling_rate=BB_sampling_rate, fft_window=BB_sampling_rate * 4, process_win_rate=5,
+                 bord_frequency=50, normalize_by_bandwidth=True, waves_coeffs=(0.0, 1.0, 1.0, 1.0, 0.0),
+                 channels=len(BB_channels)):
+        self.sampling_rate = sampling_rate
+        self.fft_window = fft_window
+        self.step = sampling_rate // process_win_rate
+        self.channels = channels
+        self.count = 0
+
+        self.__ring = np.zeros((2 * fft_window, channels), dtype=np.float64)
+        self.__window = np.hanning(fft_window)[:, None]
+        # Single-sided amplitude of a sinusoid, corrected for the window's coherent gain
+        self.__scale = 2.0 / self.__window.sum()
+
+        frequencies = np.fft.rfftfreq(fft_window, 1.0 / sampling_rate)
+        self.__bins = frequencies <= bord_frequency
+        self.frequencies = frequencies[self.__bins]
+        edges = WAVE_EDGES + (bord_frequency,)
+        masks = np.array([(self.frequencies >= lo) & (self.frequencies < hi) for lo, hi in zip(edges, edges[1:])])
+        width = np.diff(edges) if normalize_by_bandwidth else np.ones(len(WAVES))
+        # (bins, waves): one matmul turns a power spectrum into band powers
+        self.__band_matrix = (masks / width[:, None]).T
+        self.__coeffs = np.asarray(waves_coeffs, dtype=np.float64)
+
+    def set_waves_coeffs(self, delta, theta, alpha, beta, gamma):
+        self.__coeffs = np.array([delta, theta, alpha, beta, gamma], dtype=np.float64)
+
+    def clear(self):
+        self.__ring[:] = 0.0
+        self.count = 0
+
+    def push(self, values: np.ndarray, compute=True) -> list:
+        """
+        values: (n_samples, channels). Returns a SpectrumFrame per process step the samples completed;
+        with compute False the samples only fill the window and the steps they complete are skipped.
+        """
+        windows, indices = [], []
+        start = 0
+        n = values.shape[0]
+        while start < n:
+            # Stop at the next processing boundary so its window can be taken
+            take = min(n - start, self.step - self.count % self.step)
+            self.__write(values[start:start + take])
+            start += take
+            if compute and self.count % self.step == 0 and self.count >= self.fft_window:
+                head = self.count % self.fft_window
+                windows.append(self.__ring[head:head + self.fft_window].copy())
+                indices.append(self.count)
+        if not windows:
+            return []
+        return self.__process(np.stack(windows), indices)
+
+    def __write(self, values):
+        w = self.fft_window
+        head = self.count % w
+        first = min(len(values), w - head)
+        for offset, part in ((head, values[:first]), (0, values[first:])):
+            if len(part):
+                self.__ring[offset:offset + len(part)] = part
+                self.__ring[offset + w:offset + w + len(part)] = part
+        self.count += len(values)
+
+    def __process(self, windows: np.ndarray, indices) -> list:
+        # windows: (frames, fft_window, channels) -> one transform for every frame and channel
+        windows -= windows.mean(axis=1, keepdims=True)
+        spectrum = np.abs(np.fft.rfft(windows * self.__window, axis=1)[:, self.__bins]) * self.__scale
+        power = spectrum ** 2
+        waves_raw = np.einsum('fbc,bw->fcw', power, self.__band_matrix)
+        weighted = waves_raw * self.__coeffs
+        total = weighted.sum(axis=2, keepdims=True)
+        waves_rel = np.divide(weighted, total, out=np.zeros_like(weighted), where=total > 0)
+        total_power = power.sum(axis=1)
+        return [SpectrumFrame(spectrum[i].T, self.frequencies, waves_raw[i], waves_rel[i], total_power[i], index)
+                for i, index in enumerate(indices)]
@@ -0,0 +1,152 @@
+import numpy as np
+from scipy.signal import sosfiltfilt
+
+from neuro_impl.filter_bank import bandpass_sos
+from neuro_impl.utils import BB_channels, BB_sampling_rate
+
+# A single stimulus frequency is scored against references at these multiples of it, which stand in
+# for the rest of the spectrum: their harmonics stay clear of the stimulus' own
+REST_RATIOS = (0.75, 1.25)
+
+
+def reference_signals(frequencies, harmonics: int, sampling_rate: float, n_samples: int) -> np.ndarray:
+    """(frequencies, n_samples, 2 * harmonics) sin/cos references at each frequency and its harmonics."""
+    t = np.arange(n_samples) / sampling_rate
+    phase = 2 * np.pi * np.asarray(frequencies, dtype=np.float64)[:, None, None] \
+        * np.arange(1, harmonics + 1)[None, None, :] * t[None, :, None]
+    return np.concatenate((np.sin(phase), np.cos(phase)), axis=2)
+
+
+def default_subbands(frequencies, harmonics: int, sampling_rate: float, n_subbands: int = 3) -> list:
+    """FBCCA sub-bands: lower edges stepping by the lowest stimulus frequency, one upper edge above the top harmonic."""
+    lowest, highest = min(frequencies), max(frequencies)
+    high = min((harmonics + 1) * highest, 0.45 * sampling_rate)
+    return [(max(0.5, float(k * lowest) - 1.0), float(high)) for k in range(1, n_subbands + 1)]
+
+
+class SsvepDecision:
+    """
+    One classifier update. scores: (references,) weighted squared canonical correlations,
+    correlations: (subbands, references) largest canonical correlation per sub-band, where the
+    references are the stimulus frequencies followed by the classifier's rest_frequencies.
+    confidence is the margin of the best stimulus score over the runner-up (with a single stimulus,
+    the best rest reference), relative to the best; 0 when a rest reference scores higher.
+    """
+    __slots__ = ('frequency', 'index', 'confidence', 'scores', 'correlations', 'sample_index')
+
+    def __init__(self, frequency, index, confidence, scores, correlations, sample_index):
+        self.frequency = frequency        # None when confidence is below the classifier's min_confidence
+                                          # or, with a single stimulus, a rest reference wins
+        self.index = index
+        self.confidence = confidence
+        self.scores = scores
+        self.correlations = correlations
+        self.sample_index = sample_index  # samples pushed when the window closed
+
+
+class SsvepClassifier:
+    """
+    Streaming SSVEP decoder: every step_seconds, the last window_seconds of all channels are
+    scored against sin/cos references of each stimulus frequency and its harmonics by canonical
+    correlation analysis. With a filter bank (FBCCA) the window is band-passed into sub-bands
+    first and the squared correlations are combined with weights k^-1.25 + 0.25.
+    The references are orthonormalised once (QR), so each update is one QR of the window per
+    sub-band and one batched singular value computation over every frequency.
+    With two or more frequencies a decision picks one of them. A single frequency (one stimulus
+    against rest) is detected instead: it is scored against rest references at REST_RATIOS of it,
+    and a decision names it only when it beats them; otherwise its frequency is None. With no
+    frequencies the classifier only buffers and push() returns no decisions.
+    """
+
+    def __init__(self, frequencies, sampling_rate=BB_sampling_rate, window_seconds=2.0, step_seconds=0.25,
+                 harmonics=3, subbands=None, filter_bank=True, min_confidence=0.0, channels=len(BB_channels)):
+        self.sampling_rate = sampling_rate
+        self.window = int(round(window_seconds * sampling_rate))
+        self.step = max(int(round(step_seconds * sampling_rate)), 1)
+        self.harmonics = harmonics
+        self.filter_bank = filter_bank
+        self.min_confidence = min_confidence
+        self.channels = channels
+        self.count = 0
+        self.__ring = np.zeros((2 * self.window, channels), dtype=np.float64)
+        self.set_frequencies(frequencies, subbands)
+
+    def set_frequencies(self, frequencies, subbands=None):
+        """Stimulus frequencies in Hz (0 and duplicates ignored); sub-bands default to default_subbands()."""
+        self.frequencies = np.array(sorted({float(f) for f in frequencies if f > 0}), dtype=np.float64)
+        self.rest_frequencies = self.frequencies * REST_RATIOS if self.frequencies.size == 1 else np.empty(0)
+        if not self.can_decide:
+            self.subbands, self.__sos, self.__weights, self.__references = [], [], np.ones(0), None
+            return
+        reference_frequencies = np.concatenate((self.frequencies, self.rest_frequencies))
+        if not self.filter_bank:
+            self.subbands = [None]
+        else:
+            self.subbands = list(subbands) if subbands else \
+                default_subbands(reference_frequencies, self.harmonics, self.sampling_rate)
+        # Own copies of the cached designs: sosfiltfilt wants writable coefficients
+        self.__sos = [None if band is None else np.array(bandpass_sos(band[0], band[1], self.sampling_rate))
+                      for band in self.subbands]
+        k = np.arange(1, len(self.subbands) + 1)
+        self.__weights = k ** -1.25 + 0.25
+        references = reference_signals(reference_frequencies, self.harmonics, self.sampling_rate, self.window)
+        references -= references.mean(axis=1, keepdims=True)
+        # (frequencies, window, 2 * harmonics) orthonormal bases of the reference spaces
+        self.__references = np.linalg.qr(references)[0]
+
+    @property
+    def can_decide(self) -> bool:
+        """True with a stimulus frequency to decide on."""
+        return self.frequencies.size > 0
+
+    def clear(self):
+        self.__ring[:] = 0.0
+        self.count = 0
+
+    def push(self, values: np.ndarray, compute=True) -> list:
+        """
+        values: (n_samples, channels). Returns an SsvepDecision per step the samples completed;
+        with compute False the samples only fill the window and the steps they complete are skipped.
+        """
+        decisions = []
+        start = 0
+        n = values.shape[0]
+        while start < n:
+            take = min(n - start, self.step - self.count % self.step, self.window)
+            self.__write(values[start:start + take])
+            start += take
+            if compute and self.count % self.step == 0 and self.count >= self.window and \
+                    self.__references is not None:
+                head = self.count % self.window
+                decisions.append(self.classify(self.__ring[head:head + self.window]))
+        return decisions
+
+    def classify(self, window: np.ndarray) -> SsvepDecision:
+        """window: (window samples, channels), oldest first."""
+        correlations = np.empty((len(self.subbands), self.__references.shape[0]))
+        for i, sos in enumerate(self.__sos):
+            x = window if sos is None else sosfiltfilt(sos, window, axis=0)
+            x = x - x.mean(axis=0)
+            q = np.linalg.qr(x)[0]
+            # Canonical correlations are the singular values of Qx^T Qy
+            correlations[i] = np.linalg.svd(q.T @ self.__references, compute_uv=False)[:, 0]
+        scores = self.__weights @ np.square(correlations)
+        if self.rest_frequencies.size:
+            best, runner_up = 0, scores[1:].max()
+        else:
+            order = np.argsort(scores)[::-1]
+            best, runner_up = int(order[0]), scores[order[1]]
+        confidence = max(float((scores[best] - runner_up) / scores[best]), 0.0) if scores[best] > 0 else 0.0
+        detected = scores[best] > runner_up if self.rest_frequencies.size else True
+        frequency = float(self.frequencies[best]) if detected and confidence >= self.min_confidence else None
+        return SsvepDecision(frequency, best, confidence, scores, correlations, self.count)
+
+    def __write(self, values):
+        w = self.window
+        head = self.count % w
+        first = min(len(values), w - head)
+        for offset, part in ((head, values[:first]), (0, values[first:])):
+            if len(part):
+                self.__ring[offset:offset + len(part)] = part
+                self.__ring[offset + w:offset + w + len(part)] = part
+        self.count += len(values)
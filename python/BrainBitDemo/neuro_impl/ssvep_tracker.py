@@ -0,0 +1,108 @@
+import cmath
+
+import numpy as np
+
+from neuro_impl.utils import BB_channels, BB_sampling_rate
+
+
+class SsvepTracker:
+    """
+    Hann-windowed amplitude of every channel at each stimulus frequency and its harmonics,
+    updated on every packet with a sliding DFT: each probe keeps the running sum of
+    x(m) * exp(-j w m) over the last window_seconds, so a sample costs one add and one
+    subtract per probe whatever the window length. The Hann window is applied in the
+    frequency domain from the probes one bin either side, so no window is ever multiplied out.
+    The sums are recomputed from the ring every resync_seconds to drop rounding drift.
+    """
+
+    def __init__(self, frequencies=(), harmonics=3, sampling_rate=BB_sampling_rate, window_seconds=4.0,
+                 channels=len(BB_channels), resync_seconds=60.0):
+        self.sampling_rate = sampling_rate
+        self.window = int(round(window_seconds * sampling_rate))
+        self.harmonics = harmonics
+        self.channels = channels
+        self.resync = max(int(resync_seconds * sampling_rate), self.window)
+        self.count = 0
+        self.__ring = np.zeros((self.window, channels), dtype=np.float64)
+        self.__since_resync = 0
+        self.set_frequencies(frequencies)
+
+    @property
+    def ready(self) -> bool:
+        """True once a full window has been seen."""
+        return self.count >= self.window
+
+    def set_frequencies(self, frequencies):
+        """Stimulus frequencies in Hz; 0 and duplicates are ignored. Keeps the signal history."""
+        self.frequencies = np.array(sorted({float(f) for f in frequencies if f > 0}), dtype=np.float64)
+        # (frequencies, harmonics); probes at or above Nyquist stay NaN
+        self.targets = self.frequencies[:, None] * np.arange(1, self.harmonics + 1)
+        valid = self.targets < self.sampling_rate / 2
+        self.__valid = valid
+        bin_width = 2 * np.pi / self.window
+        centre = 2 * np.pi * self.targets[valid] / self.sampling_rate
+        # Probe angles: each target, then the bins below and above it for the Hann window
+        self.__omega = np.concatenate((centre, centre - bin_width, centre + bin_width))
+        # e^{-jwk} for k <= window: the phasors of a packet are this table scaled by the packet's first phasor
+        self.__steps = np.exp(-1j * np.outer(np.arange(self.window + 1), self.__omega))
+        self.__leaving = np.exp(1j * self.__omega * self.window)
+        self.__resync()
+
+    def clear(self):
+        self.__ring[:] = 0.0
+        self.count = 0
+        self.__resync()
+
+    def push(self, values: np.ndarray, compute=True):
+        """values: (n_samples, channels). Returns amplitude() after the samples, or None without compute."""
+        start = 0
+        while start < values.shape[0]:
+            # At most one window at a time, so no ring slot is written twice in a step
+            part = values[start:start + self.window]
+            self.__update(part)
+            start += part.shape[0]
+        if self.__since_resync >= self.resync:
+            self.__resync()
+        return self.amplitude() if compute else None
+
+    def amplitude(self) -> np.ndarray:
+        """(channels, frequencies, harmonics) single-sided amplitude in the units of the input."""
+        n = self.__omega.size // 3
+        centre, below, above = self.__sums[:, :n], self.__sums[:, n:2 * n], self.__sums[:, 2 * n:]
+        # Hann window w(k) = 0.5 - 0.5 cos(2 pi k / N), k counted from the oldest sample in the window
+        shift = cmath.exp(2j * cmath.pi * ((self.count - self.window) % self.window) / self.window)
+        windowed = 0.5 * centre - 0.25 * (below / shift + above * shift)
+        # The Hann window's coherent gain is 1/2
+        amplitude = np.abs(windowed) * (4.0 / self.window)
+        if amplitude.shape[1] == self.targets.size:
+            return amplitude.reshape((self.channels,) + self.targets.shape)
+        out = np.full((self.channels,) + self.targets.shape, np.nan)
+        out[:, self.__valid] = amplitude
+        return out
+
+    def power(self) -> np.ndarray:
+        return self.amplitude() ** 2
+
+    def scores(self) -> np.ndarray:
+        """(channels, frequencies) power summed over the harmonics, for picking the attended stimulus."""
+        return np.nansum(self.power(), axis=2)
+
+    def __update(self, values):
+        n = values.shape[0]
+        slots = np.arange(self.count, self.count + n) % self.window
+        outgoing = self.__ring[slots]
+        self.__ring[slots] = values
+        # Incoming x(m) e^{-jwm} minus the sample leaving the window, which entered with e^{-jw(m - N)}
+        phasors = self.__steps[:n] * self.__phasor
+        self.__sums += values.T @ phasors - outgoing.T @ (phasors * self.__leaving)
+        self.__phasor = self.__phasor * self.__steps[n]
+        self.count += n
+        self.__since_resync += n
+
+    def __resync(self):
+        first = self.count - self.window
+        index = np.arange(first, self.count)
+        samples = self.__ring[index % self.window]
+        self.__sums = samples.T @ np.exp(-1j * np.outer(index, self.__omega))
+        self.__phasor = np.exp(-1j * self.__omega * self.count)
+        self.__since_resync = 0
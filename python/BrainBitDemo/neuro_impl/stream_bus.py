@@ -0,0 +1,155 @@
+from enum import Enum
+from threading import Lock
+
+from neuro_impl.signal_batch import SignalBatch
+
+
+class StreamTopic(Enum):
+    Signal  = 'signal'   # SignalBatch, published on the controller's dispatch tick
+    Resist  = 'resist'   # BrainBitResistData, published on the dispatch tick
+    ResistBatch = 'resist_batch'  # SignalBatch of ohms with per-row timestamps, same tick as Resist
+    Battery = 'battery'  # int percent, published from the SDK thread
+    Sensors = 'sensors'  # list[SensorInfo], published from the scanner thread
+
+
+class Delivery(Enum):
+    Every    = 'every'     # every payload
+    Latest   = 'latest'    # only the newest payload of each publish_all()
+    Decimate = 'decimate'  # every n-th sample of signal batches, every n-th payload otherwise
+
+
+class Subscription:
+    """One subscriber's callback on a topic, with its delivery policy and counters."""
+
+    def __init__(self, bus: 'StreamBus', topic: StreamTopic, callback, delivery: Delivery, decimation: int):
+        self.bus = bus
+        self.topic = topic
+        self.callback = callback
+        self.delivery = delivery
+        self.decimation = decimation
+        self.delivered = 0  # payloads handed to the callback
+        self.skipped = 0    # payloads (or samples, for decimated signal) it did not get
+        self.errors = 0
+        self.__phase = 0    # decimation position carried across payloads
+
+    def unsubscribe(self):
+        self.bus.unsubscribe(self.topic, self.callback)
+
+    def deliver(self, payloads: list):
+        if self.delivery is Delivery.Latest:
+            self.skipped += len(payloads) - 1
+            self.__call(payloads[-1])
+        elif self.delivery is Delivery.Decimate:
+            for payload in payloads:
+                if isinstance(payload, SignalBatch):
+                    self.__deliver_decimated(payload)
+                else:
+                    if self.__phase == 0:
+                        self.__call(payload)
+                    else:
+                        self.skipped += 1
+                    self.__phase = (self.__phase + 1) % self.decimation
+        else:
+            for payload in payloads:
+                self.__call(payload)
+
+    def __deliver_decimated(self, batch: SignalBatch):
+        n = len(batch)
+        rows = slice(self.__phase, None, self.decimation)
+        self.__phase = (self.__phase - n) % self.decimation
+        # Strided views of the shared arrays: still zero-copy
+        view = SignalBatch(batch.samples[rows], batch.pack_nums[rows], batch.markers[rows],
+                           batch.timestamps[rows], batch.received_at)
+        self.skipped += n - len(view)
+        if len(view):
+            self.__call(view)
+
+    def __call(self, payload):
+        try:
+            self.callback(payload)
+            self.delivered += 1
+        except Exception as err:
+            # One failing subscriber must not starve the others
+            self.errors += 1
+            print(f"Error in {self.topic.value} subscriber {self.callback}: {err}")
+
+
+class StreamBus:
+    """
+    Fan-out of the controller's streams to any number of subscribers.
+    Every subscriber receives the same payload object; signal batches are read-only, so nothing
+    is copied per subscriber. Callbacks run on the publishing thread (see StreamTopic).
+    """
+
+    def __init__(self):
+        self.__lock = Lock()
+        self.__subscriptions = {topic: () for topic in StreamTopic}
+
+    def subscribe(self, topic: StreamTopic, callback, delivery=Delivery.Every, decimation=1) -> Subscription:
+        """Attach callback to topic. Subscribing the same callback twice returns the existing subscription."""
+        if delivery is Delivery.Decimate and decimation < 1:
+            raise ValueError("decimation must be at least 1")
+        with self.__lock:
+            for subscription in self.__subscriptions[topic]:
+                if subscription.callback == callback:
+                    return subscription
+            subscription = Subscription(self, topic, callback, delivery, decimation)
+            # Copy on write, so publishers iterate a snapshot without taking the lock
+            self.__subscriptions[topic] = self.__subscriptions[topic] + (subscription,)
+        return subscription
+
+    def unsubscribe(self, topic: StreamTopic, callback):
+        """Detach callback from topic; does nothing if it is not subscribed."""
+        with self.__lock:
+            self.__subscriptions[topic] = tuple(s for s in self.__subscriptions[topic] if s.callback != callback)
+
+    def subscriptions(self, topic: StreamTopic) -> tuple:
+        return self.__subscriptions[topic]
+
+    def has_subscribers(self, topic: StreamTopic) -> bool:
+        return bool(self.__subscriptions[topic])
+
+    def publish(self, topic: StreamTopic, payload):
+        self.publish_all(topic, [payload])
+
+    def publish_all(self, topic: StreamTopic, payloads: list):
+        """Publish several payloads that arrived together; Latest subscribers only get the last one."""
+        if not payloads:
+            return
+        for subscription in self.__subscriptions[topic]:
+            subscription.deliver(payloads)
+
+    def stats(self) -> dict:
+        return {topic.value: [{'callback': getattr(s.callback, '__qualname__', repr(s.callback)),
+                               'delivery': s.delivery.value,
+                               'delivered': s.delivered,
+                               'skipped': s.skipped,
+                               'errors': s.errors} for s in subs]
+                for topic, subs in self.__subscriptions.items()}
+
+
+class LegacySlot:
+    """
+    Single-callback attribute (controller.signalReceived = f) kept for older code, backed by the bus.
+    Assigning replaces only the callback this attribute set before; other subscribers are untouched.
+    """
+
+    def __init__(self, topic: StreamTopic):
+        self.topic = topic
+        self.name = None
+
+    def __set_name__(self, owner, name):
+        self.name = '_legacy_' + name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        return getattr(obj, self.name, None)
+
+    def __set__(self, obj, callback):
+        previous = getattr(obj, self.name, None)
+        if previous is not None:
+            obj.bus.unsubscribe(self.topic, previous)
+        if callback is not None:
+            obj.bus.subscribe(self.topic, callback)
+        setattr(obj, self.name, callback)
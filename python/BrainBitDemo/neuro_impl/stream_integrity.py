@@ -0,0 +1,183 @@
+from collections import deque
+
+import numpy as np
+
+from neuro_impl.signal_batch import SignalBatch
+from neuro_impl.utils import BB_sampling_rate
+
+# Marker value of rows the monitor inserted in place of lost samples
+GAP_MARKER = -1
+
+GAP_FILLS = ('none', 'zero', 'hold', 'interpolate')
+
+
+def gap_mask(batch: SignalBatch) -> np.ndarray:
+    """True for the rows of a batch that were synthesised to fill a gap."""
+    return batch.markers == GAP_MARKER
+
+
+class StreamIntegrityMonitor:
+    """
+    Checks the PackNum sequence of the signal stream before it reaches the ring buffer.
+    Counts lost and duplicated samples, drops duplicates and (unless fill='none') inserts
+    rows for lost samples so FFT windows never splice discontinuous data:
+      zero        - zeros
+      hold        - repeat the last received sample
+      interpolate - straight line between the samples on either side of the gap
+    Filled rows carry GAP_MARKER in markers. Gaps longer than max_fill_secs are counted
+    but left unfilled, as is a counter that jumps backwards by more than restart_window
+    samples, which is treated as a device restart.
+    """
+
+    def __init__(self, fill='interpolate', sampling_rate=BB_sampling_rate, max_fill_secs=1.0,
+                 restart_window=None, rate_window_secs=10.0):
+        if fill not in GAP_FILLS:
+            raise ValueError(f"fill must be one of {GAP_FILLS}, not {fill!r}")
+        self.fill = fill
+        self.sampling_rate = sampling_rate
+        self.max_fill = int(max_fill_secs * sampling_rate)
+        self.restart_window = restart_window if restart_window is not None else sampling_rate
+        self.rate_window_secs = rate_window_secs
+
+        self.received_samples = 0
+        self.lost_samples = 0
+        self.duplicate_samples = 0
+        self.filled_samples = 0
+        self.gaps = 0
+        self.restarts = 0
+        self.__losses = deque()  # (timestamp, lost samples) of recent gaps
+        self.reset()
+
+    def reset(self):
+        """Forget the sequence position, e.g. before a new StartSignal."""
+        self.__last_pack = None
+        self.__last_row = None
+        self.__last_timestamp = 0.0
+
+    def process(self, batch: SignalBatch) -> SignalBatch:
+        n = len(batch)
+        if n == 0:
+            return batch
+        packs = batch.pack_nums
+        if self.__last_pack is not None:
+            # A counter far below what we have seen means the device started over
+            restart = np.flatnonzero(packs < self.__last_pack - self.restart_window)
+            if restart.size:
+                i = int(restart[0])
+                head = self.process(self.__slice(batch, slice(0, i))) if i else None
+                self.restarts += 1
+                self.reset()
+                tail = self.process(self.__slice(batch, slice(i, n)))
+                return tail if head is None else self.__concat(head, tail)
+        self.received_samples += n
+
+        # Drop rows at or below the highest pack number already seen
+        previous = np.maximum.accumulate(np.concatenate(([self.__last_pack if self.__last_pack is not None
+                                                          else packs[0] - 1], packs)))[:-1]
+        keep = packs > previous
+        if not keep.all():
+            self.duplicate_samples += int(n - keep.sum())
+            batch = self.__slice(batch, keep)
+            if len(batch) == 0:
+                return batch
+            packs = batch.pack_nums
+
+        missing = np.diff(packs, prepend=self.__last_pack if self.__last_pack is not None else packs[0]) - 1
+        missing[0] = max(int(missing[0]), 0)
+        lost = int(missing.sum())
+        if lost:
+            self.lost_samples += lost
+            self.gaps += int(np.count_nonzero(missing))
+            self.__losses.append((float(batch.timestamps[0]), lost))
+            if self.fill != 'none':
+                batch = self.__fill(batch, missing)
+
+        self.__last_pack = int(packs[-1])
+        self.__last_row = batch.samples[-1].copy()
+        self.__last_timestamp = float(batch.timestamps[-1])
+        return batch
+
+    def loss_rate(self, now=None) -> float:
+        """Lost samples per second over the last rate_window_secs."""
+        if now is None:
+            now = self.__last_timestamp
+        while self.__losses and self.__losses[0][0] < now - self.rate_window_secs:
+            self.__losses.popleft()
+        return sum(lost for _, lost in self.__losses) / self.rate_window_secs
+
+    def stats(self) -> dict:
+        return {
+            'received': self.received_samples,
+            'lost': self.lost_samples,
+            'duplicates': self.duplicate_samples,
+            'filled': self.filled_samples,
+            'gaps': self.gaps,
+            'restarts': self.restarts,
+            'lost_per_sec': self.loss_rate(),
+        }
+
+    def __fill(self, batch: SignalBatch, missing: np.ndarray) -> SignalBatch:
+        fillable = np.where(missing <= self.max_fill, missing, 0)
+        total = int(fillable.sum())
+        if total == 0:
+            return batch
+        # A gap before row 0 is filled from the last row of the previous batch
+        known_packs = batch.pack_nums
+        known_rows = batch.samples
+        known_times = batch.timestamps
+        if self.__last_row is not None:
+            known_packs = np.concatenate(([self.__last_pack], known_packs))
+            known_rows = np.vstack((self.__last_row, known_rows))
+            known_times = np.concatenate(([self.__last_timestamp], known_times))
+
+        n = len(batch)
+        positions = np.arange(n) + np.cumsum(fillable)
+        out_len = n + total
+        filled = np.ones(out_len, dtype=bool)
+        filled[positions] = False
+        # Pack numbers of the inserted rows: the run just before each row that follows a gap
+        ends = batch.pack_nums[fillable > 0]
+        lengths = fillable[fillable > 0]
+        fill_packs = np.repeat(ends - lengths, lengths) + _ramp(lengths)
+
+        samples = np.empty((out_len, batch.samples.shape[1]), dtype=np.float64)
+        samples[positions] = batch.samples
+        match self.fill:
+            case 'zero':
+                samples[filled] = 0.0
+            case 'hold':
+                samples[filled] = known_rows[np.searchsorted(known_packs, fill_packs) - 1]
+            case 'interpolate':
+                for ch in range(samples.shape[1]):
+                    samples[filled, ch] = np.interp(fill_packs, known_packs, known_rows[:, ch])
+
+        pack_nums = np.empty(out_len, dtype=np.int64)
+        pack_nums[positions] = batch.pack_nums
+        pack_nums[filled] = fill_packs
+        markers = np.empty(out_len, dtype=np.int32)
+        markers[positions] = batch.markers
+        markers[filled] = GAP_MARKER
+        timestamps = np.empty(out_len, dtype=np.float64)
+        timestamps[positions] = batch.timestamps
+        timestamps[filled] = np.interp(fill_packs, known_packs, known_times)
+        self.filled_samples += total
+        return SignalBatch(samples, pack_nums, markers, timestamps, batch.received_at)
+
+    @staticmethod
+    def __slice(batch: SignalBatch, index) -> SignalBatch:
+        return SignalBatch(batch.samples[index], batch.pack_nums[index], batch.markers[index],
+                           batch.timestamps[index], batch.received_at)
+
+    @staticmethod
+    def __concat(first: SignalBatch, second: SignalBatch) -> SignalBatch:
+        return SignalBatch(np.vstack((first.samples, second.samples)),
+                           np.concatenate((first.pack_nums, second.pack_nums)),
+                           np.concatenate((first.markers, second.markers)),
+                           np.concatenate((first.timestamps, second.timestamps)),
+                           second.received_at)
+
+
+def _ramp(lengths: np.ndarray) -> np.ndarray:
+    """0..k-1 for each k in lengths, concatenated."""
+    starts = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return np.arange(int(lengths.sum())) - starts
@@ -0,0 +1,86 @@
+import numpy as np
+
+from neuro_impl.artifact_gate import ArtifactGate
+from neuro_impl.signal_batch import SignalBatch
+from neuro_impl.utils import BB_sampling_rate
+
+
+def _eeg(seconds, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.normal(0.0, 10e-6, (int(seconds * BB_sampling_rate), 4))
+
+
+def _packets(signal, size=10):
+    for start in range(0, signal.shape[0], size):
+        yield start, signal[start:start + size]
+
+
+def test_flagged_packets_are_held_at_last_clean_sample():
+    gate = ArtifactGate()
+    signal = _eeg(2.0)
+    signal[260:270, 2] += 1e-3  # electrode pop on one channel for one packet
+    held = []
+    last_clean = None
+    for start, packet in _packets(signal):
+        out = gate.process(packet)
+        assert out.shape == packet.shape
+        if gate.holding:
+            held.append(start)
+            np.testing.assert_array_equal(out, np.repeat(last_clean[None, :], len(packet), axis=0))
+        else:
+            assert out is packet
+            last_clean = packet[-1]
+    assert held and held[0] == 260
+    assert gate.stats()['skipped_samples'] == 10 * len(held)
+
+
+def test_without_skip_the_gate_only_counts():
+    gate = ArtifactGate(skip=False)
+    packet = _eeg(0.04)
+    gate.process(packet)
+    packet = packet + 1e-3 * np.arange(10)[:, None]
+    assert gate.process(packet) is packet
+    assert gate.flagged and not gate.holding
+    assert gate.stats()['skipped_packets'] == 0
+
+
+def test_copy_has_same_settings_and_fresh_state():
+    gate = ArtifactGate(amplitude=1e-6)
+    gate.process(_eeg(0.04))
+    copy = gate.copy()
+    assert copy.stats()['packets'] == 0
+    copy.process(_eeg(0.04, seed=1))
+    copy.process(_eeg(0.04, seed=2))
+    assert copy.flagged
+    assert gate.stats()['packets'] == 1
+
+
+def test_spectrum_controllers_keep_their_own_gate_and_timing(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    from neuro_impl.spectrum_controller import SpectrumController
+    shared = ArtifactGate()
+    first, second = SpectrumController(gate=shared), SpectrumController(gate=shared)
+    assert first.gate is not shared and first.gate is not second.gate
+    flags = []
+    first.processedArtifact = flags.append
+
+    signal = _eeg(6.0)
+    signal[1000:1250] += 1e-3 * np.sin(np.linspace(0, np.pi, 250))[:, None]
+    published = []
+    first.processedFrame = published.append
+    filtered = []
+    process = first.signal_filter.process
+    first.signal_filter.process = lambda values: filtered.append(len(values)) or process(values)
+    for start, packet in _packets(signal):
+        n = packet.shape[0]
+        published.clear()
+        first.process_data(SignalBatch(packet.copy(), np.arange(start, start + n), np.zeros(n, dtype=np.int32),
+                                       np.zeros(n), 0.0))
+        # Nothing is computed or published for a held packet
+        assert not (first.gate.holding and published)
+    # Held blocks skip the filter; the zeros in their place keep the engine on the stream's sample count
+    assert sum(filtered) == signal.shape[0] - first.gate.stats()['skipped_samples']
+    assert first.engine.count == signal.shape[0]
+    assert any(flags) and not all(flags)
+    assert first.gate.stats()['packets'] == len(flags)
+    assert second.gate.stats()['packets'] == 0 and shared.stats()['packets'] == 0
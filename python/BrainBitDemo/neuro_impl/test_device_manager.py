@@ -0,0 +1,40 @@
+from time import monotonic
+
+import pytest
+
+pytest.importorskip('neurosdk')
+
+from PyQt6.QtCore import QCoreApplication
+
+from neuro_impl.device_manager import DeviceManager
+from neuro_impl.simulated_sensor import SimulatedScanner
+
+
+def _process_events_until(app, condition, timeout):
+    deadline = monotonic() + timeout
+    while not condition() and monotonic() < deadline:
+        app.processEvents()
+    return condition()
+
+
+def test_disconnect_returns_at_once_and_reaps_on_the_poll_timer(monkeypatch):
+    # Read by default_scanner_factory in the spawned worker
+    monkeypatch.setenv('BRAINBIT_SIMULATOR', 'synthetic')
+    monkeypatch.setenv('BRAINBIT_SIMULATOR_SPEED', '0')
+    app = QCoreApplication.instance() or QCoreApplication([])
+    manager = DeviceManager(stats_interval=0.2)
+    results, disconnected = [], []
+    manager.resultReceived.connect(lambda address, output: results.append(address))
+    manager.deviceDisconnected.connect(disconnected.append)
+
+    sensor_info = SimulatedScanner().sensors()[0]
+    manager.connect_device(sensor_info)
+    manager.start_signal()
+    assert _process_events_until(app, lambda: results, timeout=30.0)
+
+    started = monotonic()
+    manager.disconnect_device()
+    assert monotonic() - started < 0.5
+    assert manager.addresses() == []
+    assert _process_events_until(app, lambda: disconnected, timeout=10.0)
+    assert disconnected == [sensor_info.Address]
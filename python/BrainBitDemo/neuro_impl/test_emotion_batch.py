@@ -0,0 +1,154 @@
+import ctypes
+
+import numpy as np
+import pytest
+
+pytest.importorskip('em_st_artifacts.utils.support_classes')
+
+from neuro_impl import emotion_batch
+from neuro_impl.emotion_batch import BipolarPusher, MonopolarPusher
+from neuro_impl.signal_batch import SignalBatch
+
+try:
+    from em_st_artifacts.emotional_math import EmotionalMath
+except OSError:
+    # The wrapper loads its native library on import; not shipped for every platform
+    EmotionalMath = None
+
+needs_native = pytest.mark.skipif(EmotionalMath is None, reason='em_st_artifacts native library not available')
+
+
+class _RecordingMath:
+    """
+    The wrapper's private surface (structs copied from pyem-st-artifacts 1.0.3) over ctypes
+    callbacks instead of the native library, so the argument conversion ctypes does for
+    MathLibPushData and MathLibPushDataArr is the real one. typed=True declares the data argument
+    the way newer wrappers do, as a POINTER to the struct; otherwise c_void_p as in 1.0.3.
+    """
+
+    class _NativeOpStatus(ctypes.Structure):
+        _fields_ = [('Success', ctypes.c_uint8), ('Error', ctypes.c_uint32), ('ErrorMsg', ctypes.c_char * 512)]
+
+    class _NativeRawChannels(ctypes.Structure):
+        _fields_ = [('left_bipolar', ctypes.c_double), ('right_bipolar', ctypes.c_double)]
+
+    class _NativeRawChannelsArray(ctypes.Structure):
+        _fields_ = [('channels', ctypes.POINTER(ctypes.c_double))]
+
+    def __init__(self, typed: bool):
+        self._native_ptr = None
+        self.pushed = []
+        self._push_data = self.__prototype(self._NativeRawChannels, typed)(self.__push_data)
+        self._push_data_arr = self.__prototype(self._NativeRawChannelsArray, typed)(self.__push_data_arr)
+
+    def __prototype(self, struct, typed):
+        return ctypes.CFUNCTYPE(ctypes.c_uint8, ctypes.c_void_p, ctypes.POINTER(struct) if typed else ctypes.c_void_p,
+                                ctypes.c_size_t, ctypes.POINTER(self._NativeOpStatus))
+
+    def __push_data(self, _, data, n, status):
+        rows = ctypes.cast(data, ctypes.POINTER(self._NativeRawChannels))
+        self.pushed.extend((rows[i].left_bipolar, rows[i].right_bipolar) for i in range(n))
+        status[0].Success = 1
+        return 1
+
+    def __push_data_arr(self, _, data, n, status):
+        structs = ctypes.cast(data, ctypes.POINTER(self._NativeRawChannelsArray))
+        self.pushed.extend(structs[i].channels[0] for i in range(n))
+        status[0].Success = 1
+        return 1
+
+    @staticmethod
+    def _check_error(status):
+        assert status.Success
+
+
+@pytest.fixture(autouse=True)
+def checked_wrapper(monkeypatch):
+    # The stand-in mirrors a checked release whatever pyem-st-artifacts is installed
+    monkeypatch.setattr(emotion_batch, 'WRAPPER_VERSION', emotion_batch.CHECKED_VERSIONS[0])
+
+
+def _bipolar_rows(seconds=20.0, sampling_rate=250, seed=3):
+    t = np.arange(int(seconds * sampling_rate)) / sampling_rate
+    noise = np.random.default_rng(seed).normal(0.0, 5e-6, (t.size, 2))
+    return 20e-6 * np.sin(2 * np.pi * 10.0 * t)[:, None] + noise
+
+
+@pytest.mark.parametrize('typed', [False, True])
+def test_bipolar_pusher_passes_rows_through_wrapper_argtypes(typed):
+    math = _RecordingMath(typed)
+    pusher = BipolarPusher(math)
+    assert pusher.native
+    rows = _bipolar_rows(0.2)
+    # A strided view, as a montage column slice would be
+    pusher.push(np.asfortranarray(rows))
+    assert math.pushed == [tuple(row) for row in rows.tolist()]
+
+
+@pytest.mark.parametrize('typed', [False, True])
+def test_monopolar_pusher_passes_column_through_wrapper_argtypes(typed):
+    math = _RecordingMath(typed)
+    pusher = MonopolarPusher(math, capacity=4)
+    assert pusher.native
+    rows = _bipolar_rows(0.2)
+    # Strided column views; the second push outgrows the preallocated structs
+    pusher.push(rows[:3, 0])
+    pusher.push(rows[3:, 1])
+    assert math.pushed == rows[:3, 0].tolist() + rows[3:, 1].tolist()
+
+
+def test_pushers_fall_back_on_unchecked_wrapper(monkeypatch):
+    monkeypatch.setattr(emotion_batch, 'WRAPPER_VERSION', '0.0.0')
+    assert not MonopolarPusher(_RecordingMath(True)).native
+    assert not BipolarPusher(_RecordingMath(True)).native
+
+
+def _run_bipolar(native_push: bool, rows: np.ndarray) -> list:
+    from neuro_impl.emotions_bipolar_controller import EmotionBipolar
+    emotions = EmotionBipolar(native_push=native_push)
+    events = []
+    emotions.isArtifactedSequenceCallback = lambda value: events.append(('sequence', value))
+    emotions.isBothSidesArtifactedCallback = lambda value: events.append(('both', value))
+    emotions.progressCalibrationCallback = lambda value: events.append(('progress', value))
+    emotions.lastSpectralDataCallback = lambda value: events.append(('spectral', value))
+    emotions.rawSpectralDataCallback = lambda value: events.append(('raw', value))
+    emotions.lastMindDataCallback = lambda value: events.append(('mind', value))
+    emotions.start_calibration()
+    for start in range(0, rows.shape[0], 10):
+        part = rows[start:start + 10]
+        n = part.shape[0]
+        emotions.process_bipolar(SignalBatch(part, np.arange(start, start + n), np.zeros(n, dtype=np.int32),
+                                             np.zeros(n), 0.0))
+    return events
+
+
+@needs_native
+def test_bipolar_pusher_matches_public_push_data():
+    rows = _bipolar_rows()
+    native = _run_bipolar(True, rows)
+    assert native
+    assert native == _run_bipolar(False, rows)
+
+
+def _run_monopolar(native_push: bool, samples: np.ndarray) -> list:
+    from neuro_impl.emotions_monopolar_controller import EmotionMonopolar
+    emotions = EmotionMonopolar(native_push=native_push)
+    updates = []
+    emotions.updateCallback = lambda update: updates.append(
+        [(r.channel, r.artifacted_sequence, r.both_sides_artifacted, r.calibrated, r.calibration_progress,
+          r.spectral, r.raw_spectral, r.mind) for r in update.channels])
+    emotions.start_calibration()
+    for start in range(0, samples.shape[0], 10):
+        part = samples[start:start + 10]
+        n = part.shape[0]
+        emotions.process_data(SignalBatch(part, np.arange(start, start + n), np.zeros(n, dtype=np.int32),
+                                          np.zeros(n), 0.0))
+    return updates
+
+
+@needs_native
+def test_monopolar_pusher_matches_public_push_data_arr():
+    samples = np.hstack((_bipolar_rows(seed=4), _bipolar_rows(seed=5)))
+    native = _run_monopolar(True, samples)
+    assert native
+    assert native == _run_monopolar(False, samples)
@@ -0,0 +1,38 @@
+import os
+import sys
+
+import numpy as np
+from scipy.signal import butter, filtfilt
+
+from neuro_impl.filter_bank import StreamingFilter, bandpass_sos, causal_filter, eeg_sos
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'wfdb_data'))
+from emg_processor import EMGProcessor  # noqa: E402
+
+
+def _eeg(n=2500, channels=4, seed=0):
+    rng = np.random.default_rng(seed)
+    return 20.0 + rng.normal(0.0, 1.0, (n, channels)).cumsum(axis=0) * 0.01 + rng.normal(0.0, 0.05, (n, channels))
+
+
+def test_streaming_filter_matches_causal_filter_across_packets():
+    signal = _eeg()
+    stream = StreamingFilter(eeg_sos(250))
+    packets = [stream.process(signal[i:i + 7]) for i in range(0, signal.shape[0], 7)]
+    np.testing.assert_allclose(np.vstack(packets), causal_filter(signal, eeg_sos(250)), rtol=0, atol=1e-12)
+
+
+def test_emg_processor_filters_along_the_last_axis_like_filtfilt():
+    # (channels, samples), the layout the filtfilt version filtered along its default axis
+    signal = _eeg().T
+    b, a = butter(4, [20 / 125, 100 / 125], btype='band')
+    filtered = EMGProcessor(250, 20, 100).bandpass_filter(signal)
+    assert filtered.shape == signal.shape
+    np.testing.assert_allclose(filtered[:, 200:-200], filtfilt(b, a, signal)[:, 200:-200], atol=1e-6)
+
+
+def test_causal_emg_processor_matches_the_live_filter():
+    signal = _eeg()[:, 0]
+    offline = EMGProcessor(250, 1.0, 40.0, causal=True).bandpass_filter(signal)
+    live = causal_filter(signal[:, None], bandpass_sos(1.0, 40.0, 250))[:, 0]
+    np.testing.assert_allclose(offline, live, rtol=0, atol=1e-12)
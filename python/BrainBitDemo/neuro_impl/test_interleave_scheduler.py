@@ -0,0 +1,52 @@
+from concurrent.futures import Future
+from threading import Event
+
+import json
+
+import pytest
+
+pytest.importorskip('neurosdk')
+
+from neuro_impl.interleave_scheduler import InterleavedScheduler, InterleaveSegment
+
+
+def _done(command) -> Future:
+    future = Future()
+    future.set_result(None)
+    return future
+
+
+def test_finished_callback_fires_after_the_final_switch():
+    commands = []
+    finished = Event()
+
+    def execute(command):
+        commands.append(command.name)
+        return _done(command)
+
+    scheduler = InterleavedScheduler(execute, burst_secs=0.05, interval_secs=0.05, finished_callback=finished.set)
+    scheduler.start()
+    assert not finished.wait(0.2)
+    scheduler.stop()
+    assert finished.wait(1.0)
+    assert scheduler.stopped_at is not None
+    assert commands[-1] in ('StopSignal', 'StopResist')
+
+
+def test_segment_map_is_relative_to_the_time_origin(tmp_path):
+    scheduler = InterleavedScheduler(_done, burst_secs=0.2, interval_secs=1.0)
+    scheduler.started_at, scheduler.stopped_at = 1000.0, 1003.0
+    scheduler.segments = [InterleaveSegment('signal', 1000.5, 1001.5), InterleaveSegment('resist', 1001.6, 1001.8),
+                          InterleaveSegment('signal', 1002.0, 1002.5)]
+
+    path = tmp_path / 'interleave_segments.json'
+    scheduler.save_segment_map(str(path), time_origin=999.0)
+    saved = json.loads(path.read_text())
+
+    assert saved['time_origin'] == 999.0
+    assert (saved['started_at'], saved['stopped_at']) == (1.0, 4.0)
+    assert [seg['kind'] for seg in saved['segments']] == ['signal', 'resist', 'signal']
+    assert [t for seg in saved['segments'] for t in (seg['start'], seg['end'])] == \
+        pytest.approx([1.5, 2.5, 2.6, 2.8, 3.0, 3.5])
+    assert saved['gaps'] == [{'start': 1.0, 'end': 1.5}, {'start': 2.5, 'end': 3.0}, {'start': 3.5, 'end': 4.0}]
+    assert saved['eeg_seconds'] == 1.5
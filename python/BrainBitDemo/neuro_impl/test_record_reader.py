@@ -0,0 +1,122 @@
+import numpy as np
+import pytest
+import wfdb
+
+from neuro_impl.record_reader import ChunkCache, RecordReader
+from neuro_impl.wfdb_stream_writer import WfdbStreamWriter
+
+FS = 250
+
+
+def _write(write_dir, signal, fmt='32', time_column=None, sig_name=('O1', 'O2')):
+    gain = {'16': 1e3, '24': 1e5, '32': 1e6}[fmt]
+    units = ['mV'] * len(sig_name)
+    writer = WfdbStreamWriter(str(write_dir), 'rec', FS, sig_name, units, [gain] * len(sig_name), fmt=fmt,
+                              chunk_samples=300, time_column=time_column)
+    writer.append(signal)
+    writer.close()
+    return str(write_dir / 'rec')
+
+
+def _signal(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.normal(0.0, 5.0, (n, 2))
+
+
+@pytest.mark.parametrize('fmt', ['16', '24', '32'])
+def test_read_matches_wfdb(tmp_path, fmt):
+    signal = _signal(1000)
+    signal[[0, 333, 999], 0] = np.nan
+    signal[500, 1] = np.nan
+    path = _write(tmp_path, signal, fmt)
+
+    reader = RecordReader(path, chunk_samples=128, cache=ChunkCache())
+    expected = wfdb.rdrecord(path).p_signal
+
+    assert reader.fmt == fmt
+    np.testing.assert_array_equal(reader.read(), expected)
+    # Invalid samples are NaN and nothing else is
+    assert np.isnan(reader.read()).sum() == 4
+    assert np.isnan(reader.read_samples(333, 334)).tolist() == [[True, False]]
+    np.testing.assert_array_equal(reader.read_samples(100, 700, ['O2']), expected[100:700, [1]])
+
+
+def test_read_by_time_uses_the_sidecar(tmp_path):
+    n = 1000
+    times = np.arange(n) / FS
+    times[500:] += 1.0  # a one-second gap in the recording
+    signal = np.column_stack([_signal(n), times])
+    path = _write(tmp_path, signal, time_column=2, sig_name=('O1', 'O2', 'Time'))
+
+    reader = RecordReader(path, chunk_samples=128, cache=ChunkCache())
+    inside = (times >= 1.5) & (times < 3.5)
+    data = reader.read(1.5, 3.5, ['O2', 'O1'])
+
+    assert data.shape == (inside.sum(), 2)
+    np.testing.assert_allclose(data, signal[inside][:, [1, 0]], atol=1e-6)
+    np.testing.assert_allclose(reader.times(1.5, 3.5), times[inside])
+    # Nothing was recorded during the gap
+    assert reader.read(2.1, 2.9).shape == (0, 3)
+
+
+def test_read_by_time_without_sidecar_uses_fs(tmp_path):
+    signal = _signal(1000)
+    reader = RecordReader(_write(tmp_path, signal), cache=ChunkCache())
+
+    data = reader.read(1.0, 2.0, ['O2'])
+
+    np.testing.assert_allclose(data, signal[250:500, [1]], atol=1e-6)
+    np.testing.assert_allclose(reader.times(1.0, 2.0), np.arange(250, 500) / FS)
+    assert reader.read(3.0).shape == (250, 2)
+    assert reader.duration == 4.0
+
+
+def test_epochs_past_the_end_are_nan(tmp_path):
+    signal = _signal(1000)
+    reader = RecordReader(_write(tmp_path, signal), chunk_samples=128, cache=ChunkCache())
+
+    epochs = reader.epochs([0.0, 3.5, 5.0], 1.0, ['O1'])
+
+    assert epochs.shape == (3, 250, 1)
+    np.testing.assert_allclose(epochs[0, :, 0], signal[:250, 0], atol=1e-6)
+    np.testing.assert_allclose(epochs[1, :125, 0], signal[875:, 0], atol=1e-6)
+    assert np.isnan(epochs[1, 125:]).all()
+    assert np.isnan(epochs[2]).all()
+
+
+def test_chunk_cache_evicts_least_recently_used():
+    chunk = np.zeros(100)  # 800 bytes
+    cache = ChunkCache(max_bytes=2 * chunk.nbytes)
+    decoded = []
+
+    def get(key):
+        return cache.get(key, lambda: decoded.append(key) or chunk.copy())
+
+    get('a')
+    get('b')
+    get('a')  # hit, so 'b' is now the oldest
+    get('c')  # evicts 'b'
+    get('a')
+    get('b')
+
+    assert decoded == ['a', 'b', 'c', 'b']
+    assert (cache.hits, cache.misses) == (2, 4)
+    assert cache.size == 2 * chunk.nbytes
+    assert not get('a').flags.writeable
+    # A chunk larger than the whole cache is decoded but not kept
+    cache.get('huge', lambda: np.zeros(1000))
+    assert cache.size == 2 * chunk.nbytes
+    cache.clear()
+    assert cache.size == 0
+
+
+def test_reader_shares_decoded_chunks(tmp_path):
+    cache = ChunkCache()
+    path = _write(tmp_path, _signal(1000))
+
+    RecordReader(path, chunk_samples=128, cache=cache).read(0.0, 1.0)
+    misses = cache.misses
+    RecordReader(path, chunk_samples=128, cache=cache).read(0.5, 1.0)
+
+    assert cache.misses == misses
+    assert cache.hits >= 2
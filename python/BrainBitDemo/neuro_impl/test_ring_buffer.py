@@ -0,0 +1,80 @@
+import numpy as np
+
+from neuro_impl.ring_buffer import RingBuffer
+
+
+def _rows(start, n):
+    # Every column of a row carries its index, so a row mixing two writes is easy to spot
+    return np.repeat(np.arange(start, start + n, dtype=np.float64)[:, None], 4, axis=1), np.arange(start, start + n)
+
+
+def _write(ring, start, n):
+    samples, pack_nums = _rows(start, n)
+    ring.write(samples, pack_nums, timestamps=pack_nums.astype(np.float64))
+
+
+def _consistent(batch):
+    return np.array_equal(batch.samples[:, 0], batch.pack_nums) and np.array_equal(batch.timestamps, batch.pack_nums)
+
+
+def test_reads_in_order_and_wraps():
+    ring = RingBuffer(8, 4)
+    reader = ring.reader()
+    _write(ring, 0, 5)
+    _write(ring, 5, 6)
+    batch = reader.read()
+    assert batch.pack_nums.tolist() == list(range(3, 11))
+    assert _consistent(batch)
+    assert (reader.overflows, reader.dropped_samples, reader.torn_reads) == (1, 3, 0)
+    assert reader.read() is None
+
+
+class _Interrupting(np.ndarray):
+    """A ring column that runs a callback the first time it is indexed or assigned to."""
+
+    def __getitem__(self, item):
+        self.__fire()
+        return np.asarray(self)[item]
+
+    def __setitem__(self, item, value):
+        self.__fire()
+        np.asarray(self)[item] = value
+
+    def __fire(self):
+        callback, self.callback = getattr(self, 'callback', None), None
+        if callback:
+            callback()
+
+
+def _interrupt(ring, name, callback):
+    column = getattr(ring, name).view(_Interrupting)
+    column.callback = callback
+    setattr(ring, name, column)
+
+
+def test_read_during_write_discards_the_rows_being_overwritten():
+    ring = RingBuffer(8, 4)
+    reader = ring.reader()
+    _write(ring, 0, 8)
+    batches = []
+    # The reader runs after the producer has copied the samples but before it published them
+    _interrupt(ring, 'pack_nums', lambda: batches.append(reader.read()))
+    _write(ring, 8, 3)
+    batch, = batches
+    assert batch.pack_nums.tolist() == list(range(3, 8))
+    assert _consistent(batch)
+    assert (reader.torn_reads, reader.dropped_samples) == (1, 3)
+    assert reader.read().pack_nums.tolist() == [8, 9, 10]
+
+
+def test_write_during_read_discards_the_overwritten_rows():
+    ring = RingBuffer(8, 4)
+    reader = ring.reader()
+    _write(ring, 0, 8)
+    # The producer laps the reader between its copy of the samples and of the markers
+    _interrupt(ring, 'markers', lambda: _write(ring, 8, 2))
+    batch = reader.read()
+    assert batch.pack_nums.tolist() == list(range(2, 8))
+    assert _consistent(batch)
+    assert (reader.torn_reads, reader.dropped_samples) == (1, 2)
+    assert reader.read().pack_nums.tolist() == [8, 9]
@@ -0,0 +1,43 @@
+import numpy as np
+
+from neuro_impl.sample_clock import SampleClock
+
+
+def _packs(first, n=10):
+    return np.arange(first, first + n, dtype=np.int64)
+
+
+def test_consecutive_packets_share_one_anchor():
+    clock = SampleClock(sampling_rate=250)
+    first = clock.stamp(_packs(0), 10.0)
+    second = clock.stamp(_packs(10), 10.04)
+    np.testing.assert_allclose(np.diff(np.concatenate((first, second))), 1 / 250)
+    assert clock.anchors == 1
+
+
+def test_duplicate_packet_does_not_reanchor():
+    clock = SampleClock(sampling_rate=250)
+    original = clock.stamp(_packs(0), 10.0)
+    clock.stamp(_packs(10), 10.04)
+    # The same packet again, arriving late
+    duplicate = clock.stamp(_packs(0), 10.3)
+    np.testing.assert_allclose(duplicate, original)
+    following = clock.stamp(_packs(20), 10.08)
+    np.testing.assert_allclose(following, original + 20 / 250)
+    assert clock.anchors == 1
+
+
+def test_restart_reanchors():
+    clock = SampleClock(sampling_rate=250)
+    clock.stamp(_packs(5000), 10.0)
+    restarted = clock.stamp(_packs(0), 12.0)
+    assert clock.anchors == 2
+    assert restarted[-1] == 12.0
+
+
+def test_pause_reanchors():
+    clock = SampleClock(sampling_rate=250, max_skew=0.5)
+    clock.stamp(_packs(0), 10.0)
+    resumed = clock.stamp(_packs(10), 20.0)
+    assert clock.anchors == 2
+    assert resumed[-1] == 20.0
@@ -0,0 +1,83 @@
+import os
+
+import numpy as np
+
+from neuro_impl.record_reader import ChunkCache, RecordReader
+from neuro_impl.session_buffer import SESSION_DIR, SessionBuffer, recover_sessions
+from neuro_impl.session_catalog import SessionCatalog
+from neuro_impl.session_container import SESSION_FILE, SessionContainerWriter, SessionReader, record_streams, \
+    stream_spec
+from neuro_impl.session_recorder import SIGNAL_RECORDS
+
+FS = 250
+
+
+def _rows(start, n, seed=0):
+    """Signal rows in the recorder's layout: O1, O2, T3, T4 (mV), Time, Frequency, Gap."""
+    rng = np.random.default_rng(seed)
+    rows = np.zeros((n, 7))
+    rows[:, :4] = np.round(rng.normal(0.0, 1e-2, (n, 4)), 6)
+    rows[:, 4] = np.arange(start, start + n) / FS
+    rows[:, 5] = 12.5
+    return rows
+
+
+def _crashed_journal(saved_data_dir, write_dir, committed, uncommitted=0):
+    journal = SessionBuffer(os.path.join(saved_data_dir, SESSION_DIR), 7, FS, SIGNAL_RECORDS, write_dir,
+                            initial_rows=100, commit_interval=3600.0)
+    rows = _rows(0, committed + uncommitted)
+    journal.append(rows[:committed])
+    journal.commit()
+    # Appended after the last commit: lost in the crash
+    journal.append(rows[committed:])
+    return rows[:committed]
+
+
+def test_recover_rebuilds_records_container_and_catalog(tmp_path):
+    saved, write_dir = str(tmp_path), str(tmp_path / 'data' / 'subject')
+    rows = _crashed_journal(saved, write_dir, committed=1000, uncommitted=50)
+
+    assert recover_sessions(saved) == [os.path.abspath(write_dir)]
+    # The journal grew past its initial size and is gone once recovered
+    assert os.listdir(os.path.join(saved, SESSION_DIR)) == []
+
+    cache = ChunkCache()
+    eeg = RecordReader(os.path.join(write_dir, 'eeg_recording'), cache=cache)
+    np.testing.assert_allclose(eeg.read(), rows[:, :5], atol=1e-6)
+    label = RecordReader(os.path.join(write_dir, 'eeg_recording_label'), cache=cache)
+    np.testing.assert_allclose(label.read(), rows[:, [5, 6, 4]], atol=1e-3)
+
+    with SessionReader(os.path.join(write_dir, SESSION_FILE), cache=cache) as reader:
+        assert reader.complete
+        np.testing.assert_array_equal(reader.read('eeg_recording'), rows[:, :5])
+
+    catalog = SessionCatalog(saved)
+    assert sorted(record['record_name'] for record in catalog.query()) == ['eeg_recording', 'eeg_recording_label']
+    assert catalog.query(record_name='eeg_recording')[0]['sample_count'] == 1000
+
+    # Nothing left for a second pass
+    assert recover_sessions(saved) == []
+
+
+def test_recover_keeps_side_streams_of_the_interrupted_container(tmp_path):
+    saved, write_dir = str(tmp_path), str(tmp_path / 'data' / 'subject')
+    rows = _crashed_journal(saved, write_dir, committed=3000)
+    # What the crash left of the container: the first chunk of the signal and a gaze stream
+    streams = record_streams(SIGNAL_RECORDS, FS) + [stream_spec('gaze', ['Time'], ['s'], kind='text')]
+    partial = SessionContainerWriter(os.path.join(write_dir, SESSION_FILE), streams)
+    partial.append('eeg_recording', rows[:2500, :5])
+    partial.append_text('gaze', [0.5, 8.0], ['fix 1', 'fix 2'])
+    partial.close()
+
+    recover_sessions(saved)
+    assert not os.path.exists(os.path.join(write_dir, SESSION_FILE + '.partial'))
+    with SessionReader(os.path.join(write_dir, SESSION_FILE), cache=ChunkCache()) as reader:
+        np.testing.assert_array_equal(reader.read('eeg_recording'), rows[:, :5])
+        assert reader.read_text('gaze') == [(0.5, 'fix 1'), (8.0, 'fix 2')]
+
+
+def test_nothing_to_recover(tmp_path):
+    assert recover_sessions(str(tmp_path)) == []
+    journal = SessionBuffer(str(tmp_path / SESSION_DIR), 7, FS, SIGNAL_RECORDS, str(tmp_path / 'data'))
+    journal.discard()
+    assert recover_sessions(str(tmp_path)) == []
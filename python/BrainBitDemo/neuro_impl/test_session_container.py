@@ -0,0 +1,79 @@
+import os
+
+import numpy as np
+
+from neuro_impl.record_reader import ChunkCache
+from neuro_impl.session_container import SESSION_FILE, SessionContainerWriter, SessionReader, find_sessions, \
+    stream_spec
+
+FS = 250
+
+
+def _signal(seconds=25.0, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * FS)) / FS
+    return np.column_stack((t, rng.normal(0.0, 1e-5, (t.size, 4))))
+
+
+def _write(path, signal, events=(), close=True):
+    streams = [stream_spec('eeg', ['Time', 'O1', 'O2', 'T3', 'T4'], ['s'] + ['V'] * 4, fs=FS),
+               stream_spec('events', ['Time'], ['s'], kind='text')]
+    writer = SessionContainerWriter(str(path), streams, chunk_duration=10.0)
+    # Uneven appends that straddle chunk boundaries
+    for start in range(0, signal.shape[0], 333):
+        writer.append('eeg', signal[start:start + 333])
+    writer.append_text('events', [t for t, _ in events], [line for _, line in events])
+    if close:
+        writer.close()
+    return writer
+
+
+def test_round_trip(tmp_path):
+    signal = _signal()
+    events = [(1.5, 'start'), (12.25, 'blink'), (24.0, 'stop')]
+    _write(tmp_path / SESSION_FILE, signal, events)
+    with SessionReader(str(tmp_path / SESSION_FILE), cache=ChunkCache()) as reader:
+        assert reader.complete
+        assert reader.sample_count('eeg') == signal.shape[0]
+        assert reader.time_range('eeg') == (signal[0, 0], signal[-1, 0])
+        np.testing.assert_array_equal(reader.read('eeg'), signal)
+        # Chunks sit on the 10 s grid
+        assert [chunk.shape[0] for chunk in reader.iter_chunks('eeg')] == [2500, 2500, 1250]
+        assert reader.read_text('events') == events
+        assert reader.read_text('events', 10.0, 20.0) == events[1:2]
+
+
+def test_time_range_and_channel_reads(tmp_path):
+    signal = _signal()
+    _write(tmp_path / SESSION_FILE, signal)
+    with SessionReader(str(tmp_path / SESSION_FILE), cache=ChunkCache()) as reader:
+        selected = (signal[:, 0] >= 9.0) & (signal[:, 0] < 11.5)
+        np.testing.assert_array_equal(reader.read('eeg', 9.0, 11.5), signal[selected])
+        np.testing.assert_array_equal(reader.read('eeg', 9.0, 11.5, channels=['T3', 'Time']),
+                                      signal[selected][:, [3, 0]])
+        assert reader.read('eeg', 30.0, 40.0).shape == (0, 5)
+
+
+def test_unclosed_container_is_scanned_up_to_a_torn_chunk(tmp_path):
+    signal = _signal()
+    path = tmp_path / SESSION_FILE
+    _write(path, signal)
+    # Drop the index and half of the last chunk, as a crash mid-write would
+    with SessionReader(str(path), cache=ChunkCache()) as reader:
+        last = [chunk.shape[0] for chunk in reader.iter_chunks('eeg')][-1]
+    size = os.path.getsize(path)
+    with open(path, 'r+b') as f:
+        f.truncate(size - 40 - 1000)
+    with SessionReader(str(path), cache=ChunkCache()) as reader:
+        assert not reader.complete
+        complete = signal.shape[0] - last
+        assert reader.sample_count('eeg') == complete
+        np.testing.assert_array_equal(reader.read('eeg'), signal[:complete])
+
+
+def test_find_sessions(tmp_path):
+    for folder in ('b', 'a/nested'):
+        os.makedirs(tmp_path / folder)
+        _write(tmp_path / folder / SESSION_FILE, _signal(1.0))
+    assert find_sessions(str(tmp_path)) == [str(tmp_path / 'a' / 'nested' / SESSION_FILE),
+                                            str(tmp_path / 'b' / SESSION_FILE)]
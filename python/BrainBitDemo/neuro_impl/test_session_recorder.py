@@ -0,0 +1,67 @@
+from threading import Thread
+from time import monotonic
+
+import numpy as np
+
+from neuro_impl.session_recorder import SessionRecorder
+
+
+class _Jobs:
+    """Stands in for the SaveWorker: keeps the jobs in submission order instead of writing."""
+
+    def __init__(self):
+        self.jobs = []
+
+    def open(self, session):
+        self.jobs.append(('open', session))
+
+    def append(self, session, rows):
+        self.jobs.append(('append', session))
+
+    def append_stream(self, session, name, rows):
+        self.jobs.append(('stream', session))
+
+    def append_text(self, session, name, times, lines):
+        self.jobs.append(('text', session))
+
+    def close(self, session, path):
+        self.jobs.append(('close', session))
+
+
+def test_writes_after_stop_are_dropped(tmp_path):
+    worker = _Jobs()
+    recorder = SessionRecorder(str(tmp_path), save_worker=worker)
+    recorder.start('run')
+    recorder.record_text('gaze', ['left'], [monotonic()])
+    recorder.stop()
+    recorder.record_text('gaze', ['right'], [monotonic()])
+    recorder.record_stream('impedance', [[1.0, 2.0, 3.0, 4.0]], [monotonic()])
+    assert [kind for kind, _ in worker.jobs] == ['open', 'text', 'close']
+
+
+def test_no_job_is_queued_behind_close_under_concurrent_writes(tmp_path):
+    worker = _Jobs()
+    recorder = SessionRecorder(str(tmp_path), save_worker=worker)
+    recorder.start('run')
+    done = []
+
+    def gaze():
+        while not done:
+            recorder.record_text('gaze', ['line'], [monotonic()])
+            recorder.record_stream('impedance', np.ones((1, 4)), [monotonic()])
+
+    thread = Thread(target=gaze)
+    thread.start()
+    for _ in range(20):
+        recorder.stop()
+        recorder.start('run')
+    recorder.stop()
+    done.append(True)
+    thread.join()
+
+    closed = set()
+    for kind, session in worker.jobs:
+        assert session not in closed
+        if kind == 'close':
+            closed.add(session)
+    assert len(closed) == 21
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from neuro_impl.filter_bank import StreamingFilter, eeg_sos
+from neuro_impl.signal_batch import SignalBatch
+from neuro_impl.spectrum_engine import SpectrumEngine
+from neuro_impl.ssvep_classifier import SsvepClassifier
+from neuro_impl.utils import BB_sampling_rate
+
+
+@pytest.fixture
+def controller(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    from neuro_impl.spectrum_controller import SpectrumController
+    return SpectrumController()
+
+
+def _signal(seconds=8.0, seed=0):
+    t = np.arange(int(seconds * BB_sampling_rate)) / BB_sampling_rate
+    noise = np.random.default_rng(seed).normal(0.0, 5e-6, (t.size, 4))
+    return 20e-6 * np.sin(2 * np.pi * 13.0 * t)[:, None] + noise
+
+
+def _per_packet(signal, size, frequencies):
+    """Frames and decisions of every packet, analysed packet by packet."""
+    signal_filter = StreamingFilter(eeg_sos(BB_sampling_rate), 4)
+    engine = SpectrumEngine(BB_sampling_rate, 4 * BB_sampling_rate, 5, 50, True, (0.0, 1.0, 1.0, 1.0, 0.0), 4)
+    classifier = SsvepClassifier(frequencies)
+    outputs = []
+    for start in range(0, signal.shape[0], size):
+        filtered = signal_filter.process(signal[start:start + size] * 1e3)
+        outputs.append((classifier.push(filtered), engine.push(filtered)))
+    return outputs
+
+
+@pytest.mark.parametrize('frequencies', [(), (8.0,), (8.0, 13.0)])
+def test_outputs_come_from_the_same_packets_as_packet_by_packet(controller, frequencies):
+    signal = _signal()
+    decisions, frames = [], []
+    published = 0
+    controller.processedFrame = frames.append
+    if frequencies:
+        controller.set_stimulus_frequencies(frequencies)
+        controller.processedDecision = decisions.append
+    for (expected_decisions, expected_frames), start in zip(_per_packet(signal, 7, frequencies),
+                                                             range(0, signal.shape[0], 7)):
+        decisions.clear()
+        frames.clear()
+        packet = signal[start:start + 7]
+        n = packet.shape[0]
+        controller.process_data(SignalBatch(packet, np.arange(start, start + n), np.zeros(n, dtype=np.int32),
+                                            np.zeros(n), 0.0))
+        assert [f.sample_index for f in frames] == [f.sample_index for f in expected_frames]
+        for frame, expected in zip(frames, expected_frames):
+            np.testing.assert_allclose(frame.spectrum, expected.spectrum, rtol=1e-9, atol=1e-15)
+        assert [(d.sample_index, d.frequency) for d in decisions] == \
+            [(d.sample_index, d.frequency) for d in expected_decisions]
+        published += len(frames) + len(decisions)
+    assert published
+
+
+def test_ssvep_tracking_is_published_every_packet(controller):
+    controller.set_stimulus_frequencies((8.0, 13.0))
+    published = []
+    controller.processedSsvep = lambda amplitude, frequencies: published.append(amplitude)
+    signal = _signal(2.0)
+    for start in range(0, signal.shape[0], 5):
+        controller.process_data(SignalBatch(signal[start:start + 5], np.arange(start, start + 5),
+                                            np.zeros(5, dtype=np.int32), np.zeros(5), 0.0))
+    assert len(published) == signal.shape[0] // 5
+    assert controller.ssvep.count == signal.shape[0]
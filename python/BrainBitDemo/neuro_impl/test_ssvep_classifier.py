@@ -0,0 +1,60 @@
+import numpy as np
+
+from neuro_impl.ssvep_classifier import SsvepClassifier
+
+
+def _ssvep(frequency, seconds=6.0, sampling_rate=250, seed=0):
+    t = np.arange(int(seconds * sampling_rate)) / sampling_rate
+    noise = np.random.default_rng(seed).normal(0.0, 1.0, (t.size, 4))
+    return np.sin(2 * np.pi * frequency * t)[:, None] + 0.5 * np.sin(2 * np.pi * 2 * frequency * t)[:, None] + noise
+
+
+def _decisions(classifier, signal):
+    decisions = []
+    for start in range(0, signal.shape[0], 10):
+        decisions.extend(classifier.push(signal[start:start + 10]))
+    return decisions
+
+
+def test_picks_the_attended_of_two_frequencies():
+    for attended in (8.0, 13.0):
+        classifier = SsvepClassifier((8.0, 13.0))
+        signal = _ssvep(attended)
+        decisions = _decisions(classifier, signal)
+        # One decision per step once the 2 s window is full
+        steps = np.arange(classifier.step, signal.shape[0] + 1, classifier.step)
+        assert [d.sample_index for d in decisions] == steps[steps >= classifier.window].tolist()
+        assert all(d.frequency == attended for d in decisions)
+        assert all(0.0 < d.confidence <= 1.0 for d in decisions)
+
+
+def _noise(seconds, sampling_rate=250, seed=1):
+    return np.random.default_rng(seed).normal(0.0, 1.0, (int(seconds * sampling_rate), 4))
+
+
+def test_single_frequency_is_detected_against_rest():
+    classifier = SsvepClassifier((8.0,), min_confidence=0.4)
+    assert classifier.can_decide
+    assert classifier.rest_frequencies.tolist() == [6.0, 10.0]
+
+    flicker = _decisions(classifier, _ssvep(8.0))
+    assert flicker and all(d.frequency == 8.0 and d.index == 0 for d in flicker)
+    assert all(d.scores.shape == (3,) and d.correlations.shape == (3, 3) for d in flicker)
+
+    # Noise alone beats both rest references by that margin in a few percent of the windows
+    classifier.clear()
+    rest = _decisions(classifier, _noise(30.0))
+    assert sum(d.frequency is not None for d in rest) <= 0.1 * len(rest)
+    assert all(d.frequency is None for d in rest if d.confidence < 0.4)
+
+
+def test_no_frequencies_make_no_decisions():
+    classifier = SsvepClassifier(())
+    assert not classifier.can_decide
+    assert _decisions(classifier, _ssvep(8.0)) == []
+    # Samples are still buffered, so a frequency decides straight away
+    classifier.set_frequencies((8.0,))
+    assert classifier.can_decide
+    assert classifier.push(np.zeros((62, 4)))
+    classifier.set_frequencies((8.0, 13.0))
+    assert classifier.rest_frequencies.size == 0
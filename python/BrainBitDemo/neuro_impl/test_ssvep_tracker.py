@@ -0,0 +1,39 @@
+import numpy as np
+
+from neuro_impl.ssvep_tracker import SsvepTracker
+
+
+def _direct(window: np.ndarray, targets: np.ndarray, sampling_rate: float) -> np.ndarray:
+    """(channels, frequencies, harmonics) Hann-windowed DFT amplitude of window, computed outright."""
+    n = window.shape[0]
+    hann = 0.5 - 0.5 * np.cos(2 * np.pi * np.arange(n) / n)
+    phasors = np.exp(-2j * np.pi * np.outer(np.arange(n), targets.ravel()) / sampling_rate)
+    amplitude = np.abs((window * hann[:, None]).T @ phasors) * (4.0 / n)
+    return amplitude.reshape((window.shape[1],) + targets.shape)
+
+
+def test_sliding_amplitude_matches_direct_dft():
+    rng = np.random.default_rng(0)
+    t = np.arange(3000) / 250
+    signal = 10e-6 * np.sin(2 * np.pi * 8.57 * t)[:, None] + rng.normal(0.0, 5e-6, (t.size, 4))
+    tracker = SsvepTracker(frequencies=(8.57, 12.0), window_seconds=2.0, resync_seconds=5.0)
+    # Uneven packets, one longer than the window
+    for start, stop in ((0, 7), (7, 600), (600, 1777), (1777, 3000)):
+        amplitude = tracker.push(signal[start:stop])
+    np.testing.assert_allclose(amplitude, _direct(signal[-tracker.window:], tracker.targets, 250), atol=1e-9)
+    assert tracker.ready
+    # The stimulus dominates at its fundamental
+    assert amplitude[0, 0, 0] > 5 * amplitude[0, 1, 0]
+
+
+def test_probes_above_nyquist_are_nan():
+    tracker = SsvepTracker(frequencies=(50.0,), harmonics=3)
+    amplitude = tracker.push(np.zeros((10, 4)))
+    assert np.isnan(amplitude[:, 0, 2]).all() and not np.isnan(amplitude[:, 0, :2]).any()
+
+
+def test_push_without_compute_keeps_the_window():
+    tracker = SsvepTracker(frequencies=(10.0, 15.0), window_seconds=1.0)
+    samples = np.random.default_rng(1).normal(size=(400, 4))
+    assert tracker.push(samples[:200], compute=False) is None
+    np.testing.assert_allclose(tracker.push(samples[200:]), _direct(samples[-250:], tracker.targets, 250), atol=1e-9)
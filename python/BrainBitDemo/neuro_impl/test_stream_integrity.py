@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from neuro_impl.signal_batch import SignalBatch
+from neuro_impl.stream_integrity import GAP_MARKER, StreamIntegrityMonitor, gap_mask
+
+
+def _batch(packs):
+    packs = np.asarray(packs, dtype=np.int64)
+    # A ramp on every channel, so interpolation reproduces lost samples exactly
+    samples = np.repeat(2.0 * packs[:, None], 4, axis=1) + np.arange(4)
+    return SignalBatch(samples, packs, np.zeros(packs.size, dtype=np.int32), packs / 250.0, float(packs[-1]) / 250.0)
+
+
+def test_contiguous_stream_passes_through():
+    monitor = StreamIntegrityMonitor()
+    first, second = _batch(range(0, 10)), _batch(range(10, 20))
+    assert monitor.process(first) is first
+    assert monitor.process(second) is second
+    assert monitor.stats()['received'] == 20 and monitor.stats()['lost'] == 0
+
+
+@pytest.mark.parametrize('fill', ['zero', 'hold', 'interpolate'])
+def test_gap_across_and_inside_batches_is_filled(fill):
+    monitor = StreamIntegrityMonitor(fill=fill)
+    monitor.process(_batch(range(0, 10)))
+    # Two samples lost between the batches, three inside the second one
+    out = monitor.process(_batch([12, 13, 14, 18, 19]))
+    assert out.pack_nums.tolist() == list(range(10, 20))
+    filled = gap_mask(out)
+    assert out.pack_nums[filled].tolist() == [10, 11, 15, 16, 17]
+    assert (out.markers[~filled] != GAP_MARKER).all()
+    np.testing.assert_allclose(out.timestamps, np.arange(10, 20) / 250.0)
+    expected = _batch(range(10, 20)).samples
+    np.testing.assert_array_equal(out.samples[~filled], expected[~filled])
+    match fill:
+        case 'zero':
+            assert (out.samples[filled] == 0.0).all()
+        case 'hold':
+            held = _batch([9, 9, 14, 14, 14]).samples
+            np.testing.assert_array_equal(out.samples[filled], held)
+        case 'interpolate':
+            np.testing.assert_allclose(out.samples[filled], expected[filled])
+    stats = monitor.stats()
+    assert (stats['lost'], stats['filled'], stats['gaps']) == (5, 5, 2)
+
+
+def test_no_fill_and_long_gaps_only_count():
+    monitor = StreamIntegrityMonitor(fill='none')
+    monitor.process(_batch(range(0, 10)))
+    assert monitor.process(_batch(range(15, 20))).pack_nums.tolist() == list(range(15, 20))
+    monitor = StreamIntegrityMonitor(max_fill_secs=0.01)
+    monitor.process(_batch(range(0, 10)))
+    # 2.5 samples allowed: a gap of 5 stays open
+    assert monitor.process(_batch(range(15, 20))).pack_nums.tolist() == list(range(15, 20))
+    assert monitor.stats()['lost'] == 5 and monitor.stats()['filled'] == 0
+
+
+def test_duplicates_are_dropped():
+    monitor = StreamIntegrityMonitor()
+    monitor.process(_batch(range(0, 10)))
+    out = monitor.process(_batch([8, 9, 10, 10, 11]))
+    assert out.pack_nums.tolist() == [10, 11]
+    assert len(monitor.process(_batch([5, 6]))) == 0
+    assert monitor.stats()['duplicates'] == 5 and monitor.stats()['lost'] == 0
+
+
+def test_counter_restart_starts_a_new_sequence():
+    monitor = StreamIntegrityMonitor()
+    monitor.process(_batch(range(5000, 5010)))
+    out = monitor.process(_batch([5010, 5011, 0, 1, 2]))
+    assert out.pack_nums.tolist() == [5010, 5011, 0, 1, 2]
+    stats = monitor.stats()
+    assert (stats['restarts'], stats['lost'], stats['duplicates']) == (1, 0, 0)
+
+
+def test_unknown_fill_is_rejected():
+    with pytest.raises(ValueError):
+        StreamIntegrityMonitor(fill='spline')
@@ -1 +1,4 @@
-BB_channels = ['O1', 'O2', 'T3', 'T4']
\ No newline at end of file
+BB_channels = ['O1', 'O2', 'T3', 'T4']
+BB_sampling_rate = 250
+# Nominal impedance rate; the real timestamps are recorded alongside
+BB_resist_sampling_rate = 4
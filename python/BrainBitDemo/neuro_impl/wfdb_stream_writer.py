@@ -0,0 +1,124 @@
+import os
+from datetime import datetime
+
+import numpy as np
+import wfdb
+
+# Bytes per sample and digital range of the WFDB formats the writer supports
+_FORMATS = {'16': (2, 16), '24': (3, 24), '32': (4, 32)}
+
+# Sidecar of a record's exact timestamps: little-endian int64 nanoseconds, one per sample
+TIME_SUFFIX = '.time'
+
+
+class WfdbStreamWriter:
+    """
+    Append-mode WFDB record writer. Samples are quantised with a fixed gain per channel and
+    flushed to the .dat file every chunk_samples rows, so memory stays at one chunk however
+    long the recording runs. The header, with sample count and checksums, is written by close().
+    All channels share one .dat file and therefore one format.
+    NaN is stored as the format's invalid value, out-of-range values are clipped.
+    With time_column set, that channel (seconds) is also written unquantised to the
+    record_name.time sidecar, see read_time_ns().
+    """
+
+    def __init__(self, write_dir, record_name, fs, sig_name, units, adc_gain, fmt='32', baseline=None,
+                 chunk_samples=2500, base_datetime=None, time_column=None):
+        if fmt not in _FORMATS:
+            raise ValueError(f"fmt must be one of {list(_FORMATS)}, not {fmt!r}")
+        self.write_dir = write_dir
+        self.record_name = record_name
+        self.fs = fs
+        self.sig_name = list(sig_name)
+        self.units = list(units)
+        self.adc_gain = np.asarray(adc_gain, dtype=np.float64)
+        self.baseline = np.zeros(len(self.sig_name), dtype=np.int64) if baseline is None \
+            else np.asarray(baseline, dtype=np.int64)
+        self.fmt = fmt
+        self.base_datetime = base_datetime or datetime.now()
+        self.time_column = time_column
+
+        self.__bytes, bits = _FORMATS[fmt]
+        self.__invalid = -(1 << (bits - 1))
+        self.__max = (1 << (bits - 1)) - 1
+        self.__chunk = np.empty((chunk_samples, len(self.sig_name)), dtype=np.float64)
+        self.__filled = 0
+        self.__checksum = np.zeros(len(self.sig_name), dtype=np.int64)
+        self.__init_value = None
+        self.sig_len = 0
+        self.closed = False
+
+        os.makedirs(write_dir, exist_ok=True)
+        self.dat_file = record_name + '.dat'
+        self.__dat = open(os.path.join(write_dir, self.dat_file), 'wb')
+        self.__time = None if time_column is None else open(os.path.join(write_dir, record_name + TIME_SUFFIX), 'wb')
+
+    @property
+    def files(self) -> list:
+        """Paths of the files of this record (the header exists only after close)."""
+        files = [os.path.join(self.write_dir, self.dat_file), os.path.join(self.write_dir, self.record_name + '.hea')]
+        if self.time_column is not None:
+            files.append(os.path.join(self.write_dir, self.record_name + TIME_SUFFIX))
+        return files
+
+    def append(self, p_signal: np.ndarray):
+        """p_signal: (n_samples, n_channels) in physical units."""
+        n = p_signal.shape[0]
+        start = 0
+        while start < n:
+            take = min(n - start, self.__chunk.shape[0] - self.__filled)
+            self.__chunk[self.__filled:self.__filled + take] = p_signal[start:start + take]
+            self.__filled += take
+            start += take
+            if self.__filled == self.__chunk.shape[0]:
+                self.flush()
+
+    def flush(self):
+        if self.__filled == 0:
+            return
+        digital = self.__quantise(self.__chunk[:self.__filled])
+        if self.__init_value is None:
+            self.__init_value = digital[0].tolist()
+        self.__checksum += digital.sum(axis=0)
+        # Interleaved little-endian samples, truncated to the format width
+        raw = digital.astype('<i4').view(np.uint8).reshape(-1, 4)[:, :self.__bytes]
+        self.__dat.write(raw.tobytes())
+        if self.__time is not None:
+            self.__time.write(np.rint(self.__chunk[:self.__filled, self.time_column] * 1e9).astype('<i8').tobytes())
+        self.sig_len += self.__filled
+        self.__filled = 0
+
+    def close(self) -> int:
+        """Flush what is left, write the header and return the number of samples per channel."""
+        if self.closed:
+            return self.sig_len
+        self.flush()
+        self.__dat.close()
+        if self.__time is not None:
+            self.__time.close()
+        self.closed = True
+        n_sig = len(self.sig_name)
+        # WFDB checksums are the 16-bit signed sum of every sample
+        checksum = [int((c + 32768) % 65536 - 32768) for c in self.__checksum.tolist()]
+        record = wfdb.Record(record_name=self.record_name, n_sig=n_sig, fs=self.fs, sig_len=self.sig_len,
+                             file_name=[self.dat_file] * n_sig, fmt=[self.fmt] * n_sig,
+                             adc_gain=self.adc_gain.tolist(), baseline=self.baseline.tolist(),
+                             units=self.units, sig_name=self.sig_name,
+                             adc_res=[_FORMATS[self.fmt][1]] * n_sig, adc_zero=[0] * n_sig,
+                             init_value=self.__init_value or [0] * n_sig, checksum=checksum,
+                             block_size=[0] * n_sig,
+                             base_date=self.base_datetime.date(), base_time=self.base_datetime.time())
+        record.wrheader(write_dir=self.write_dir)
+        return self.sig_len
+
+    def __quantise(self, p_signal: np.ndarray) -> np.ndarray:
+        digital = np.rint(p_signal * self.adc_gain) + self.baseline
+        nan = np.isnan(digital)
+        np.clip(digital, self.__invalid + 1, self.__max, out=digital)
+        digital[nan] = self.__invalid
+        return digital.astype(np.int64)
+
+
+def read_time_ns(record_path: str) -> np.ndarray:
+    """Exact timestamps of a record written with a time_column, in int64 nanoseconds."""
+    return np.fromfile(record_path + TIME_SUFFIX, dtype='<i8')
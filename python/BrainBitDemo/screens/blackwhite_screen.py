@@ -1,8 +1,9 @@
 from screens.blackwhite_widget import BlackWhiteWidget
 from neuro_impl.spectrum_controller import SpectrumController
 from PyQt6.QtWidgets import QWidget, QMainWindow, QApplication
-from PyQt6.QtWidgets import QVBoxLayout, QPushButton, QLineEdit
+from PyQt6.QtWidgets import QVBoxLayout, QPushButton, QLineEdit, QLabel
 from PyQt6.QtCore import QTimer
+from neuro_impl.stream_bus import StreamTopic
 
 class BlackWhiteScreen(QMainWindow):
     def __init__(self, brain_bit_controller, stack_navigation, history_stack, *args, **kwargs):
@@ -21,12 +22,17 @@ class BlackWhiteScreen(QMainWindow):
 
         # Spectrum controller
         self.spectrumController = SpectrumController()
+        self.spectrumController.processedDecision = self.__decision_received
         self.__is_started = False
 
         # Black & White flickering widget
         self.flicker_widget = BlackWhiteWidget(frequency=1.7, flicker_area_percentage=0.25, parent=self)
         layout.addWidget(self.flicker_widget)
 
+        # Online SSVEP decoder: the flickering stimulus against rest
+        self.decision_label = QLabel("Decoder: -")
+        layout.addWidget(self.decision_label)
+
         # Input space above the start button for flicker area percentage
         self.flicker_area_input = QLineEdit(self)
         self.flicker_area_input.setPlaceholderText("Enter flicker area percentage (e.g., 0.25 for 25%)")  # Set a placeholder
@@ -65,6 +71,7 @@ class BlackWhiteScreen(QMainWindow):
         """Start the flickering sequence."""
         try:
             self.current_phase = 0  # Reset to the first phase
+            self.spectrumController.set_stimulus_frequencies([phase["frequency"] for phase in self.phases])
             self.__apply_phase()
             self.timer.start(1000 * self.phases[self.current_phase]["duration"])  # Start the timer for the first phase
         except Exception as e:
@@ -131,7 +138,7 @@ class BlackWhiteScreen(QMainWindow):
         """Start capturing signals."""
         try:
             self.start_button.setText('Stop')
-            self.brain_bit_controller.signalReceived = self.__signal_received
+            self.brain_bit_controller.bus.subscribe(StreamTopic.Signal, self.__signal_received)
             self.brain_bit_controller.start_signal()
             # Start the flickering sequence automatically
             self.start_flickering_sequence()
@@ -144,7 +151,7 @@ class BlackWhiteScreen(QMainWindow):
         try:
             self.start_button.setText('Start')
             self.brain_bit_controller.stop_signal()
-            self.brain_bit_controller.signalReceived = None
+            self.brain_bit_controller.bus.unsubscribe(StreamTopic.Signal, self.__signal_received)
             self.__is_started = False
         except Exception as e:
             print(f"Error stopping signal: {e}")
@@ -165,6 +172,11 @@ class BlackWhiteScreen(QMainWindow):
         except Exception as e:
             print(f"Error stopping recording: {e}")
 
+    def stop_recordings(self):
+        """Finish this screen's recording if one is still open, e.g. when the app quits."""
+        if self.spectrumController.is_recording:
+            self.__stop_recording()
+
     def __signal_received(self, signal):
         """Handle received signals."""
         try:
@@ -176,6 +188,11 @@ class BlackWhiteScreen(QMainWindow):
         except Exception as e:
             print(f"Error processing received signal: {e}")
 
+    def __decision_received(self, decision):
+        """Decoder output every 250 ms; frequency is None while the stimulus does not beat the rest."""
+        state = "no SSVEP" if decision.frequency is None else f"{decision.frequency:g} Hz"
+        self.decision_label.setText(f"Decoder: {state} (confidence {decision.confidence:.2f})")
+
     def __close_screen(self):
         """Handle the back button and stop any ongoing flickering."""
         try:
@@ -1,8 +1,10 @@
 from screens.chessboard_widget import ChessboardWidget
 from neuro_impl.spectrum_controller import SpectrumController
 from PyQt6.QtWidgets import QWidget, QMainWindow
-from PyQt6.QtWidgets import QVBoxLayout, QPushButton
+from PyQt6.QtWidgets import QVBoxLayout, QPushButton, QLabel
 from PyQt6.QtCore import QTimer
+from time import monotonic
+from neuro_impl.stream_bus import StreamTopic
 
 
 class ChessboardScreen(QMainWindow):
@@ -24,12 +26,22 @@ class ChessboardScreen(QMainWindow):
         
         # Spectrum controller
         self.spectrumController = SpectrumController()
+        self.spectrumController.processedSsvep = self.__ssvep_received
+        self.spectrumController.processedDecision = self.__decision_received
         self.__is_started = False
 
         # Chessboard widget
         self.chessboard = ChessboardWidget(rows=8, cols=8, frequency=1.7, parent=self)
         layout.addWidget(self.chessboard)
 
+        # Live SSVEP amplitude at the stimulus frequencies
+        self.ssvep_label = QLabel("SSVEP: -")
+        layout.addWidget(self.ssvep_label)
+        self.__ssvep_shown_at = 0.0
+        # Online SSVEP decoder: the flickering stimulus against rest
+        self.decision_label = QLabel("Decoder: -")
+        layout.addWidget(self.decision_label)
+
         # Buttons
         self.start_button = QPushButton("Start Flickering")
         self.back_button = QPushButton("Back")
@@ -73,6 +85,7 @@ class ChessboardScreen(QMainWindow):
         """Start the flickering sequence."""
         try:
             self.current_phase = 0  # Reset to the first phase
+            self.spectrumController.set_stimulus_frequencies([phase["frequency"] for phase in self.phases])
             self.__apply_phase()
             self.timer.start(1000 * self.phases[self.current_phase]["duration"])  # Start the timer for the first phase
         except Exception as e:
@@ -122,7 +135,7 @@ class ChessboardScreen(QMainWindow):
         """Start capturing signals."""
         try:
             self.start_button.setText('Stop')
-            self.brain_bit_controller.signalReceived = self.__signal_received
+            self.brain_bit_controller.bus.subscribe(StreamTopic.Signal, self.__signal_received)
             self.brain_bit_controller.start_signal()
             # Start the flickering sequence automatically
             self.start_flickering_sequence()
@@ -135,7 +148,7 @@ class ChessboardScreen(QMainWindow):
         try:
             self.start_button.setText('Start')
             self.brain_bit_controller.stop_signal()
-            self.brain_bit_controller.signalReceived = None
+            self.brain_bit_controller.bus.unsubscribe(StreamTopic.Signal, self.__signal_received)
             self.__is_started = False
         except Exception as e:
             print(f"Error stopping signal: {e}")
@@ -156,6 +169,11 @@ class ChessboardScreen(QMainWindow):
         except Exception as e:
             print(f"Error stopping recording: {e}")
 
+    def stop_recordings(self):
+        """Finish this screen's recording if one is still open, e.g. when the app quits."""
+        if self.spectrumController.is_recording:
+            self.__stop_recording()
+
     def __signal_received(self, signal):
         """Handle received signals."""
         try:
@@ -166,6 +184,22 @@ class ChessboardScreen(QMainWindow):
         except Exception as e:
             print(f"Error processing received signal: {e}")
 
+    def __ssvep_received(self, amplitudes, frequencies):
+        """Show the fundamental's amplitude over O1 and O2; called every packet, shown every 200 ms."""
+        now = monotonic()
+        if now - self.__ssvep_shown_at < 0.2:
+            return
+        self.__ssvep_shown_at = now
+        # (channels, frequencies, harmonics) in mV
+        fundamental = amplitudes[:2, :, 0].mean(axis=0) * 1e3
+        self.ssvep_label.setText("SSVEP: " + ", ".join(f"{frequency:g} Hz {amplitude:.2f} uV"
+                                                        for frequency, amplitude in zip(frequencies, fundamental)))
+
+    def __decision_received(self, decision):
+        """Decoder output every 250 ms; frequency is None while the stimulus does not beat the rest."""
+        state = "no SSVEP" if decision.frequency is None else f"{decision.frequency:g} Hz"
+        self.decision_label.setText(f"Decoder: {state} (confidence {decision.confidence:.2f})")
+
     def __close_screen(self):
         """Handle the back button and stop any ongoing flickering."""
         try:
@@ -1,4 +1,5 @@
 import logging
+import os
 import time
 from PyQt6.QtWidgets import QWidget, QMainWindow, QVBoxLayout, QHBoxLayout, QPushButton, QLineEdit
 from PyQt6.QtCore import QTimer
@@ -6,6 +7,8 @@ from PyQt6.QtCore import QTimer
 from screens.covert_widget import CovertWidget
 from neuro_impl.spectrum_controller import SpectrumController
 from neuro_impl.resistance_controller import ResistanceController
+from neuro_impl.session_recorder import SessionRecorder
+from neuro_impl.stream_bus import StreamTopic
 
 # Configure logging
 logging.basicConfig(
@@ -15,7 +18,8 @@ logging.basicConfig(
 )
 
 class CovertScreen(QMainWindow):
-    def __init__(self, brain_bit_controller, stack_navigation, history_stack, send_gaze_command, *args, **kwargs):
+    def __init__(self, brain_bit_controller, stack_navigation, history_stack, send_gaze_command,
+                 add_gaze_listener=None, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.brain_bit_controller = brain_bit_controller
         self.stack_navigation     = stack_navigation
@@ -25,12 +29,21 @@ class CovertScreen(QMainWindow):
         self.setWindowTitle("Black & White Flickering Screen")
         self.setGeometry(100, 100, 600, 600)
 
-        # Controllers
-        self.spectrumController   = SpectrumController()
+        # Controllers share one session recorder: EEG, labels, impedance and gaze on one time base
+        self.recorder             = SessionRecorder()
+        self.spectrumController   = SpectrumController(recorder=self.recorder)
         self.resistanceController = ResistanceController(
             brain_bit_controller=brain_bit_controller,
-            resist_received_callback=self.resist_received
+            resist_received_callback=self.resist_received,
+            recorder=self.recorder
         )
+        if add_gaze_listener:
+            add_gaze_listener(self.__gaze_received)
+        # Online SSVEP decisions, the flickering stimulus against rest, every 250 ms. Logged rather
+        # than shown, so the subject gets no feedback during covert attention
+        self.spectrumController.processedDecision = self.__decision_received
+        # The interleaved loop finishes on its own thread; the rest of its teardown happens here
+        self.brain_bit_controller.interleavedFinished.connect(self.__interleaved_finished)
 
         # State flags
         self.__is_started     = False  # for Start Flickering
@@ -94,6 +107,7 @@ class CovertScreen(QMainWindow):
     # — Flicker sequence — #
     def start_flickering_sequence(self):
         self.current_phase = 0
+        self.spectrumController.set_stimulus_frequencies([ph["frequency"] for ph in self.phases])
         self.__apply_phase()
         dur = self.phases[0]["duration"]
         self.timer.start(int(1000 * dur))
@@ -105,7 +119,9 @@ class CovertScreen(QMainWindow):
         else:
             txt = self.frequency_input.text().strip()
             if txt:
-                try: ph["frequency"] = float(txt)
+                try:
+                    ph["frequency"] = float(txt)
+                    self.spectrumController.set_stimulus_frequencies([ph["frequency"] for ph in self.phases])
                 except: pass
             self.flicker_widget.set_frequency(ph["frequency"])
             self.flicker_widget.start_flickering()
@@ -154,25 +170,28 @@ class CovertScreen(QMainWindow):
             self.__is_started = True
 
     def __start_signal(self):
-        self.brain_bit_controller.signalReceived = self.__signal_received
+        self.brain_bit_controller.bus.subscribe(StreamTopic.Signal, self.__signal_received)
         self.brain_bit_controller.start_signal()
         self.__is_started = True
         self.start_button.setText("Stop Flickering")
 
     def __stop_signal(self):
         self.brain_bit_controller.stop_signal()
-        self.brain_bit_controller.signalReceived = None
+        self.brain_bit_controller.bus.unsubscribe(StreamTopic.Signal, self.__signal_received)
         # Also ensure interleaved stopped
         self.brain_bit_controller.stop_interleaved()
-        self.brain_bit_controller.resistReceived = None
+        self.brain_bit_controller.bus.unsubscribe(StreamTopic.Resist, self.resist_received)
+        self.brain_bit_controller.bus.unsubscribe(StreamTopic.ResistBatch,
+                                                  self.resistanceController.process_resistance_batch)
         self.__is_started = False
         self.start_button.setText("Start Flickering")
 
     # — Recording — #
     def __start_recording(self):
         self.send_gaze_command("start recording")
-        self.spectrumController.start_recording()
-        #self.resistanceController.start_recording()
+        # Written to disk while recording; stop moves it if the inputs changed meanwhile
+        self.spectrumController.start_recording(path=self.get_path())
+        self.resistanceController.start_recording(path=self.get_path())
         
     def get_path(self):
         name = self.name_input.text().strip() or "experiment"
@@ -190,9 +209,14 @@ class CovertScreen(QMainWindow):
     def __stop_recording(self):
         path = self.get_path()
         self.spectrumController.stop_recording(path = path)
-        #self.resistanceController.stop_recording()
+        self.resistanceController.stop_recording(path = path)
         self.send_gaze_command("stop recording")
 
+    def stop_recordings(self):
+        """Finish this screen's recordings if any is still open, e.g. when the app quits."""
+        if self.spectrumController.is_recording or self.resistanceController.is_recording:
+            self.__stop_recording()
+
     # — EEG callback — #
     def __signal_received(self, signal):
         if self.current_phase < len(self.phases):
@@ -225,8 +249,10 @@ class CovertScreen(QMainWindow):
             self.start_flickering_sequence()
 
             # hook callbacks
-            self.brain_bit_controller.signalReceived = self.__signal_received
-            self.brain_bit_controller.resistReceived = self.resist_received
+            self.brain_bit_controller.bus.subscribe(StreamTopic.Signal, self.__signal_received)
+            self.brain_bit_controller.bus.subscribe(StreamTopic.Resist, self.resist_received)
+            self.brain_bit_controller.bus.subscribe(StreamTopic.ResistBatch,
+                                                    self.resistanceController.process_resistance_batch)
 
             # start interleaved loop
             self.brain_bit_controller.start_interleaved(
@@ -238,16 +264,44 @@ class CovertScreen(QMainWindow):
             self.interleaved_button.setText("Stop Interleaved")
             self.__is_interleaved = True
         else:
+            # Returns at once; __interleaved_finished completes the stop after the final switch
             self.brain_bit_controller.stop_interleaved()
-            self.brain_bit_controller.signalReceived = None
-            self.brain_bit_controller.resistReceived = None
-
             self.timer.stop()
             self.flicker_widget.stop_flickering()
-            self.__stop_recording()
+            self.interleaved_button.setText("Stopping...")
+            self.interleaved_button.setEnabled(False)
 
-            self.interleaved_button.setText("Start Interleaved")
-            self.__is_interleaved = False
+    def __interleaved_finished(self):
+        if not self.__is_interleaved:
+            return
+        self.brain_bit_controller.bus.unsubscribe(StreamTopic.Signal, self.__signal_received)
+        self.brain_bit_controller.bus.unsubscribe(StreamTopic.Resist, self.resist_received)
+        self.brain_bit_controller.bus.unsubscribe(StreamTopic.ResistBatch,
+                                                  self.resistanceController.process_resistance_batch)
+        self.__stop_recording()
+        self.__save_segment_map()
+
+        self.interleaved_button.setText("Start Interleaved")
+        self.interleaved_button.setEnabled(True)
+        self.__is_interleaved = False
+
+    def __save_segment_map(self):
+        scheduler = self.brain_bit_controller.interleave_scheduler
+        if not scheduler:
+            return
+        path = os.path.join(self.spectrumController.saved_data_dir, self.get_path(), "interleave_segments.json")
+        # On the recorder's time base, like every other stream in the session folder
+        scheduler.save_segment_map(path, time_origin=self.recorder.time_origin or 0.0)
+        logging.info(f"Interleaved EEG duty cycle {scheduler.duty_cycle():.1%}, "
+                     f"{len(scheduler.gaps())} gaps, segment map saved to {path}")
+
+    def __decision_received(self, decision):
+        logging.debug(f"SSVEP {decision.frequency} Hz, confidence {decision.confidence:.2f}, "
+                      f"scores {decision.scores.round(3).tolist()}")
+
+    def __gaze_received(self, line, received):
+        # Called on the gaze output thread
+        self.recorder.record_text('gaze', [line], [received])
 
     def resist_received(self, resist):
         self.resistanceController.process_resistance(resist)
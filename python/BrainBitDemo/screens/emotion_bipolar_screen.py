@@ -1,4 +1,5 @@
 from neuro_impl.emotions_bipolar_controller import EmotionBipolar
+from neuro_impl.montage import BIPOLAR
 
 from PyQt6.QtWidgets import QMainWindow
 from PyQt6.uic import loadUi
@@ -33,14 +34,15 @@ class EmotionBipolarScreen(QMainWindow):
     def __start_signal(self):
         self.startBipolarEmotionButton.setText('Stop')
         self.emotionController.start_calibration()
-        self.brain_bit_controller.signalReceived = self.emotionController.process_data
+        # Bipolar pairs come from the controller's shared montage stage, derived once per batch
+        self.brain_bit_controller.montage(BIPOLAR).subscribe(self.emotionController.process_bipolar)
         self.brain_bit_controller.start_signal()
         self.is_started = True
 
     def __stop_signal(self):
         self.startBipolarEmotionButton.setText('Start')
         self.brain_bit_controller.stop_signal()
-        self.brain_bit_controller.signalReceived = None
+        self.brain_bit_controller.montage(BIPOLAR).unsubscribe(self.emotionController.process_bipolar)
         self.is_started = False
 
     def calibration_callback(self, progress):
@@ -4,6 +4,7 @@ from neuro_impl.emotions_monopolar_controller import EmotionMonopolar
 
 from PyQt6.QtWidgets import QMainWindow
 from PyQt6.uic import loadUi
+from neuro_impl.stream_bus import StreamTopic
 
 
 class EmotionMonopolarScreen(QMainWindow):
@@ -34,14 +35,14 @@ class EmotionMonopolarScreen(QMainWindow):
     def __start_signal(self):
         self.startEmotionButton.setText('Stop')
         self.emotionController.start_calibration()
-        self.brain_bit_controller.signalReceived = self.emotionController.process_data
+        self.brain_bit_controller.bus.subscribe(StreamTopic.Signal, self.emotionController.process_data)
         self.brain_bit_controller.start_signal()
         self.is_started = True
 
     def __stop_signal(self):
         self.startEmotionButton.setText('Start')
         self.brain_bit_controller.stop_signal()
-        self.brain_bit_controller.signalReceived = None
+        self.brain_bit_controller.bus.unsubscribe(StreamTopic.Signal, self.emotionController.process_data)
         self.is_started = False
 
     def calibration_callback(self, progress, channel):
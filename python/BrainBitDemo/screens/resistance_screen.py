@@ -16,7 +16,6 @@ class ResistanceScreen(QMainWindow):
         self.resistButton.setText('Start')
         self.backButton.clicked.connect(self.__close_screen)
         self.resistButton.clicked.connect(self.__resist_button_clicked)
-        self.brain_bit_controller.resistReceived = self.resist_received
         self.resistance_controller = ResistanceController(brain_bit_controller=self.brain_bit_controller, resist_received_callback= self.resist_received)  # Initialize ResistanceController
         self.__is_started = False
 
@@ -37,8 +36,14 @@ class ResistanceScreen(QMainWindow):
         print("Stopping resistance measurement...")
         self.resistButton.setText('Start')
         self.resistance_controller.stop_resist()  # Stop resistance measurement
+        self.resistance_controller.stop_recording()
         self.__is_started = False
 
+    def stop_recordings(self):
+        """Finish this screen's recording if one is still open, e.g. when the app quits."""
+        if self.resistance_controller.is_recording:
+            self.resistance_controller.stop_recording()
+
     def resist_received(self, resist):
         print("Resistance data received:", resist)
         self.o1Value.setText(str(resist.O1))
@@ -1,6 +1,7 @@
 
 from PyQt6.uic import loadUi
 from PyQt6.QtWidgets import QMainWindow
+from neuro_impl.stream_bus import StreamTopic
 
 class SearchScreen(QMainWindow):
     def __init__(self,brain_bit_controller,stack_navigation, history_stack, *args, **kwargs):
@@ -36,14 +37,14 @@ class SearchScreen(QMainWindow):
 
     def __start_scan(self):
         self.searchButton.setText('Stop')
-        self.brain_bit_controller.sensorsFounded = self.__sensors_founded
+        self.brain_bit_controller.bus.subscribe(StreamTopic.Sensors, self.__sensors_founded)
         self.brain_bit_controller.start_scan()
         self.is_searching = True
 
     def __stop_scan(self):
         self.searchButton.setText('Search')
         self.brain_bit_controller.stop_scan()
-        self.brain_bit_controller.sensorsFounded = None
+        self.brain_bit_controller.bus.unsubscribe(StreamTopic.Sensors, self.__sensors_founded)
         self.is_searching = False
 
     def __close_screen(self):
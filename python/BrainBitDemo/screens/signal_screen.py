@@ -2,6 +2,7 @@
 from ui.plots import SignalPlot
 from PyQt6.QtWidgets import QMainWindow
 from PyQt6.uic import loadUi
+from neuro_impl.stream_bus import StreamTopic
 
 
 class SignalScreen(QMainWindow):
@@ -33,14 +34,10 @@ class SignalScreen(QMainWindow):
             self.__start_signal()
 
     def signal_received(self, signal):
-        o1Samples = [sample.O1 for sample in signal]
-        o2Samples = [sample.O2 for sample in signal]
-        t3Samples = [sample.T3 for sample in signal]
-        t4Samples = [sample.T4 for sample in signal]
-        self.o1Graph.update_data(o1Samples)
-        self.o2Graph.update_data(o2Samples)
-        self.t3Graph.update_data(t3Samples)
-        self.t4Graph.update_data(t4Samples)
+        self.o1Graph.update_data(signal.channel('O1').tolist())
+        self.o2Graph.update_data(signal.channel('O2').tolist())
+        self.t3Graph.update_data(signal.channel('T3').tolist())
+        self.t4Graph.update_data(signal.channel('T4').tolist())
 
     def __start_signal(self):
         self.signalButton.setText('Stop')
@@ -48,7 +45,7 @@ class SignalScreen(QMainWindow):
         self.o2Graph.start_draw()
         self.t3Graph.start_draw()
         self.t4Graph.start_draw()
-        self.brain_bit_controller.signalReceived = self.signal_received
+        self.brain_bit_controller.bus.subscribe(StreamTopic.Signal, self.signal_received)
         self.brain_bit_controller.start_signal()
         self.__is_started = True
 
@@ -59,7 +56,7 @@ class SignalScreen(QMainWindow):
         self.t3Graph.stop_draw()
         self.t4Graph.stop_draw()
         self.brain_bit_controller.stop_signal()
-        self.brain_bit_controller.resistReceived = None
+        self.brain_bit_controller.bus.unsubscribe(StreamTopic.Signal, self.signal_received)
         self.__is_started = False
 
     def __close_screen(self):
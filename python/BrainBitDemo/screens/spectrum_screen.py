@@ -1,8 +1,10 @@
 
+from neuro_impl.artifact_gate import ArtifactGate
 from neuro_impl.spectrum_controller import SpectrumController
 from PyQt6.QtWidgets import QMainWindow
 from PyQt6.uic import loadUi
 from ui.plots import SpectrumPlot
+from neuro_impl.stream_bus import StreamTopic
 
 class SpectrumScreen(QMainWindow):
     def __init__(self, brain_bit_controller,stack_navigation, history_stack,*args, **kwargs):
@@ -26,9 +28,12 @@ class SpectrumScreen(QMainWindow):
         self.t4_graphLayout.addWidget(self.t4Graph)
         self.__is_started = False
 
-        self.spectrumController = SpectrumController()
+        # Artifacted blocks keep the last spectrum on screen instead of smearing it
+        self.spectrumController = SpectrumController(gate=ArtifactGate())
         self.spectrumController.processedWaves = self.__processed_waves
         self.spectrumController.processedSpectrum = self.__processed_spectrum
+        self.spectrumController.processedArtifact = self.__processed_artifact
+        self.__artifacted = False
 
     def __start_button_clicked(self):
         if self.__is_started:
@@ -44,7 +49,7 @@ class SpectrumScreen(QMainWindow):
         self.o2Graph.start_draw()
         self.t3Graph.start_draw()
         self.t4Graph.start_draw()
-        self.brain_bit_controller.signalReceived = self.__signal_received
+        self.brain_bit_controller.bus.subscribe(StreamTopic.Signal, self.__signal_received)
         self.brain_bit_controller.start_signal()
         self.__is_started = True
 
@@ -55,7 +60,7 @@ class SpectrumScreen(QMainWindow):
         self.t3Graph.stop_draw()
         self.t4Graph.stop_draw()
         self.brain_bit_controller.stop_signal()
-        self.brain_bit_controller.signalReceived = None
+        self.brain_bit_controller.bus.unsubscribe(StreamTopic.Signal, self.__signal_received)
         self.__is_started = False
         
         
@@ -70,9 +75,19 @@ class SpectrumScreen(QMainWindow):
         print("Recording stopped.")
         
 
+    def stop_recordings(self):
+        """Finish this screen's recording if one is still open, e.g. when the app quits."""
+        if self.spectrumController.is_recording:
+            self.__stop_recording()
+
     def __signal_received(self, signal):
         self.spectrumController.process_data(signal)
 
+    def __processed_artifact(self, artifacted):
+        if artifacted != self.__artifacted:
+            self.__artifacted = artifacted
+            self.statusBar().showMessage('Artifact: spectrum held' if artifacted else '')
+
     def __processed_waves(self, waves, channel):
         match channel:
             case 'O1':
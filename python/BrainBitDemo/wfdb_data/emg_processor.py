@@ -1,26 +1,37 @@
 import pandas as pd
 import numpy as np
-from scipy.signal import butter, filtfilt
+from scipy.signal import butter, sosfilt, sosfilt_zi, sosfiltfilt
 import matplotlib.pyplot as plt
 import os  # Import os module to handle directories
 
 class EMGProcessor:
-    def __init__(self, sampling_frequency, lowcut, highcut):
+    def __init__(self, sampling_frequency, lowcut, highcut, causal=False):
         self.sampling_frequency = sampling_frequency
         self.lowcut = lowcut
         self.highcut = highcut
+        # Zero-phase by default. causal=True filters the way the live path does
+        # (neuro_impl.filter_bank.StreamingFilter), so offline results match what the app computed
+        self.causal = causal
+        # Designed once; second-order sections stay stable where (b, a) loses precision
+        self.__bandpass = butter(4, [lowcut, highcut], btype='band', output='sos', fs=sampling_frequency)
+        self.__notches = {}
 
     def bandpass_filter(self, data):
-        nyquist = 0.5 * self.sampling_frequency
-        low = self.lowcut / nyquist
-        high = self.highcut / nyquist
-        b, a = butter(4, [low, high], btype='band')
-        y = filtfilt(b, a, data)
-        return y
+        return self.__apply(self.__bandpass, data)
 
     def notch_filter(self, data, notch_freq=50.0, quality_factor=30.0):
-        nyquist = 0.5 * self.sampling_frequency
-        notch = notch_freq / nyquist
-        b, a = butter(2, [notch - notch / quality_factor, notch + notch / quality_factor], btype='bandstop')
-        y = filtfilt(b, a, data)
-        return y
+        key = (notch_freq, quality_factor)
+        if key not in self.__notches:
+            width = notch_freq / quality_factor
+            self.__notches[key] = butter(2, [notch_freq - width, notch_freq + width], btype='bandstop',
+                                         output='sos', fs=self.sampling_frequency)
+        return self.__apply(self.__notches[key], data)
+
+    def __apply(self, sos, data):
+        # Along the last axis, as filtfilt did
+        if not self.causal:
+            return sosfiltfilt(sos, data)
+        data = np.asarray(data, dtype=np.float64)
+        # Steady state for the first sample, as StreamingFilter starts
+        zi = sosfilt_zi(sos).reshape((sos.shape[0],) + (1,) * (data.ndim - 1) + (2,)) * data[..., :1]
+        return sosfilt(sos, data, zi=zi)[0]